@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""Measure the latency of common gradebook queries on a large database.
+
+By default, this creates a gradebook with 1000 students and 20 assignments
+(each with one notebook containing several grade and solution cells), with
+every student having submitted every assignment. It then times a few of the
+queries used by the autograder and formgrader. To see how much the secondary
+indexes help, run it again with ``--drop-indexes``:
+
+    python benchmarks/gradebook_queries.py
+    python benchmarks/gradebook_queries.py --drop-indexes
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from nbgrader.api import Gradebook, Base
+
+
+def build(gb, num_students, num_assignments, num_cells):
+    students = ["student{}".format(i) for i in range(num_students)]
+    for student in students:
+        gb.add_student(student)
+
+    for i in range(num_assignments):
+        assignment = "ps{}".format(i)
+        gb.add_assignment(assignment)
+        gb.add_notebook("p1", assignment)
+        for j in range(num_cells):
+            gb.add_grade_cell("grade{}".format(j), "p1", assignment,
+                max_score=1, cell_type="code" if j % 2 == 0 else "markdown")
+            gb.add_solution_cell("solution{}".format(j), "p1", assignment)
+        gb.add_submissions_bulk(assignment, students)
+
+    return students
+
+
+def drop_indexes(gb):
+    engine = gb.db.get_bind()
+    gb.db.close()
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.drop(bind=engine)
+
+
+def timeit(label, func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+    print("{:<40} {:>10.2f} ms (best of {})".format(label, min(times) * 1000, repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--assignments", type=int, default=20)
+    parser.add_argument("--cells", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--drop-indexes", action="store_true",
+        help="drop the secondary indexes before running the queries")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        gb = Gradebook("sqlite:///" + os.path.join(tmpdir, "gradebook.db"))
+
+        start = time.time()
+        students = build(gb, args.students, args.assignments, args.cells)
+        print("Created {} submissions in {:.1f} s".format(
+            args.students * args.assignments, time.time() - start))
+
+        if args.drop_indexes:
+            drop_indexes(gb)
+
+        student = students[len(students) // 2]
+        assignment = "ps{}".format(args.assignments // 2)
+
+        def find_grade():
+            gb.find_grade("grade0", "p1", assignment, student)
+
+        def submission_scores():
+            submission = gb.find_submission(assignment, student)
+            return submission.score, submission.needs_manual_grade
+
+        def student_score():
+            return gb.find_student(student).score
+
+        def student_submissions():
+            return [x.score for x in gb.student_submissions(student)]
+
+        def notebook_submission_dicts():
+            return gb.notebook_submission_dicts("p1", assignment)
+
+        def assignment_submission_dicts():
+            return gb.assignment_submission_dicts(assignment)
+
+        timeit("find_grade", find_grade, args.repeat)
+        timeit("SubmittedAssignment.score", submission_scores, args.repeat)
+        timeit("Student.score", student_score, args.repeat)
+        timeit("student_submissions (with scores)", student_submissions, args.repeat)
+        timeit("notebook_submission_dicts", notebook_submission_dicts, args.repeat)
+        timeit("assignment_submission_dicts", assignment_submission_dicts, args.repeat)
+
+        gb.db.close()
+
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,8 @@ apps = [
     'AssignApp',
     'AutogradeApp',
     'CollectApp',
+    'DbApp',
+    'ExportApp',
     'ExtensionApp',
     'FeedbackApp',
     'FetchApp',
@@ -33,6 +35,7 @@ apps = [
     'ListApp',
     'NbGraderApp',
     'ReleaseApp',
+    'ScoresApp',
     'SubmitApp',
     'ValidateApp'
 ]
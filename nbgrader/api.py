@@ -1,14 +1,24 @@
 from __future__ import division
 
+import os
+import time
+import weakref
+import functools
+import itertools
+import threading
+
 from nbgrader import utils
 
 from sqlalchemy import (create_engine, ForeignKey, Column, String, Text,
-    DateTime, Interval, Float, Enum, UniqueConstraint, Boolean)
+    DateTime, Interval, Float, Integer, Enum, UniqueConstraint, Boolean, MetaData,
+    Table, event, inspect)
 from sqlalchemy.orm import sessionmaker, scoped_session, relationship, column_property
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.orm.exc import NoResultFound, FlushError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.associationproxy import association_proxy
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, DBAPIError
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.sql import and_
 from sqlalchemy import select, func, exists, case, literal_column
 
@@ -103,7 +113,7 @@ class Notebook(Base):
     assignment = None
 
     #: Unique id of :attr:`~nbgrader.api.Notebook.assignment`
-    assignment_id = Column(String(32), ForeignKey('assignment.id'))
+    assignment_id = Column(String(32), ForeignKey('assignment.id'), index=True)
 
     #: A collection of grade cells contained within this notebook, represented
     #: by :class:`~nbgrader.api.GradeCell` objects
@@ -186,7 +196,7 @@ class GradeCell(Base):
     notebook = None
 
     #: Unique id of the :attr:`~nbgrader.api.GradeCell.notebook`
-    notebook_id = Column(String(32), ForeignKey('notebook.id'))
+    notebook_id = Column(String(32), ForeignKey('notebook.id'), index=True)
 
     #: The assignment that this cell is contained within, represented by a
     #: :class:`~nbgrader.api.Assignment` object
@@ -232,7 +242,7 @@ class SolutionCell(Base):
     notebook = None
 
     #: Unique id of the :attr:`~nbgrader.api.SolutionCell.notebook`
-    notebook_id = Column(String(32), ForeignKey('notebook.id'))
+    notebook_id = Column(String(32), ForeignKey('notebook.id'), index=True)
 
     #: The assignment that this cell is contained within, represented by a
     #: :class:`~nbgrader.api.Assignment` object
@@ -289,7 +299,7 @@ class SourceCell(Base):
     notebook = None
 
     #: Unique id of the :attr:`~nbgrader.api.SourceCell.notebook`
-    notebook_id = Column(String(32), ForeignKey('notebook.id'))
+    notebook_id = Column(String(32), ForeignKey('notebook.id'), index=True)
 
     #: The assignment that this cell is contained within, represented by a
     #: :class:`~nbgrader.api.Assignment` object
@@ -393,7 +403,7 @@ class SubmittedAssignment(Base):
     student = None
 
     #: Unique id of :attr:`~nbgrader.api.SubmittedAssignment.student`
-    student_id = Column(String(128), ForeignKey('student.id'))
+    student_id = Column(String(128), ForeignKey('student.id'), index=True)
 
     #: (Optional) The date and time that the assignment was submitted, in date
     #: time format with a UTC timezone
@@ -508,7 +518,7 @@ class SubmittedNotebook(Base):
     assignment = None
 
     #: Unique id of :attr:`~nbgrader.api.SubmittedNotebook.assignment`
-    assignment_id = Column(String(32), ForeignKey('submitted_assignment.id'))
+    assignment_id = Column(String(32), ForeignKey('submitted_assignment.id'), index=True)
 
     #: The master version of this notebook, represesnted by a
     #: :class:`~nbgrader.api.Notebook` object
@@ -532,6 +542,15 @@ class SubmittedNotebook(Base):
     #: Whether this assignment has been flagged by a human grader
     flagged = Column(Boolean, default=False)
 
+    #: Checksum of the submitted notebook (and of the other files submitted
+    #: along with it) at the time that it was last autograded
+    checksum = Column(String(128), nullable=True)
+
+    #: Checksum of the master version of the notebook (and of the other files
+    #: in the source directory) at the time that this notebook was last
+    #: autograded
+    source_checksum = Column(String(128), nullable=True)
+
     #: The score assigned to this notebook, automatically calculated from the
     #: :attr:`~nbgrader.api.Grade.score` of each grade cell within
     #: this submitted notebook.
@@ -619,7 +638,7 @@ class Grade(Base):
     notebook = None
 
     #: Unique id of :attr:`~nbgrader.api.Grade.notebook`
-    notebook_id = Column(String(32), ForeignKey('submitted_notebook.id'))
+    notebook_id = Column(String(32), ForeignKey('submitted_notebook.id'), index=True)
 
     #: The master version of the cell this grade is assigned to, represented by
     #: a :class:`~nbgrader.api.GradeCell` object.
@@ -715,7 +734,7 @@ class Comment(Base):
     notebook = None
 
     #: Unique id of :attr:`~nbgrader.api.Comment.notebook`
-    notebook_id = Column(String(32), ForeignKey('submitted_notebook.id'))
+    notebook_id = Column(String(32), ForeignKey('submitted_notebook.id'), index=True)
 
     #: The master version of the cell this comment is assigned to, represented by
     #: a :class:`~nbgrader.api.SolutionCell` object.
@@ -980,6 +999,328 @@ SubmittedNotebook.failed_tests = column_property(
     .correlate_except(Grade), deferred=True)
 
 
+## Materialized scores
+
+#: Metadata for the tables that are optional, and which are therefore not
+#: created automatically along with the rest of the database
+optional_metadata = MetaData()
+
+#: Table of precomputed scores for each submitted notebook. This table only
+#: exists if it has been enabled with
+#: :meth:`~nbgrader.api.Gradebook.enable_materialized_scores`, in which case
+#: it is kept up to date whenever grades are changed through a
+#: :class:`~nbgrader.api.Gradebook`.
+submitted_notebook_score = Table(
+    "submitted_notebook_score", optional_metadata,
+    Column("submitted_notebook_id", String(32), primary_key=True),
+    Column("submitted_assignment_id", String(32), nullable=False, index=True),
+    Column("score", Float(), nullable=False),
+    Column("code_score", Float(), nullable=False),
+    Column("written_score", Float(), nullable=False),
+    Column("needs_manual_grade", Boolean, nullable=False),
+    Column("failed_tests", Boolean, nullable=False))
+
+def compute_notebook_scores():
+    """Returns a query which computes the same columns as are stored in
+    :data:`~nbgrader.api.submitted_notebook_score`, directly from the grades."""
+    code_score = case([(GradeCell.cell_type == "code", Grade.score)], else_=0.0)
+    written_score = case([(GradeCell.cell_type == "markdown", Grade.score)], else_=0.0)
+    needs_manual_grade = case([(Grade.needs_manual_grade, 1)], else_=0)
+    failed_tests = case([(and_(
+        GradeCell.cell_type == "code",
+        Grade.auto_score < GradeCell.max_score), 1)], else_=0)
+
+    return select([
+        SubmittedNotebook.id.label("submitted_notebook_id"),
+        SubmittedNotebook.assignment_id.label("submitted_assignment_id"),
+        func.coalesce(func.sum(Grade.score), 0.0).label("score"),
+        func.coalesce(func.sum(code_score), 0.0).label("code_score"),
+        func.coalesce(func.sum(written_score), 0.0).label("written_score"),
+        (func.coalesce(func.max(needs_manual_grade), 0) > 0).label("needs_manual_grade"),
+        (func.coalesce(func.max(failed_tests), 0) > 0).label("failed_tests")
+    ]).select_from(
+        SubmittedNotebook.__table__
+            .outerjoin(Grade.__table__, Grade.notebook_id == SubmittedNotebook.id)
+            .outerjoin(GradeCell.__table__, GradeCell.id == Grade.cell_id)
+    ).group_by(SubmittedNotebook.id, SubmittedNotebook.assignment_id)
+
+# Whether each engine's database was last found to have the materialized
+# scores table, and when, so that the schema is not inspected on every flush
+_materialized_scores = weakref.WeakKeyDictionary()
+
+#: How long (in seconds) to wait before checking again whether the
+#: materialized scores table exists, if it did not exist the last time
+MATERIALIZED_SCORES_RECHECK = 60
+
+def has_materialized_scores(bind, recheck=False):
+    """Whether the :data:`~nbgrader.api.submitted_notebook_score` table exists
+    in the database that ``bind`` (an engine or connection) is connected to.
+
+    A table that exists is assumed to keep existing, until a statement that
+    uses it fails (see :func:`~nbgrader.api.materialized_scores_dropped`). A
+    table that does not exist is looked for again every
+    :data:`~nbgrader.api.MATERIALIZED_SCORES_RECHECK` seconds, in case it has
+    been created by another process since. Passing ``recheck=True`` always
+    inspects the database.
+
+    """
+    engine = bind.engine
+    now = time.time()
+    cached = _materialized_scores.get(engine, None)
+    if recheck or cached is None or (not cached[0] and now - cached[1] > MATERIALIZED_SCORES_RECHECK):
+        enabled = submitted_notebook_score.name in inspect(bind).get_table_names()
+        _materialized_scores[engine] = (enabled, now)
+        return enabled
+    return cached[0]
+
+def materialized_scores_dropped(bind):
+    """Whether the :data:`~nbgrader.api.submitted_notebook_score` table was
+    thought to exist, but has since been dropped (by another process). This is
+    checked when a statement that uses the table fails, and updates what
+    :func:`~nbgrader.api.has_materialized_scores` returns.
+
+    """
+    engine = bind.engine
+    cached = _materialized_scores.get(engine, None)
+    if cached is None or not cached[0]:
+        return False
+    # the connection that failed may not be usable for the rest of its
+    # transaction, so inspect the database with a new one
+    return not has_materialized_scores(engine, recheck=True)
+
+def refresh_notebook_scores(bind, notebook_ids):
+    """Recompute the rows of :data:`~nbgrader.api.submitted_notebook_score`
+    for the given submitted notebooks. Submitted notebooks that no longer
+    exist have their rows removed.
+
+    """
+    notebook_ids = list(notebook_ids)
+    table = submitted_notebook_score
+
+    # stay below the limit that SQLite places on the number of parameters
+    # in a single statement
+    for i in range(0, len(notebook_ids), 500):
+        chunk = notebook_ids[i:i + 500]
+        bind.execute(table.delete().where(table.c.submitted_notebook_id.in_(chunk)))
+        bind.execute(table.insert().from_select(
+            [c.name for c in table.c],
+            compute_notebook_scores().where(SubmittedNotebook.id.in_(chunk))))
+
+def _update_materialized_scores(session, flush_context):
+    """Keeps :data:`~nbgrader.api.submitted_notebook_score` (if it exists) up
+    to date with the grades that have just been flushed by ``session``."""
+    notebook_ids = set()
+    cell_ids = set()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Grade):
+            notebook_ids.add(obj.notebook_id)
+        elif isinstance(obj, SubmittedNotebook) and obj not in session.dirty:
+            notebook_ids.add(obj.id)
+        elif isinstance(obj, GradeCell) and obj in session.dirty:
+            cell_ids.add(obj.id)
+
+    notebook_ids.discard(None)
+    if len(notebook_ids) == 0 and len(cell_ids) == 0:
+        return
+
+    connection = session.connection()
+    if not has_materialized_scores(connection):
+        return
+
+    # changing the type or max score of a grade cell changes the scores of
+    # every submitted version of that cell
+    if len(cell_ids) > 0:
+        notebook_ids.update(x[0] for x in connection.execute(
+            select([Grade.notebook_id]).where(Grade.cell_id.in_(list(cell_ids)))))
+
+    try:
+        refresh_notebook_scores(connection, notebook_ids)
+    except DBAPIError:
+        if not materialized_scores_dropped(connection):
+            raise
+
+def _reads_materialized_scores(method):
+    """Decorator for gradebook methods that may read the materialized scores.
+    If the method fails because the table has been dropped since it was last
+    checked for, it is run again with the scores computed from the grades."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        except DBAPIError:
+            if not materialized_scores_dropped(self.db.get_bind()):
+                raise
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def create_missing_indexes(bind):
+    """Create any indexes in the schema which do not exist in the database.
+    This is needed for databases which were created before the indexes were
+    added to the schema, because ``create_all`` skips tables that already
+    exist (including the indexes on those tables). See
+    :mod:`nbgrader.migrations`.
+
+    """
+    inspector = inspect(bind)
+    tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = set(x['name'] for x in inspector.get_indexes(table.name))
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=bind)
+
+
+def add_missing_columns(bind, table_name, column_names):
+    """Add columns in the schema to an existing table, if the table does not
+    already have them. The columns must be nullable, since existing rows
+    have no value for them. See :mod:`nbgrader.migrations`.
+
+    """
+    table = Base.metadata.tables[table_name]
+    existing = set(x['name'] for x in inspect(bind).get_columns(table_name))
+    for name in column_names:
+        if name in existing:
+            continue
+        column = table.c[name]
+        bind.execute("ALTER TABLE {} ADD COLUMN {} {}".format(
+            table.name, column.name, column.type.compile(dialect=bind.dialect)))
+
+
+## Grade table
+
+#: Names of the values in each row given by
+#: :meth:`~nbgrader.api.Gradebook.grade_table`
+grade_table_columns = [
+    "student_id", "first_name", "last_name", "email",
+    "assignment", "duedate", "timestamp",
+    "notebook", "grade_cell", "cell_type",
+    "auto_score", "manual_score", "score", "max_score", "needs_manual_grade"
+]
+
+
+## Schema version
+
+#: The version of the schema defined in this module. This must be increased
+#: whenever the schema changes in a way that ``create_all`` cannot apply to an
+#: existing database, along with a corresponding upgrade step in
+#: :mod:`nbgrader.migrations`.
+SCHEMA_VERSION = 2
+
+#: Table holding the version of the schema that the database conforms to.
+#: Databases created before this table existed are considered to be at
+#: version 0.
+schema_version = Table(
+    "schema_version", Base.metadata,
+    Column("version", Integer, nullable=False))
+
+def get_schema_version(bind):
+    """Get the version of the schema of the database that ``bind`` (an engine
+    or connection) is connected to."""
+    version = bind.execute(select([schema_version.c.version])).scalar()
+    if version is None:
+        return 0
+    return version
+
+def set_schema_version(bind, version):
+    """Record that the database that ``bind`` is connected to conforms to
+    the given version of the schema."""
+    bind.execute(schema_version.delete())
+    bind.execute(schema_version.insert().values(version=version))
+
+# Engines whose databases are known to be at the latest version of the schema,
+# so that the version only needs to be checked once per engine
+_current_engines = weakref.WeakSet()
+
+def check_schema_version(engine):
+    """Check that the database that ``engine`` is connected to does not need
+    to be upgraded, raising :class:`~nbgrader.api.InvalidEntry` if it does.
+    Once a database has been found to be up to date, it is not checked
+    again."""
+    if engine in _current_engines:
+        return
+
+    version = get_schema_version(engine)
+    if version < SCHEMA_VERSION:
+        raise InvalidEntry(
+            "The database {} was created by an older version of nbgrader "
+            "(schema version {}, but version {} is needed), and must be "
+            "upgraded by running `nbgrader db upgrade`".format(
+                engine.url, version, SCHEMA_VERSION))
+    _current_engines.add(engine)
+
+def _create_schema(engine):
+    # new databases are created with the latest schema, but existing
+    # databases need to be upgraded with ``nbgrader db upgrade``
+    is_new = len(inspect(engine).get_table_names()) == 0
+    Base.metadata.create_all(bind=engine)
+    if is_new:
+        set_schema_version(engine, SCHEMA_VERSION)
+
+
+# Database engines are shared by all gradebooks in the same process that use the
+# same database, so that creating a new gradebook (which happens at least once
+# per notebook when running nbgrader) does not need to create a new engine and
+# check the database schema each time.
+_engines = {}
+_engines_lock = threading.Lock()
+
+def get_engine(db_url):
+    """Get the engine for a database URL, creating the engine (and any missing
+    tables in the database) if this is the first time the database has been
+    used by this process.
+
+    Every in-memory SQLite database is distinct, so a new engine is always
+    created for those.
+
+    Parameters
+    ----------
+    db_url : string
+        The URL to the database, e.g. ``sqlite:///grades.db``
+
+    Returns
+    -------
+    engine : :class:`sqlalchemy.engine.Engine`
+
+    """
+    url = make_url(db_url)
+    is_sqlite = url.drivername.startswith("sqlite")
+    if is_sqlite and url.database in (None, "", ":memory:"):
+        engine = create_engine(url)
+        _create_schema(engine)
+        return engine
+
+    if is_sqlite:
+        # relative paths are relative to the current directory, which could
+        # change, so they need to be resolved before they are used as a key
+        url.database = os.path.abspath(url.database)
+
+    key = str(url)
+    with _engines_lock:
+        if key not in _engines:
+            _engines[key] = create_engine(url)
+            _create_schema(_engines[key])
+
+        # if the database file has been removed since it was first used,
+        # then the tables need to be created again
+        elif is_sqlite and not os.path.exists(url.database):
+            _create_schema(_engines[key])
+
+        return _engines[key]
+
+def dispose_engines():
+    """Close the connections held by all of the shared database engines. This
+    should be called in child processes after forking, so that connections are
+    not shared between processes.
+
+    """
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+
+
 class Gradebook(object):
     """The gradebook object to interface with the database holding
     nbgrader grades.
@@ -995,21 +1336,22 @@ class Gradebook(object):
             The URL to the database, e.g. ``sqlite:///grades.db``
 
         """
-        # create the connection to the database
-        engine = create_engine(db_url)
-        self.db = scoped_session(sessionmaker(autoflush=True, bind=engine))
-
-        # this creates all the tables in the database if they don't already exist
-        Base.metadata.create_all(bind=engine)
+        # create the connection to the database (this also creates all the
+        # tables in the database if they don't already exist)
+        engine = get_engine(db_url)
+        check_schema_version(engine)
+        session_factory = sessionmaker(autoflush=True, bind=engine)
+        event.listen(session_factory, "after_flush", _update_materialized_scores)
+        self.db = scoped_session(session_factory)
 
     #### Students
 
     @property
     def students(self):
         """A list of all students in the database."""
-        return self.db.query(Student)\
+        return self._load_scores(self.db.query(Student)\
             .order_by(Student.last_name, Student.first_name)\
-            .all()
+            .all())
 
     def add_student(self, student_id, **kwargs):
         """Add a new student to the database.
@@ -1698,6 +2040,105 @@ class Gradebook(object):
 
         return submission
 
+    def add_submissions_bulk(self, assignment, students, **kwargs):
+        """Add new submissions of an assignment by many students at once.
+
+        This is equivalent to calling :meth:`~nbgrader.api.Gradebook.add_submission`
+        once for each student, except that the submissions (along with their
+        notebooks, grades, and comments) are all created using a small number
+        of bulk inserts within a single transaction. Either all of the
+        submissions are created, or none of them are.
+
+        Parameters
+        ----------
+        assignment : string
+            the name of an existing assignment
+        students : list of strings
+            the names of existing students
+        `**kwargs`
+            additional keyword arguments for :class:`~nbgrader.api.SubmittedAssignment`,
+            which are used for every submission
+
+        Returns
+        -------
+        submissions : list of :class:`~nbgrader.api.SubmittedAssignment`
+
+        """
+
+        if 'timestamp' in kwargs:
+            kwargs['timestamp'] = utils.parse_utc(kwargs['timestamp'])
+
+        assignment = self.find_assignment(assignment)
+        students = list(students)
+
+        known_students = set(x[0] for x in self.db.query(Student.id))
+        for student in students:
+            if student not in known_students:
+                raise MissingEntry("No such student: {}".format(student))
+
+        # get the structure of the assignment with one query per table, rather
+        # than walking the notebooks and cells one at a time
+        notebook_ids = [x[0] for x in self.db.query(Notebook.id)\
+            .filter(Notebook.assignment_id == assignment.id)]
+        grade_cells = self.db.query(GradeCell.id, GradeCell.notebook_id)\
+            .join(Notebook, Notebook.id == GradeCell.notebook_id)\
+            .filter(Notebook.assignment_id == assignment.id)\
+            .all()
+        solution_cells = self.db.query(SolutionCell.id, SolutionCell.notebook_id)\
+            .join(Notebook, Notebook.id == SolutionCell.notebook_id)\
+            .filter(Notebook.assignment_id == assignment.id)\
+            .all()
+
+        # ids need to be generated up front, so that the rows for each table
+        # can refer to the rows in the other tables
+        submissions = []
+        submitted_notebooks = []
+        grades = []
+        comments = []
+        for student in students:
+            submission = dict(kwargs, id=new_uuid(), assignment_id=assignment.id, student_id=student)
+            submissions.append(submission)
+
+            nb_ids = {}
+            for notebook_id in notebook_ids:
+                nb_ids[notebook_id] = new_uuid()
+                submitted_notebooks.append(dict(
+                    id=nb_ids[notebook_id], notebook_id=notebook_id,
+                    assignment_id=submission['id']))
+
+            for cell_id, notebook_id in grade_cells:
+                grades.append(dict(id=new_uuid(), cell_id=cell_id, notebook_id=nb_ids[notebook_id]))
+
+            for cell_id, notebook_id in solution_cells:
+                comments.append(dict(id=new_uuid(), cell_id=cell_id, notebook_id=nb_ids[notebook_id]))
+
+        try:
+            for table, rows in [(SubmittedAssignment.__table__, submissions),
+                                (SubmittedNotebook.__table__, submitted_notebooks),
+                                (Grade.__table__, grades),
+                                (Comment.__table__, comments)]:
+                if len(rows) > 0:
+                    self.db.execute(table.insert(), rows)
+
+            # these inserts bypass the session, so the materialized scores
+            # will not have been updated automatically
+            if self.materialized_scores:
+                refresh_notebook_scores(
+                    self.db.connection(), [x['id'] for x in submitted_notebooks])
+
+            self.db.commit()
+
+        except (IntegrityError, FlushError) as e:
+            self.db.rollback()
+            raise InvalidEntry(*e.args)
+
+        ids = set(x['id'] for x in submissions)
+        created = self.db.query(SubmittedAssignment)\
+            .filter(SubmittedAssignment.assignment_id == assignment.id)\
+            .all()
+        created = dict((x.student_id, x) for x in created if x.id in ids)
+        return [created[student] for student in students]
+
     def find_submission(self, assignment, student):
         """Find a student's submission for a given assignment.
 
@@ -1832,10 +2273,10 @@ class Gradebook(object):
 
         """
 
-        return self.db.query(SubmittedAssignment)\
+        return self._load_scores(self.db.query(SubmittedAssignment)\
             .join(Assignment, Assignment.id == SubmittedAssignment.assignment_id)\
             .filter(Assignment.name == assignment)\
-            .all()
+            .all())
 
     def notebook_submissions(self, notebook, assignment):
         """Find all submissions of a given notebook in a given assignment.
@@ -1854,12 +2295,12 @@ class Gradebook(object):
 
         """
 
-        return self.db.query(SubmittedNotebook)\
+        return self._load_scores(self.db.query(SubmittedNotebook)\
             .join(Notebook, Notebook.id == SubmittedNotebook.notebook_id)\
             .join(SubmittedAssignment, SubmittedAssignment.id == SubmittedNotebook.assignment_id)\
             .join(Assignment, Assignment.id == SubmittedAssignment.assignment_id)\
             .filter(Notebook.name == notebook, Assignment.name == assignment)\
-            .all()
+            .all())
 
     def student_submissions(self, student):
         """Find all submissions by a given student.
@@ -1876,10 +2317,10 @@ class Gradebook(object):
 
         """
 
-        return self.db.query(SubmittedAssignment)\
+        return self._load_scores(self.db.query(SubmittedAssignment)\
             .join(Student, Student.id == SubmittedAssignment.student_id)\
             .filter(Student.id == student)\
-            .all()
+            .all())
 
     def find_submission_notebook(self, notebook, assignment, student):
         """Find a particular notebook in a student's submission for a given 
@@ -1940,6 +2381,31 @@ class Gradebook(object):
 
         return notebook
 
+    def submission_notebook_students(self, notebook_ids):
+        """Find the students who submitted each of the given submitted
+        notebooks, using a single query.
+
+        Parameters
+        ----------
+        notebook_ids : list of strings
+            the unique ids of submitted notebooks
+
+        Returns
+        -------
+        students : dict
+            The unique id of the student for each submitted notebook id. Ids
+            which do not correspond to a submitted notebook are omitted.
+
+        """
+        notebook_ids = list(notebook_ids)
+        if len(notebook_ids) == 0:
+            return {}
+
+        return dict(self.db.query(SubmittedNotebook.id, SubmittedAssignment.student_id)\
+            .join(SubmittedAssignment, SubmittedAssignment.id == SubmittedNotebook.assignment_id)\
+            .filter(SubmittedNotebook.id.in_(notebook_ids))\
+            .all())
+
     def find_grade(self, grade_cell, notebook, assignment, student):
         """Find a particular grade in a notebook in a student's submission 
         for a given assignment.
@@ -2239,6 +2705,318 @@ class Gradebook(object):
                 GradeCell.cell_type == "markdown")).scalar()
         return score_sum / notebook.num_submissions
 
+    def _notebook_scores(self, *criteria):
+        """The scores of submitted notebooks, with the same columns as
+        :data:`~nbgrader.api.submitted_notebook_score`. These come from the
+        materialized scores if they are enabled, and are computed from the
+        grades otherwise. In the latter case, only the submitted notebooks
+        matching ``criteria`` are computed, though callers must still filter
+        the results themselves."""
+        if self.materialized_scores:
+            return submitted_notebook_score
+        else:
+            scores = compute_notebook_scores()
+            if len(criteria) > 0:
+                scores = scores.where(and_(*criteria))
+            return scores.alias()
+
+    @_reads_materialized_scores
+    def _load_scores(self, objects):
+        """Fill in the scores of a list of submitted notebooks, submitted
+        assignments, or students from the materialized scores (if they are
+        enabled) with a single query, rather than computing them with a
+        separate query for each object when they are first accessed. Objects
+        without any materialized scores are left to compute their own."""
+        if len(objects) == 0 or not self.materialized_scores:
+            return objects
+
+        table = submitted_notebook_score
+        cls = type(objects[0])
+        if cls is SubmittedNotebook:
+            key = table.c.submitted_notebook_id
+            names = ["score", "code_score", "written_score", "needs_manual_grade", "failed_tests"]
+            query = select([key] + [table.c[x] for x in names])
+        elif cls is SubmittedAssignment:
+            key = table.c.submitted_assignment_id
+            names = ["score", "code_score", "written_score", "needs_manual_grade"]
+            query = select([
+                key,
+                func.sum(table.c.score),
+                func.sum(table.c.code_score),
+                func.sum(table.c.written_score),
+                func.max(case([(table.c.needs_manual_grade, 1)], else_=0))
+            ]).group_by(key)
+        else:
+            key = SubmittedAssignment.student_id
+            names = ["score"]
+            query = select([key, func.sum(table.c.score)])\
+                .select_from(table.join(
+                    SubmittedAssignment.__table__,
+                    SubmittedAssignment.id == table.c.submitted_assignment_id))\
+                .group_by(key)
+
+        ids = [x.id for x in objects]
+        scores = {}
+        for i in range(0, len(ids), 500):
+            for row in self.db.execute(query.where(key.in_(ids[i:i + 500]))):
+                scores[row[0]] = row[1:]
+
+        for obj in objects:
+            if obj.id not in scores:
+                continue
+            for name, value in zip(names, scores[obj.id]):
+                if name in ("needs_manual_grade", "failed_tests"):
+                    value = bool(value)
+                set_committed_value(obj, name, value)
+
+        return objects
+
+    def _max_scores(self, key):
+        """Subquery of the total, code, and written maximum scores of the grade
+        cells, grouped by ``key`` (a column of either
+        :class:`~nbgrader.api.GradeCell` or :class:`~nbgrader.api.Notebook`)."""
+        code = case([(GradeCell.cell_type == "code", GradeCell.max_score)], else_=0.0)
+        written = case([(GradeCell.cell_type == "markdown", GradeCell.max_score)], else_=0.0)
+        return self.db.query(
+            key.label("id"),
+            func.sum(GradeCell.max_score).label("max_score"),
+            func.sum(code).label("max_code_score"),
+            func.sum(written).label("max_written_score")
+        ).select_from(GradeCell)\
+         .join(Notebook, Notebook.id == GradeCell.notebook_id)\
+         .group_by(key)\
+         .subquery()
+
+    @_reads_materialized_scores
+    def assignment_dicts(self):
+        """Returns a list of dictionaries containing assignment data, in the
+        same order as :attr:`~nbgrader.api.Gradebook.assignments`. Equivalent
+        to calling :func:`~nbgrader.api.Assignment.to_dict` for each
+        assignment, except that this method uses a single query, and that each
+        dictionary also includes the ``average_score``, ``average_code_score``
+        and ``average_written_score`` of the assignment.
+
+        Returns
+        -------
+        assignments : list
+            A list of dictionaries, one per assignment
+
+        """
+        scores = self._notebook_scores()
+        max_scores = self._max_scores(Notebook.assignment_id)
+
+        # subquery the number of submissions and their total scores
+        submissions = self.db.query(
+            SubmittedAssignment.assignment_id.label("id"),
+            func.count(SubmittedAssignment.id.distinct()).label("num_submissions"),
+            func.sum(scores.c.score).label("score"),
+            func.sum(scores.c.code_score).label("code_score"),
+            func.sum(scores.c.written_score).label("written_score")
+        ).outerjoin(scores, scores.c.submitted_assignment_id == SubmittedAssignment.id)\
+         .group_by(SubmittedAssignment.assignment_id)\
+         .subquery()
+
+        # full query
+        assignments = self.db.query(
+            Assignment.id, Assignment.name, Assignment.duedate,
+            func.coalesce(submissions.c.num_submissions, 0),
+            func.coalesce(max_scores.c.max_score, 0.0),
+            func.coalesce(max_scores.c.max_code_score, 0.0),
+            func.coalesce(max_scores.c.max_written_score, 0.0),
+            func.coalesce(submissions.c.score, 0.0),
+            func.coalesce(submissions.c.code_score, 0.0),
+            func.coalesce(submissions.c.written_score, 0.0)
+        ).outerjoin(max_scores, max_scores.c.id == Assignment.id)\
+         .outerjoin(submissions, submissions.c.id == Assignment.id)\
+         .order_by(Assignment.duedate, Assignment.name)\
+         .all()
+
+        dicts = []
+        for (assignment_id, name, duedate, num_submissions, max_score,
+                max_code_score, max_written_score, score, code_score,
+                written_score) in assignments:
+            n = num_submissions if num_submissions > 0 else 1
+            dicts.append({
+                "id": assignment_id,
+                "name": name,
+                "duedate": duedate.isoformat() if duedate is not None else None,
+                "num_submissions": num_submissions,
+                "max_score": max_score,
+                "max_code_score": max_code_score,
+                "max_written_score": max_written_score,
+                "average_score": score / n,
+                "average_code_score": code_score / n,
+                "average_written_score": written_score / n
+            })
+        return dicts
+
+    @_reads_materialized_scores
+    def notebook_dicts(self, assignment_id):
+        """Returns a list of dictionaries containing data about the notebooks
+        in an assignment, ordered by name. Equivalent to calling
+        :func:`~nbgrader.api.Notebook.to_dict` for each notebook, except that
+        this method uses a single query, and that each dictionary also includes
+        the ``average_score``, ``average_code_score`` and
+        ``average_written_score`` of the notebook.
+
+        Parameters
+        ----------
+        assignment_id : string
+            the name of the assignment
+
+        Returns
+        -------
+        notebooks : list
+            A list of dictionaries, one per notebook
+
+        """
+        assignment = self.find_assignment(assignment_id)
+        scores = self._notebook_scores(SubmittedNotebook.notebook_id.in_(
+            select([Notebook.id]).where(Notebook.assignment_id == assignment.id)))
+        max_scores = self._max_scores(GradeCell.notebook_id)
+
+        # subquery the number of submissions and their total scores
+        submissions = self.db.query(
+            SubmittedNotebook.notebook_id.label("id"),
+            func.count(SubmittedNotebook.id).label("num_submissions"),
+            func.sum(scores.c.score).label("score"),
+            func.sum(scores.c.code_score).label("code_score"),
+            func.sum(scores.c.written_score).label("written_score"),
+            func.max(scores.c.needs_manual_grade).label("needs_manual_grade")
+        ).outerjoin(scores, scores.c.submitted_notebook_id == SubmittedNotebook.id)\
+         .group_by(SubmittedNotebook.notebook_id)\
+         .subquery()
+
+        # full query
+        notebooks = self.db.query(
+            Notebook.id, Notebook.name,
+            func.coalesce(submissions.c.num_submissions, 0),
+            func.coalesce(max_scores.c.max_score, 0.0),
+            func.coalesce(max_scores.c.max_code_score, 0.0),
+            func.coalesce(max_scores.c.max_written_score, 0.0),
+            func.coalesce(submissions.c.needs_manual_grade, False),
+            func.coalesce(submissions.c.score, 0.0),
+            func.coalesce(submissions.c.code_score, 0.0),
+            func.coalesce(submissions.c.written_score, 0.0)
+        ).outerjoin(max_scores, max_scores.c.id == Notebook.id)\
+         .outerjoin(submissions, submissions.c.id == Notebook.id)\
+         .filter(Notebook.assignment_id == assignment.id)\
+         .order_by(Notebook.name)\
+         .all()
+
+        dicts = []
+        for (notebook_id, name, num_submissions, max_score, max_code_score,
+                max_written_score, needs_manual_grade, score, code_score,
+                written_score) in notebooks:
+            n = num_submissions if num_submissions > 0 else 1
+            dicts.append({
+                "id": notebook_id,
+                "name": name,
+                "num_submissions": num_submissions,
+                "max_score": max_score,
+                "max_code_score": max_code_score,
+                "max_written_score": max_written_score,
+                "needs_manual_grade": bool(needs_manual_grade),
+                "average_score": score / n,
+                "average_code_score": code_score / n,
+                "average_written_score": written_score / n
+            })
+        return dicts
+
+    @_reads_materialized_scores
+    def student_submission_dicts(self, student_id):
+        """Returns a list of dictionaries containing the student's submission
+        of every assignment in the gradebook, in the same order as
+        :attr:`~nbgrader.api.Gradebook.assignments`. For assignments that the
+        student has submitted, this is equivalent to calling
+        :func:`~nbgrader.api.SubmittedAssignment.to_dict`. For assignments that
+        the student has not submitted, the ``id``, ``duedate``, ``timestamp``
+        and ``extension`` are None, and the scores are zero. All of the
+        submissions are loaded with a single query.
+
+        Parameters
+        ----------
+        student_id : string
+            the unique id of the student
+
+        Returns
+        -------
+        submissions : list
+            A list of dictionaries, one per assignment
+
+        """
+        student = self.find_student(student_id)
+        max_scores = self._max_scores(Notebook.assignment_id)
+        scores = self._notebook_scores(SubmittedNotebook.assignment_id.in_(
+            select([SubmittedAssignment.id])\
+                .where(SubmittedAssignment.student_id == student.id)))
+
+        # subquery the scores of each of the student's submissions
+        submission_scores = self.db.query(
+            SubmittedAssignment.id.label("id"),
+            func.sum(scores.c.score).label("score"),
+            func.sum(scores.c.code_score).label("code_score"),
+            func.sum(scores.c.written_score).label("written_score"),
+            func.max(scores.c.needs_manual_grade).label("needs_manual_grade")
+        ).join(scores, scores.c.submitted_assignment_id == SubmittedAssignment.id)\
+         .filter(SubmittedAssignment.student_id == student.id)\
+         .group_by(SubmittedAssignment.id)\
+         .subquery()
+
+        # full query
+        submissions = self.db.query(
+            Assignment.name, Assignment.duedate,
+            SubmittedAssignment.id, SubmittedAssignment.timestamp,
+            SubmittedAssignment.extension,
+            func.coalesce(max_scores.c.max_score, 0.0),
+            func.coalesce(max_scores.c.max_code_score, 0.0),
+            func.coalesce(max_scores.c.max_written_score, 0.0),
+            func.coalesce(submission_scores.c.score, 0.0),
+            func.coalesce(submission_scores.c.code_score, 0.0),
+            func.coalesce(submission_scores.c.written_score, 0.0),
+            func.coalesce(submission_scores.c.needs_manual_grade, False)
+        ).outerjoin(SubmittedAssignment, and_(
+            SubmittedAssignment.assignment_id == Assignment.id,
+            SubmittedAssignment.student_id == student.id))\
+         .outerjoin(max_scores, max_scores.c.id == Assignment.id)\
+         .outerjoin(submission_scores, submission_scores.c.id == SubmittedAssignment.id)\
+         .order_by(Assignment.duedate, Assignment.name)\
+         .all()
+
+        dicts = []
+        for (name, duedate, submission_id, timestamp, extension, max_score,
+                max_code_score, max_written_score, score, code_score,
+                written_score, needs_manual_grade) in submissions:
+
+            if submission_id is None:
+                duedate = None
+            elif duedate is not None and extension is not None:
+                duedate = duedate + extension
+
+            if timestamp is None or duedate is None:
+                total_seconds_late = 0
+            else:
+                total_seconds_late = max(0, (timestamp - duedate).total_seconds())
+
+            dicts.append({
+                "id": submission_id,
+                "name": name,
+                "student": student.id,
+                "timestamp": timestamp.isoformat() if timestamp is not None else None,
+                "extension": extension.total_seconds() if extension is not None else None,
+                "duedate": duedate.isoformat() if duedate is not None else None,
+                "total_seconds_late": total_seconds_late,
+                "score": score,
+                "max_score": max_score,
+                "code_score": code_score,
+                "max_code_score": max_code_score,
+                "written_score": written_score,
+                "max_written_score": max_written_score,
+                "needs_manual_grade": bool(needs_manual_grade)
+            })
+        return dicts
+
+    @_reads_materialized_scores
     def student_dicts(self):
         """Returns a list of dictionaries containing student data. Equivalent
         to calling :func:`~nbgrader.api.Student.to_dict` for each student,
@@ -2252,11 +3030,12 @@ class Gradebook(object):
 
         """
         # subquery the scores
+        notebook_scores = self._notebook_scores()
         scores = self.db.query(
-            Student.id,
-            func.sum(Grade.score).label("score")
-        ).join(SubmittedAssignment, SubmittedNotebook, Grade)\
-         .group_by(Student.id)\
+            SubmittedAssignment.student_id.label("id"),
+            func.sum(notebook_scores.c.score).label("score")
+        ).join(notebook_scores, notebook_scores.c.submitted_assignment_id == SubmittedAssignment.id)\
+         .group_by(SubmittedAssignment.student_id)\
          .subquery()
 
         # full query
@@ -2271,6 +3050,7 @@ class Gradebook(object):
         keys = ["id", "first_name", "last_name", "email", "score", "max_score"]
         return [dict(zip(keys, x)) for x in students]
 
+    @_reads_materialized_scores
     def notebook_submission_dicts(self, notebook_id, assignment_id):
         """Returns a list of dictionaries containing submission data. Equivalent
         to calling :func:`~nbgrader.api.SubmittedNotebook.to_dict` for each
@@ -2290,78 +3070,273 @@ class Gradebook(object):
             A list of dictionaries, one per submitted notebook
 
         """
-        # subquery the code scores
-        code_scores = self.db.query(
-            SubmittedNotebook.id,
-            func.sum(Grade.score).label("code_score"), 
-            func.sum(GradeCell.max_score).label("max_code_score"),
-        ).join(SubmittedAssignment, Notebook, Assignment, Student, Grade, GradeCell)\
-         .filter(GradeCell.cell_type == "code")\
-         .group_by(SubmittedNotebook.id)\
-         .subquery()
+        try:
+            notebook = self.find_notebook(notebook_id, assignment_id)
+        except MissingEntry:
+            return []
 
-        # subquery for the written scores
-        written_scores = self.db.query(
-            SubmittedNotebook.id,
-            func.sum(Grade.score).label("written_score"), 
-            func.sum(GradeCell.max_score).label("max_written_score"),
-        ).join(SubmittedAssignment, Notebook, Assignment, Student, Grade, GradeCell)\
-         .filter(GradeCell.cell_type == "markdown")\
-         .group_by(SubmittedNotebook.id)\
-         .subquery()
+        scores = self._notebook_scores(SubmittedNotebook.notebook_id == notebook.id)
+        submissions = self.db.query(
+            SubmittedNotebook.id, SubmittedAssignment.student_id,
+            scores.c.score, scores.c.code_score, scores.c.written_score,
+            scores.c.needs_manual_grade, scores.c.failed_tests,
+            SubmittedNotebook.flagged
+        ).join(SubmittedAssignment, SubmittedAssignment.id == SubmittedNotebook.assignment_id)\
+         .join(scores, scores.c.submitted_notebook_id == SubmittedNotebook.id)\
+         .filter(SubmittedNotebook.notebook_id == notebook.id)\
+         .all()
 
-        # subquery for needing manual grading
-        manual_grade = self.db.query(
+        max_score = notebook.max_score
+        max_code_score = notebook.max_code_score
+        max_written_score = notebook.max_written_score
+
+        dicts = []
+        for (submission_id, student_id, score, code_score, written_score,
+                needs_manual_grade, failed_tests, flagged) in submissions:
+            dicts.append({
+                "id": submission_id,
+                "name": notebook.name,
+                "student": student_id,
+                "score": score,
+                "max_score": max_score,
+                "code_score": code_score,
+                "max_code_score": max_code_score,
+                "written_score": written_score,
+                "max_written_score": max_written_score,
+                "needs_manual_grade": bool(needs_manual_grade),
+                "failed_tests": bool(failed_tests),
+                "flagged": flagged
+            })
+        return dicts
+
+    @_reads_materialized_scores
+    def notebook_submission_index(self, notebook_id, assignment_id):
+        """Returns the id of every submission of a notebook, along with whether
+        that submission failed any autograder tests, ordered by id. This is much
+        cheaper than :func:`~nbgrader.api.Gradebook.notebook_submission_dicts`,
+        for when only the order of the submissions is needed.
+
+        Parameters
+        ----------
+        notebook_id : string
+            the name of the notebook
+        assignment_id : string
+            the name of the assignment
+
+        Returns
+        -------
+        submissions : list
+            A list of ``(id, failed_tests)`` tuples, one per submitted notebook
+
+        """
+        notebook = self.find_notebook(notebook_id, assignment_id)
+        scores = self._notebook_scores(SubmittedNotebook.notebook_id == notebook.id)
+
+        submissions = self.db.query(
             SubmittedNotebook.id,
-            exists().where(Grade.needs_manual_grade).label("needs_manual_grade")
-        ).join(SubmittedAssignment, Assignment, Notebook)\
-         .filter(
-             Grade.notebook_id == SubmittedNotebook.id,
-             Grade.needs_manual_grade)\
-         .group_by(SubmittedNotebook.id)\
-         .subquery()
+            func.coalesce(scores.c.failed_tests, False)
+        ).outerjoin(scores, scores.c.submitted_notebook_id == SubmittedNotebook.id)\
+         .filter(SubmittedNotebook.notebook_id == notebook.id)\
+         .order_by(SubmittedNotebook.id)\
+         .all()
 
-        # subquery for failed tests
-        failed_tests = self.db.query(
+        return [(x[0], bool(x[1])) for x in submissions]
+
+    def grade_and_comment_dicts(self, submission_id):
+        """Returns dictionaries containing every grade and comment of a
+        submitted notebook. The values are the same as those given by
+        :func:`~nbgrader.api.Grade.to_dict` and
+        :func:`~nbgrader.api.Comment.to_dict`, but rather than loading each
+        grade and comment (and the objects they refer to) separately, all of
+        the grades are loaded with one query, and all of the comments with
+        another.
+
+        Parameters
+        ----------
+        submission_id : string
+            the unique id of the submitted notebook
+
+        Returns
+        -------
+        grades, comments : tuple of lists
+            A list of dictionaries, one per grade, and a list of dictionaries,
+            one per comment, each ordered by the name of the cell
+
+        """
+        notebook = self.db.query(
             SubmittedNotebook.id,
-            exists().where(Grade.failed_tests).label("failed_tests")
-        ).join(SubmittedAssignment, Assignment, Notebook)\
-         .filter(
-             Grade.notebook_id == SubmittedNotebook.id,
-             Grade.failed_tests)\
-         .group_by(SubmittedNotebook.id)\
-         .subquery()
+            Notebook.name.label("notebook"),
+            Assignment.name.label("assignment"),
+            SubmittedAssignment.student_id.label("student")
+        ).join(Notebook, Notebook.id == SubmittedNotebook.notebook_id)\
+         .join(SubmittedAssignment, SubmittedAssignment.id == SubmittedNotebook.assignment_id)\
+         .join(Assignment, Assignment.id == SubmittedAssignment.assignment_id)\
+         .filter(SubmittedNotebook.id == submission_id)\
+         .first()
+
+        if notebook is None:
+            raise MissingEntry()
+
+        grades = self.db.query(
+            Grade.id,
+            GradeCell.name,
+            Grade.auto_score,
+            Grade.manual_score,
+            GradeCell.max_score,
+            Grade.needs_manual_grade,
+            ((Grade.auto_score < GradeCell.max_score) & (GradeCell.cell_type == "code")).label("failed_tests"),
+            GradeCell.cell_type
+        ).join(GradeCell, GradeCell.id == Grade.cell_id)\
+         .filter(Grade.notebook_id == submission_id)\
+         .order_by(GradeCell.name)\
+         .all()
 
-        # full query
-        submissions = self.db.query(
-            SubmittedNotebook.id, Notebook.name, Student.id,
-            func.sum(Grade.score), func.sum(GradeCell.max_score),
-            code_scores.c.code_score, code_scores.c.max_code_score,
-            written_scores.c.written_score, written_scores.c.max_written_score,
-            func.coalesce(manual_grade.c.needs_manual_grade, False),
-            func.coalesce(failed_tests.c.failed_tests, False),
-            SubmittedNotebook.flagged
-        ).join(SubmittedAssignment, Notebook, Assignment, Student, Grade, GradeCell)\
-         .outerjoin(code_scores, SubmittedNotebook.id == code_scores.c.id)\
-         .outerjoin(written_scores, SubmittedNotebook.id == written_scores.c.id)\
-         .outerjoin(manual_grade, SubmittedNotebook.id == manual_grade.c.id)\
-         .outerjoin(failed_tests, SubmittedNotebook.id == failed_tests.c.id)\
-         .filter(and_(
-             Notebook.name == notebook_id,
-             Assignment.name == assignment_id,
-             Student.id == SubmittedAssignment.student_id,
-             SubmittedAssignment.id == SubmittedNotebook.assignment_id,
-             SubmittedNotebook.id == Grade.notebook_id,
-             GradeCell.id == Grade.cell_id))\
-         .group_by(Student.id)\
+        comments = self.db.query(
+            Comment.id,
+            SolutionCell.name,
+            Comment.auto_comment,
+            Comment.manual_comment
+        ).join(SolutionCell, SolutionCell.id == Comment.cell_id)\
+         .filter(Comment.notebook_id == submission_id)\
+         .order_by(SolutionCell.name)\
          .all()
 
-        keys = [
-            "id", "name", "student", 
-            "score", "max_score", 
-            "code_score", "max_code_score", 
-            "written_score", "max_written_score",
-            "needs_manual_grade",
-            "failed_tests", "flagged"
-        ]
-        return [dict(zip(keys, x)) for x in submissions]
+        keys = {
+            "notebook": notebook.notebook,
+            "assignment": notebook.assignment,
+            "student": notebook.student
+        }
+
+        grade_dicts = []
+        for grade in grades:
+            x = dict(zip(["id", "name", "auto_score", "manual_score", "max_score",
+                          "needs_manual_grade", "failed_tests", "cell_type"], grade))
+            x.update(keys)
+            grade_dicts.append(x)
+
+        comment_dicts = []
+        for comment in comments:
+            x = dict(zip(["id", "name", "auto_comment", "manual_comment"], comment))
+            x.update(keys)
+            comment_dicts.append(x)
+
+        return grade_dicts, comment_dicts
+
+    def grade_table(self, assignment_id=None, batch_size=1000):
+        """Iterate over every grade in the gradebook, along with the student,
+        assignment, notebook, and grade cell that it belongs to. The values in
+        each row correspond to the names in
+        :data:`~nbgrader.api.grade_table_columns`.
+
+        All of the rows come from a single query, and they are fetched from
+        the database in batches as they are iterated over, so that large
+        gradebooks never need to be held in memory all at once. The gradebook
+        should not be modified until the iteration has finished.
+
+        Parameters
+        ----------
+        assignment_id : string
+            (Optional) the name of an assignment, to only include the grades
+            for that assignment
+        batch_size : int
+            (Optional) the number of rows to fetch from the database at a time
+
+        Returns
+        -------
+        rows : iterator of tuples
+            One row per student, assignment, notebook, and grade cell
+
+        """
+        rows = self.db.query(
+            Student.id, Student.first_name, Student.last_name, Student.email,
+            Assignment.name, Assignment.duedate, SubmittedAssignment.timestamp,
+            Notebook.name, GradeCell.name, GradeCell.cell_type,
+            Grade.auto_score, Grade.manual_score, Grade.score,
+            GradeCell.max_score, Grade.needs_manual_grade
+        ).select_from(Grade)\
+         .join(GradeCell, GradeCell.id == Grade.cell_id)\
+         .join(SubmittedNotebook, SubmittedNotebook.id == Grade.notebook_id)\
+         .join(Notebook, Notebook.id == SubmittedNotebook.notebook_id)\
+         .join(SubmittedAssignment, SubmittedAssignment.id == SubmittedNotebook.assignment_id)\
+         .join(Assignment, Assignment.id == SubmittedAssignment.assignment_id)\
+         .join(Student, Student.id == SubmittedAssignment.student_id)
+
+        if assignment_id is not None:
+            rows = rows.filter(Assignment.name == assignment_id)
+
+        rows = rows.order_by(Student.id, Assignment.name, Notebook.name, GradeCell.name)\
+            .yield_per(batch_size)
+
+        for row in rows:
+            yield tuple(row)
+
+    #### Materialized scores
+
+    @property
+    def materialized_scores(self):
+        """Whether materialized scores have been enabled for this database."""
+        return has_materialized_scores(self.db.connection())
+
+    def enable_materialized_scores(self):
+        """Create the :data:`~nbgrader.api.submitted_notebook_score` table, which
+        holds precomputed scores for each submitted notebook, and fill it in.
+        Once enabled, the table is updated whenever grades are changed through
+        a gradebook. If the table already exists, it is rebuilt.
+
+        """
+        connection = self.db.connection()
+        optional_metadata.create_all(bind=connection)
+        _materialized_scores[connection.engine] = (True, time.time())
+        self.rebuild_materialized_scores()
+
+    def rebuild_materialized_scores(self):
+        """Recompute all of the materialized scores from the grades in the
+        database.
+
+        """
+        if not self.materialized_scores:
+            raise MissingEntry("Materialized scores have not been enabled")
+
+        connection = self.db.connection()
+        try:
+            connection.execute(submitted_notebook_score.delete())
+            connection.execute(submitted_notebook_score.insert().from_select(
+                [c.name for c in submitted_notebook_score.c],
+                compute_notebook_scores()))
+            self.db.commit()
+        except IntegrityError as e:
+            self.db.rollback()
+            raise InvalidEntry(*e.args)
+
+    def check_materialized_scores(self):
+        """Compare the materialized scores against the scores computed directly
+        from the grades in the database.
+
+        Returns
+        -------
+        notebook_ids : list
+            The ids of the submitted notebooks whose materialized scores are
+            missing, out of date, or which no longer exist
+
+        """
+        if not self.materialized_scores:
+            raise MissingEntry("Materialized scores have not been enabled")
+
+        def rows(query):
+            return dict((x[0], tuple(x[1:])) for x in self.db.execute(query))
+
+        stored = rows(select([c for c in submitted_notebook_score.c]))
+        computed = rows(compute_notebook_scores())
+
+        inconsistent = []
+        for notebook_id in set(stored) | set(computed):
+            a = stored.get(notebook_id)
+            b = computed.get(notebook_id)
+            if a is None or b is None:
+                inconsistent.append(notebook_id)
+            elif a[0] != b[0] or any(abs(x - y) > 1e-8 for x, y in zip(a[1:4], b[1:4])):
+                inconsistent.append(notebook_id)
+            elif bool(a[4]) != bool(b[4]) or bool(a[5]) != bool(b[5]):
+                inconsistent.append(notebook_id)
+
+        return sorted(inconsistent)
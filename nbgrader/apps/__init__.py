@@ -11,6 +11,9 @@ from .fetchapp import FetchApp
 from .submitapp import SubmitApp
 from .listapp import ListApp
 from .extensionapp import ExtensionApp
+from .scoresapp import ScoresApp
+from .dbapp import DbApp
+from .exportapp import ExportApp
 from .nbgraderapp import NbGraderApp
 
 
@@ -30,4 +33,7 @@ __all__ = [
     'SubmitApp',
     'ListApp',
     'ExtensionApp',
+    'ScoresApp',
+    'DbApp',
+    'ExportApp',
 ]
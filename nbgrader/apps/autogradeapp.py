@@ -1,19 +1,28 @@
 import os
+import hashlib
+import logging
+import multiprocessing
+import multiprocessing.util
+import signal
+import traceback
 
 from textwrap import dedent
 
-from IPython.utils.traitlets import List, Bool
+from IPython.utils.traitlets import List, Bool, Integer, Dict
+from IPython.utils.py3compat import str_to_bytes
 from IPython.utils.path import link_or_copy, ensure_dir_exists
 
 from nbgrader.apps.baseapp import BaseNbConvertApp, nbconvert_aliases, nbconvert_flags
 from nbgrader.preprocessors import (
     ClearOutput, DeduplicateIds, OverwriteCells, SaveAutoGrades, Execute, LimitOutput)
-from nbgrader.api import Gradebook, MissingEntry
+from nbgrader.preprocessors.execute import shutdown_kernel_pools
+from nbgrader.api import Gradebook, MissingEntry, dispose_engines
 from nbgrader import utils
 
 aliases = {}
 aliases.update(nbconvert_aliases)
 aliases.update({
+    'jobs': 'AutogradeApp.jobs',
 })
 
 flags = {}
@@ -25,6 +34,38 @@ flags.update({
     )
 })
 
+
+class _CollectLogs(logging.Handler):
+    """Logging handler that saves log messages so they can be sent back from
+    a worker process to the parent process.
+
+    """
+
+    def __init__(self):
+        super(_CollectLogs, self).__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append((record.levelno, record.getMessage()))
+
+
+# The app that is running the autograder. Worker processes inherit this when
+# they are forked, so that the app itself never needs to be pickled.
+_worker_app = None
+
+def _init_worker():
+    # let the parent process handle keyboard interrupts
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # worker processes do not run atexit handlers, so make sure that any
+    # pooled kernels are shut down when the worker exits
+    multiprocessing.util.Finalize(None, shutdown_kernel_pools, exitpriority=10)
+    # don't share database connections with the parent process
+    dispose_engines()
+
+def _autograde_worker(assignment):
+    return _worker_app._convert_assignment_in_worker(assignment)
+
+
 class AutogradeApp(BaseNbConvertApp):
 
     name = u'nbgrader-autograde'
@@ -66,6 +107,10 @@ class AutogradeApp(BaseNbConvertApp):
         To grade only the notebooks that start with '1':
         
             nbgrader autograde "Problem Set 1" --notebook "1*"
+
+        To grade up to 8 submissions at the same time:
+
+            nbgrader autograde "Problem Set 1" --jobs 8
         """
 
     create_student = Bool(
@@ -78,7 +123,21 @@ class AutogradeApp(BaseNbConvertApp):
         )
     )
 
+    jobs = Integer(
+        1, config=True,
+        help=dedent(
+            """
+            The number of submissions to autograde in parallel. Each submission
+            is graded in a separate worker process, and the log output from each
+            submission is printed once it has finished (in the same order as
+            when grading serially).
+            """
+        )
+    )
+
     _sanitizing = True
+    _checksums = Dict()
+    _source_checksums = Dict()
 
     @property
     def _input_directory(self):
@@ -165,6 +224,90 @@ class AutogradeApp(BaseNbConvertApp):
                 notebooks.append(notebook)
         self.notebooks = notebooks
 
+        # compute checksums of the notebooks before they are graded, so that
+        # they can be saved once grading has finished
+        self._checksums = {}
+        for notebook in self.notebooks:
+            notebook_id = os.path.splitext(os.path.basename(notebook))[0]
+            self._checksums[notebook] = {
+                "assignment_id": assignment_id,
+                "student_id": student_id,
+                "notebook_id": notebook_id,
+                "checksum": self._submission_checksum(notebook),
+                "source_checksum": self._source_checksum(gb, notebook_id, assignment_id)
+            }
+
+    def _submission_checksum(self, notebook_filename):
+        """Computes a checksum of a submitted notebook together with the other
+        (non-notebook) files that were submitted along with it."""
+        path = os.path.dirname(notebook_filename)
+        filenames = utils.find_all_files(path, self.ignore + ["*.ipynb"])
+        return utils.compute_file_checksum(path, filenames + [notebook_filename])
+
+    def _source_checksum(self, gb, notebook_id, assignment_id):
+        """Computes a checksum of the master version of a notebook (as it is
+        stored in the database) together with the other (non-notebook) files in
+        the source directory."""
+        key = (assignment_id, notebook_id)
+        if key in self._source_checksums:
+            return self._source_checksums[key]
+
+        notebook = gb.find_notebook(notebook_id, assignment_id)
+        m = hashlib.md5()
+        for cell in sorted(notebook.source_cells, key=lambda x: x.name):
+            m.update(str_to_bytes(u"source:{}:{}:{}\n".format(cell.name, cell.cell_type, cell.locked)))
+            m.update(str_to_bytes(cell.source or u""))
+        for cell in sorted(notebook.grade_cells, key=lambda x: x.name):
+            m.update(str_to_bytes(u"grade:{}:{}:{}\n".format(cell.name, cell.cell_type, cell.max_score)))
+        for cell in sorted(notebook.solution_cells, key=lambda x: x.name):
+            m.update(str_to_bytes(u"solution:{}\n".format(cell.name)))
+
+        source_path = self.directory_structure.format(
+            nbgrader_step=self.source_directory,
+            student_id='.',
+            assignment_id=assignment_id)
+        filenames = utils.find_all_files(source_path, self.ignore + ["*.ipynb"])
+        m.update(str_to_bytes(utils.compute_file_checksum(source_path, filenames)))
+
+        self._source_checksums[key] = m.hexdigest()
+        return self._source_checksums[key]
+
+    def init_partial_destination(self, assignment_id, student_id):
+        # autograde any notebooks whose submitted version or master version
+        # has changed since they were last autograded
+        gb = Gradebook(self.db_url)
+        changed = []
+        for notebook in self.notebooks:
+            notebook_id = os.path.splitext(os.path.basename(notebook))[0]
+            try:
+                submission = gb.find_submission_notebook(notebook_id, assignment_id, student_id)
+            except MissingEntry:
+                continue
+
+            # if there are no checksums, then we can't tell whether anything
+            # has changed, so leave it alone
+            if submission.checksum is None or submission.source_checksum is None:
+                continue
+
+            if submission.checksum != self._submission_checksum(notebook):
+                changed.append(notebook)
+            elif submission.source_checksum != self._source_checksum(gb, notebook_id, assignment_id):
+                changed.append(notebook)
+
+        if len(changed) == 0:
+            return False
+
+        dest = os.path.normpath(self._format_dest(assignment_id, student_id))
+        for notebook in changed:
+            filename = os.path.splitext(os.path.basename(notebook))[0] + self.exporter.file_extension
+            path = os.path.join(dest, filename)
+            if os.path.exists(path):
+                self.log.warning("Updating changed notebook: {}".format(path))
+                os.remove(path)
+
+        self.notebooks = changed
+        return True
+
     def _init_preprocessors(self):
         self.exporter._preprocessors = []
         if self._sanitizing:
@@ -176,6 +319,7 @@ class AutogradeApp(BaseNbConvertApp):
             self.exporter.register_preprocessor(pp)
 
     def convert_single_notebook(self, notebook_filename):
+        original_filename = notebook_filename
         self.log.info("Sanitizing %s", notebook_filename)
         self._sanitizing = True
         self._init_preprocessors()
@@ -188,3 +332,94 @@ class AutogradeApp(BaseNbConvertApp):
         super(AutogradeApp, self).convert_single_notebook(notebook_filename)
 
         self._sanitizing = True
+        self._save_checksums(original_filename)
+
+    def _save_checksums(self, notebook_filename):
+        checksums = self._checksums[notebook_filename]
+        gb = Gradebook(self.db_url)
+        submission = gb.find_submission_notebook(
+            checksums["notebook_id"], checksums["assignment_id"], checksums["student_id"])
+        submission.checksum = checksums["checksum"]
+        submission.source_checksum = checksums["source_checksum"]
+        gb.db.commit()
+
+    def _try_convert_assignment(self, assignment):
+        """Autograde a single submission, logging (rather than raising) any
+        error. Returns whether grading succeeded."""
+        try:
+            self.convert_single_assignment(assignment)
+        except SystemExit:
+            # self.fail has already logged the reason
+            return False
+        except Exception:
+            self.log.error(traceback.format_exc())
+            return False
+        return True
+
+    def _convert_assignment_in_worker(self, assignment):
+        """Autograde a single submission from within a worker process. Rather
+        than being printed, log messages are saved and returned (along with
+        whether grading succeeded) so that the parent process can print them.
+
+        """
+        handler = _CollectLogs()
+        old_handlers = self.log.handlers[:]
+        for old_handler in old_handlers:
+            self.log.removeHandler(old_handler)
+        self.log.addHandler(handler)
+
+        try:
+            success = self._try_convert_assignment(assignment)
+        finally:
+            self.log.removeHandler(handler)
+            for old_handler in old_handlers:
+                self.log.addHandler(old_handler)
+
+        return assignment, success, handler.messages
+
+    def _convert_in_parallel(self, assignments):
+        """Autograde submissions on a pool of worker processes, returning the
+        submissions that failed."""
+        global _worker_app
+        _worker_app = self
+
+        jobs = min(self.jobs, len(assignments))
+        self.log.info("Autograding %d submissions with %d jobs", len(assignments), jobs)
+
+        failed = []
+        pool = multiprocessing.Pool(jobs, _init_worker)
+        try:
+            # imap returns results in order, so the log output is the same
+            # regardless of which submissions happen to finish first
+            for assignment, success, messages in pool.imap(_autograde_worker, assignments):
+                for level, msg in messages:
+                    self.log.log(level, "%s", msg)
+                if not success:
+                    failed.append(assignment)
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            _worker_app = None
+
+        return failed
+
+    def convert_notebooks(self):
+        if self.jobs < 1:
+            self.fail("The number of jobs must be at least 1")
+
+        # a submission that fails doesn't stop the others from being graded,
+        # whether or not they are graded in parallel
+        assignments = sorted(self.assignments.keys())
+        if self.jobs == 1 or len(assignments) <= 1:
+            failed = [x for x in assignments if not self._try_convert_assignment(x)]
+        else:
+            failed = self._convert_in_parallel(assignments)
+
+        self.log.info(
+            "Finished autograding: %d succeeded, %d failed",
+            len(assignments) - len(failed), len(failed))
+        if len(failed) > 0:
+            self.fail("There were errors processing the following assignments:\n%s", "\n".join(failed))
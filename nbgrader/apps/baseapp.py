@@ -474,10 +474,26 @@ class BaseNbConvertApp(BaseNbGraderApp, NbConvertApp):
                         os.remove(path)
             return True
 
+        # if only some parts of the assignment need to be updated, then only
+        # process those parts
+        if self.init_partial_destination(assignment_id, student_id):
+            return True
+
         # otherwise, we should skip the assignment
         self.log.info("Skipping existing assignment: {}".format(dest))
         return False
 
+    def init_partial_destination(self, assignment_id, student_id):
+        """Called by :meth:`init_destination` when the destination for an
+        assignment already exists, and is not otherwise going to be
+        overwritten. Subclasses may override this to remove the outputs for
+        just the notebooks that need to be processed again (updating
+        ``self.notebooks`` accordingly) and return True; by default, nothing
+        is processed again.
+
+        """
+        return False
+
     def init_assignment(self, assignment_id, student_id):
         """Initializes resources/dependencies/etc. that are common to all
         notebooks in an assignment.
@@ -505,44 +521,52 @@ class BaseNbConvertApp(BaseNbGraderApp, NbConvertApp):
             for filename in filenames:
                 os.chmod(os.path.join(dirname, filename), permissions)
 
+    def convert_single_assignment(self, assignment):
+        """Convert all the notebooks in a single assignment directory (i.e.,
+        for one student). If there is an error, then any partially written
+        output for the assignment is removed before the error is re-raised.
+
+        """
+        # initialize the list of notebooks and the exporter
+        self.notebooks = self.assignments[assignment]
+        self.exporter = exporter_map[self.export_format](config=self.config)
+
+        # parse out the assignment and student ids
+        regexp = self._format_source("(?P<assignment_id>.*)", "(?P<student_id>.*)")
+        m = re.match(regexp, assignment)
+        if m is None:
+            raise RuntimeError("Could not match '%s' with regexp '%s'", assignment, regexp)
+        gd = m.groupdict()
+
+        try:
+            # determine whether we actually even want to process this submission
+            should_process = self.init_destination(gd['assignment_id'], gd['student_id'])
+            if not should_process:
+                return
+
+            # initialize the destination and convert
+            self.init_assignment(gd['assignment_id'], gd['student_id'])
+            super(BaseNbConvertApp, self).convert_notebooks()
+            self.set_permissions(gd['assignment_id'], gd['student_id'])
+
+        except:
+            self.log.error("There was an error processing assignment: %s", assignment)
+
+            dest = os.path.normpath(self._format_dest(gd['assignment_id'], gd['student_id']))
+            if self.notebook_id == "*":
+                if os.path.exists(dest):
+                    self.log.warning("Removing failed assignment: {}".format(dest))
+                    shutil.rmtree(dest)
+            else:
+                for notebook in self.notebooks:
+                    filename = os.path.splitext(os.path.basename(notebook))[0] + self.exporter.file_extension
+                    path = os.path.join(dest, filename)
+                    if os.path.exists(path):
+                        self.log.warning("Removing failed notebook: {}".format(path))
+                        os.remove(path)
+
+            raise
+
     def convert_notebooks(self):
         for assignment in sorted(self.assignments.keys()):
-            # initialize the list of notebooks and the exporter
-            self.notebooks = self.assignments[assignment]
-            self.exporter = exporter_map[self.export_format](config=self.config)
-
-            # parse out the assignment and student ids
-            regexp = self._format_source("(?P<assignment_id>.*)", "(?P<student_id>.*)")
-            m = re.match(regexp, assignment)
-            if m is None:
-                raise RuntimeError("Could not match '%s' with regexp '%s'", assignment, regexp)
-            gd = m.groupdict()
-
-            try:
-                # determine whether we actually even want to process this submission
-                should_process = self.init_destination(gd['assignment_id'], gd['student_id'])
-                if not should_process:
-                    continue
-
-                # initialize the destination and convert
-                self.init_assignment(gd['assignment_id'], gd['student_id'])
-                super(BaseNbConvertApp, self).convert_notebooks()
-                self.set_permissions(gd['assignment_id'], gd['student_id'])
-
-            except:
-                self.log.error("There was an error processing assignment: %s", assignment)
-
-                dest = os.path.normpath(self._format_dest(gd['assignment_id'], gd['student_id']))
-                if self.notebook_id == "*":
-                    if os.path.exists(dest):
-                        self.log.warning("Removing failed assignment: {}".format(dest))
-                        shutil.rmtree(dest)
-                else:
-                    for notebook in self.notebooks:
-                        filename = os.path.splitext(os.path.basename(notebook))[0] + self.exporter.file_extension
-                        path = os.path.join(dest, filename)
-                        if os.path.exists(path):
-                            self.log.warning("Removing failed notebook: {}".format(path))
-                            os.remove(path)
-
-                raise
+            self.convert_single_assignment(assignment)
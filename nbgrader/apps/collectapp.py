@@ -1,17 +1,23 @@
 import os
 import glob
 import shutil
+import traceback
 from collections import defaultdict
+from textwrap import dedent
+from multiprocessing.pool import ThreadPool
 
-from IPython.utils.traitlets import Bool
+from IPython.utils.traitlets import Bool, Integer
 
 from nbgrader.apps.baseapp import TransferApp, transfer_aliases, transfer_flags
-from nbgrader.utils import check_mode, parse_utc
+from nbgrader.utils import check_mode, parse_utc, sync_directory
+from nbgrader.exchange import (
+    BlobStore, is_stored, restore_directory, is_packed, unpack_directory)
 
 
 aliases = {}
 aliases.update(transfer_aliases)
 aliases.update({
+    'workers': 'CollectApp.workers',
 })
 
 flags = {}
@@ -66,6 +72,13 @@ class CollectApp(TransferApp):
         flag:
         
             nbgrader collect --update assignment1
+
+        When updating, only the files that have changed are copied.
+        Submissions are collected several at a time, which is much faster when
+        the exchange is on a network filesystem. To change how many are
+        collected at once:
+
+            nbgrader collect --workers=16 assignment1
         """
 
     update = Bool(
@@ -73,7 +86,19 @@ class CollectApp(TransferApp):
         config=True,
         help="Update existing submissions with ones that have newer timestamps."
     )
-    
+
+    workers = Integer(
+        8,
+        config=True,
+        help=dedent(
+            """
+            Number of submissions to collect at the same time. Most of the
+            time spent collecting from a network filesystem is spent waiting
+            on the network, so this can be larger than the number of CPUs.
+            """
+        )
+    )
+
     def init_args(self):
         if len(self.extra_args) == 1:
             self.assignment_id = self.extra_args[0]
@@ -100,6 +125,7 @@ class CollectApp(TransferApp):
             self.fail("Course not found: {}".format(self.inbound_path))
         if not check_mode(self.inbound_path, read=True, execute=True):
             self.fail("You don't have read permissions for the directory: {}".format(self.inbound_path))
+        self.store = BlobStore(os.path.join(self.course_path, 'blobs'))
         student_id = self.student_id if self.student_id else '*'
         pattern = os.path.join(self.inbound_path, '{}+{}+*'.format(student_id, self.assignment_id))
         records = [self._path_to_record(f) for f in glob.glob(pattern)]
@@ -111,38 +137,85 @@ class CollectApp(TransferApp):
         if not os.path.isdir(submit_dir):
             os.mkdir(submit_dir)
 
-    def copy_files(self):
-        for rec in self.src_records:
-            student_id = rec['username']
-            src_path = os.path.join(self.inbound_path, rec['filename'])
-            dest_path = os.path.abspath(self.directory_structure.format(
-                nbgrader_step=self.submitted_directory,
-                student_id=student_id,
-                assignment_id=self.assignment_id
-            ))
-            copy = False
-            updating = False
-            if os.path.isdir(dest_path):
-                existing_timestamp = self._get_existing_timestamp(dest_path)
-                new_timestamp = rec['timestamp']
-                if self.update and (existing_timestamp is None or new_timestamp > existing_timestamp):
-                    copy = True
-                    updating = True
-            else:
+    def _collect(self, rec):
+        student_id = rec['username']
+        src_path = os.path.join(self.inbound_path, rec['filename'])
+        dest_path = os.path.abspath(self.directory_structure.format(
+            nbgrader_step=self.submitted_directory,
+            student_id=student_id,
+            assignment_id=self.assignment_id
+        ))
+        copy = False
+        updating = False
+        if os.path.isdir(dest_path):
+            existing_timestamp = self._get_existing_timestamp(dest_path)
+            new_timestamp = rec['timestamp']
+            if self.update and (existing_timestamp is None or new_timestamp > existing_timestamp):
                 copy = True
-            if copy:
-                if updating:
-                    self.log.info("Updating submission: {} {}".format(student_id, self.assignment_id))
-                    shutil.rmtree(dest_path)
-                else:
-                    self.log.info("Collecting submission: {} {}".format(student_id, self.assignment_id))  
-                self.do_copy(src_path, dest_path)
+                updating = True
+        else:
+            copy = True
+        if copy:
+            if updating:
+                self.log.info("Updating submission: {} {}".format(student_id, self.assignment_id))
             else:
-                if self.update:
-                    self.log.info("No newer submission to collect: {} {}".format(
-                        student_id, self.assignment_id
-                    ))
-                else:
-                    self.log.info("Submission already exists, use --update to update: {} {}".format(
-                        student_id, self.assignment_id
-                    ))
+                self.log.info("Collecting submission: {} {}".format(student_id, self.assignment_id))
+
+            try:
+                self._copy_submission(src_path, dest_path, updating)
+            except Exception:
+                self.log.error("Could not collect submission: {} {}".format(student_id, self.assignment_id))
+                self.log.error(traceback.format_exc())
+                self._discard_submission(dest_path, updating)
+                return False
+        else:
+            if self.update:
+                self.log.info("No newer submission to collect: {} {}".format(
+                    student_id, self.assignment_id
+                ))
+            else:
+                self.log.info("Submission already exists, use --update to update: {} {}".format(
+                    student_id, self.assignment_id
+                ))
+        return True
+
+    def _copy_submission(self, src_path, dest_path, updating):
+        if is_packed(src_path):
+            unpacked = unpack_directory(src_path, dest_path)
+            self.log.debug("Unpacked {} files".format(unpacked))
+        elif is_stored(src_path):
+            copied = restore_directory(src_path, dest_path, self.store)
+            self.log.debug("Copied {} changed files".format(copied))
+        elif updating:
+            copied = sync_directory(src_path, dest_path, self.ignore)
+            self.log.debug("Copied {} changed files".format(copied))
+        else:
+            self.do_copy(src_path, dest_path)
+
+    def _discard_submission(self, dest_path, updating):
+        """Clean up after a submission that could not be collected, so that it
+        is collected again the next time."""
+        if not updating:
+            shutil.rmtree(dest_path, ignore_errors=True)
+        else:
+            # without a timestamp, the submission is always updated
+            timestamp = os.path.join(dest_path, 'timestamp.txt')
+            if os.path.isfile(timestamp):
+                os.remove(timestamp)
+
+    def copy_files(self):
+        if len(self.src_records) == 0:
+            return
+
+        pool = ThreadPool(max(1, min(self.workers, len(self.src_records))))
+        try:
+            collected = pool.map(self._collect, self.src_records)
+        finally:
+            pool.close()
+            pool.join()
+
+        # a submission that can't be collected shouldn't stop the others
+        # from being collected, but it should still be reported
+        failed = sorted(rec['username'] for rec, ok in zip(self.src_records, collected) if not ok)
+        if len(failed) > 0:
+            self.fail("Could not collect the submissions from: {}".format(", ".join(failed)))
@@ -0,0 +1,95 @@
+import sys
+
+from IPython.config.application import catch_config_error
+from IPython.config.application import Application
+
+from nbgrader import migrations
+from nbgrader.api import InvalidEntry
+from nbgrader.apps.baseapp import BaseNbGraderApp, nbgrader_aliases, nbgrader_flags
+
+
+upgrade_aliases = {}
+upgrade_aliases.update(nbgrader_aliases)
+upgrade_aliases.update({
+})
+upgrade_flags = {}
+upgrade_flags.update(nbgrader_flags)
+upgrade_flags.update({
+})
+class DbUpgradeApp(BaseNbGraderApp):
+
+    name = u'nbgrader-db-upgrade'
+    description = u'Upgrade the gradebook database to the latest schema'
+
+    aliases = upgrade_aliases
+    flags = upgrade_flags
+
+    examples = """
+        Databases created with older versions of nbgrader may be missing
+        changes to the schema (such as indexes) that were made since. To apply
+        them to the database configured in `nbgrader_config.py`:
+
+            nbgrader db upgrade
+
+        or to a different database:
+
+            nbgrader db upgrade --db=sqlite:///path/to/gradebook.db
+
+        It is safe to run this command more than once, as only the changes
+        which have not yet been applied are made. It is a good idea to back up
+        the database first, and to not run any other nbgrader commands while
+        the upgrade is running.
+        """
+
+    def start(self):
+        super(DbUpgradeApp, self).start()
+
+        if len(self.extra_args) != 0:
+            self.fail("This command does not take any arguments.")
+
+        try:
+            steps = migrations.upgrade(self.db_url, log=self.log)
+        except InvalidEntry as e:
+            self.fail(str(e))
+
+        if len(steps) == 0:
+            self.log.info("Database is already up to date")
+        else:
+            self.log.info("Database upgraded to version %d", migrations.current_version(self.db_url))
+
+
+class DbApp(Application):
+
+    name = u'nbgrader db'
+    description = u'Utilities for managing the gradebook database'
+    examples = ""
+
+    subcommands = dict(
+        upgrade=(
+            DbUpgradeApp,
+            "Upgrade the database to the latest schema."
+        ),
+    )
+
+    def _classes_default(self):
+        classes = super(DbApp, self)._classes_default()
+
+        # include all the apps that have configurable options
+        for appname, (app, help) in self.subcommands.items():
+            if len(app.class_traits(config=True)) > 0:
+                classes.append(app)
+
+        return classes
+
+    @catch_config_error
+    def initialize(self, argv=None):
+        super(DbApp, self).initialize(argv)
+
+    def start(self):
+        # check: is there a subapp given?
+        if self.subapp is None:
+            self.print_help()
+            sys.exit(1)
+
+        # This starts subapps
+        super(DbApp, self).start()
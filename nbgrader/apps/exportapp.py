@@ -0,0 +1,173 @@
+import io
+import os
+import csv
+import json
+import shutil
+import tempfile
+import zipfile
+import datetime
+
+from textwrap import dedent
+
+from IPython.utils.traitlets import Unicode, Enum
+from IPython.utils.py3compat import PY3
+
+from nbgrader.api import Gradebook, MissingEntry, grade_table_columns
+from nbgrader.apps.baseapp import BaseNbGraderApp, nbgrader_aliases, nbgrader_flags
+
+
+aliases = {}
+aliases.update(nbgrader_aliases)
+aliases.update({
+    'to': 'ExportApp.to',
+    'output': 'ExportApp.output',
+})
+
+flags = {}
+flags.update(nbgrader_flags)
+flags.update({
+})
+
+
+def _format_value(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+def write_csv(rows, columns, path):
+    """Write rows to a CSV file, with a header giving the column names."""
+    if PY3:
+        fh = io.open(path, 'w', newline='', encoding='utf-8')
+    else:
+        fh = open(path, 'wb')
+
+    with fh:
+        writer = csv.writer(fh)
+        writer.writerow(columns)
+        for row in rows:
+            row = [_format_value(x) for x in row]
+            if not PY3:
+                row = [x.encode('utf-8') if isinstance(x, unicode) else x for x in row]
+            writer.writerow(row)
+
+def write_columnar(rows, columns, path):
+    """Write rows to a zip file in which each column is stored separately, as
+    one JSON value per line, so that repeated values in a column (such as
+    student ids and assignment names) compress well. The file also contains
+    a ``manifest.json`` giving the names of the columns and the number of rows.
+
+    The columns are written to temporary files while the rows are being
+    read, so the rows never need to be held in memory all at once.
+
+    """
+    tmpdir = tempfile.mkdtemp()
+    try:
+        files = [io.open(os.path.join(tmpdir, str(i)), 'w', encoding='utf-8') for i in range(len(columns))]
+        num_rows = 0
+        try:
+            for row in rows:
+                for fh, value in zip(files, row):
+                    fh.write(u"{}\n".format(json.dumps(_format_value(value))))
+                num_rows += 1
+        finally:
+            for fh in files:
+                fh.close()
+
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("manifest.json", json.dumps({
+                "columns": columns,
+                "num_rows": num_rows
+            }))
+            for i, column in enumerate(columns):
+                zf.write(os.path.join(tmpdir, str(i)), "columns/{}.jsonl".format(column))
+
+    finally:
+        shutil.rmtree(tmpdir)
+
+def read_columnar(path):
+    """Read the rows back from a file written by :func:`write_columnar`,
+    one row at a time.
+
+    """
+    with zipfile.ZipFile(path, 'r') as zf:
+        manifest = json.loads(zf.read("manifest.json").decode('utf-8'))
+        files = [zf.open("columns/{}.jsonl".format(column)) for column in manifest["columns"]]
+        try:
+            for _ in range(manifest["num_rows"]):
+                yield tuple(json.loads(fh.readline().decode('utf-8')) for fh in files)
+        finally:
+            for fh in files:
+                fh.close()
+
+
+class ExportApp(BaseNbGraderApp):
+
+    name = u'nbgrader-export'
+    description = u'Export the grades in the gradebook to a file'
+
+    aliases = aliases
+    flags = flags
+
+    examples = """
+        Export every grade in the gradebook, with one row for each grade cell
+        of each notebook submitted by each student, to a CSV file:
+
+            nbgrader export --output=grades.csv
+
+        To only export the grades for one assignment:
+
+            nbgrader export "Problem Set 1" --output=grades.csv
+
+        For very large gradebooks, the grades can instead be written to a
+        compressed columnar file (a zip file containing one file per column):
+
+            nbgrader export --to=columnar --output=grades.zip
+        """
+
+    to = Enum(
+        ["csv", "columnar"],
+        default_value="csv",
+        config=True,
+        help="The format to export the grades to, either 'csv' or 'columnar'."
+    )
+
+    output = Unicode(
+        "",
+        config=True,
+        help=dedent(
+            """
+            The file to write the grades to. Defaults to 'grades.csv' for CSV
+            files, and 'grades.zip' for columnar files.
+            """
+        )
+    )
+
+    def start(self):
+        super(ExportApp, self).start()
+
+        if len(self.extra_args) > 1:
+            self.fail("Too many arguments.")
+        elif len(self.extra_args) == 1:
+            assignment_id = self.extra_args[0]
+        elif self.assignment_id != "":
+            assignment_id = self.assignment_id
+        else:
+            assignment_id = None
+
+        output = self.output
+        if output == "":
+            output = "grades.csv" if self.to == "csv" else "grades.zip"
+
+        gb = Gradebook(self.db_url)
+        if assignment_id is not None:
+            try:
+                gb.find_assignment(assignment_id)
+            except MissingEntry:
+                self.fail("No such assignment: %s", assignment_id)
+
+        self.log.info("Exporting grades to %s", output)
+        rows = gb.grade_table(assignment_id=assignment_id)
+        if self.to == "csv":
+            write_csv(rows, grade_table_columns, output)
+        else:
+            write_columnar(rows, grade_table_columns, output)
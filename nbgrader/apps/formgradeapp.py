@@ -4,13 +4,17 @@ import sys
 
 from textwrap import dedent
 
-from IPython.utils.traitlets import Unicode, Integer, Type, Instance
+from IPython.utils.traitlets import Unicode, Integer, Type, Instance, Enum
 
 from IPython.nbconvert.exporters import HTMLExporter
 from IPython.config.application import catch_config_error
 
 from nbgrader.apps.baseapp import BaseNbGraderApp, nbgrader_aliases, nbgrader_flags
 from nbgrader.html.formgrade import app
+from nbgrader.html.assets import StaticFiles
+from nbgrader.html.navigation import SubmissionNavigator
+from nbgrader.html.cache import RenderCache, Prerenderer
+from nbgrader.html.server import PooledWSGIServer
 from nbgrader.api import Gradebook
 from nbgrader.auth import BaseAuth, NoAuth
 
@@ -19,6 +23,8 @@ aliases.update(nbgrader_aliases)
 aliases.update({
     'ip': 'FormgradeApp.ip',
     'port': 'FormgradeApp.port',
+    'server': 'FormgradeApp.server',
+    'workers': 'FormgradeApp.workers',
 })
 
 flags = {}
@@ -61,10 +67,34 @@ class FormgradeApp(BaseNbGraderApp):
 
         To run the formgrader a different port:
             nbgrader formgrade --port 5001
+
+        By default, the formgrader uses a single-threaded development server
+        with debugging enabled. When several people are grading at the same
+        time, use the production server instead, which handles requests on a
+        pool of worker threads (4 by default) and has debugging disabled:
+            nbgrader formgrade --server=production --workers=8
         """
 
     ip = Unicode("localhost", config=True, help="IP address for the server")
     port = Integer(5000, config=True, help="Port for the server")
+    server = Enum(
+        ["development", "production"],
+        default_value="development",
+        config=True,
+        help=dedent(
+            """
+            The server to run the formgrader with. The 'development' server
+            handles one request at a time, with debugging enabled. The
+            'production' server handles requests on a pool of
+            `FormgradeApp.workers` threads, with debugging disabled.
+            """
+        )
+    )
+    workers = Integer(
+        4,
+        config=True,
+        help="Number of threads to handle requests with when using the production server."
+    )
     authenticator_class = Type(NoAuth, klass=BaseAuth, config=True, help="""
         Authenticator used in all formgrade requests.""")
     authenticator_instance = Instance(BaseAuth, config=False)
@@ -83,6 +113,36 @@ class FormgradeApp(BaseNbGraderApp):
         )
     )
 
+    render_cache_size = Integer(
+        100,
+        config=True,
+        help=dedent(
+            """
+            Number of rendered submissions to keep in memory, so that they do
+            not need to be converted to HTML again when they are viewed again.
+            Set to 0 to disable the cache.
+            """
+        )
+    )
+
+    prerender_count = Integer(
+        3,
+        config=True,
+        help=dedent(
+            """
+            Number of submissions after the one being viewed to convert to
+            HTML in the background, so that they are ready when the grader
+            moves on to them. Set to 0 to disable pre-rendering.
+            """
+        )
+    )
+
+    prerender_workers = Integer(
+        2,
+        config=True,
+        help="Number of background threads to use for pre-rendering submissions."
+    )
+
     def _mathjax_url_default(self):
         url = os.path.join(self.ipython_dir, 'nbextensions', 'mathjax', 'MathJax.js')
         if not os.path.exists(url):
@@ -102,6 +162,8 @@ class FormgradeApp(BaseNbGraderApp):
     def _signal_stop(self, sig, frame):
         self.log.critical("received signal %s, stopping", sig)
         self.authenticator_instance.stop(sig)
+        if getattr(app, 'prerenderer', None) is not None:
+            app.prerenderer.stop()
         sys.exit(-sig)
 
     def build_extra_config(self):
@@ -131,12 +193,36 @@ class FormgradeApp(BaseNbGraderApp):
         app.notebook_dir = self.base_directory
         app.notebook_dir_format = self.directory_structure
         app.nbgrader_step = self.autograded_directory
-        app.exporter = HTMLExporter(config=self.config)
+        app.exporter_factory = lambda: HTMLExporter(config=self.config)
+        app.exporter = app.exporter_factory()
+        app.render_cache = RenderCache(app.exporter, size=self.render_cache_size)
+        app.prerender_count = self.prerender_count
+        if self.prerender_count > 0 and self.render_cache_size > 0:
+            app.prerenderer = Prerenderer(
+                app.render_cache,
+                app.exporter_factory,
+                workers=self.prerender_workers,
+                log=self.log)
+        else:
+            app.prerenderer = None
         app.mathjax_url = self.mathjax_url
+        app.mathjax_files = StaticFiles(os.path.dirname(self.mathjax_url))
 
         url = "http://{:s}:{:d}/".format(self.ip, self.port)
         self.log.info("Form grader running at {}".format(url))
         self.log.info("Use Control-C to stop this server")
 
         app.gradebook = Gradebook(self.db_url)
-        app.run(host=self.ip, port=self.port, debug=True, use_reloader=False)
+        app.navigator = SubmissionNavigator(app.gradebook)
+
+        if self.server == "development":
+            app.run(host=self.ip, port=self.port, debug=True, use_reloader=False)
+        else:
+            if self.workers < 1:
+                self.fail("FormgradeApp.workers must be at least 1")
+            self.log.info("Handling requests with %d worker threads", self.workers)
+            server = PooledWSGIServer(self.ip, self.port, app, workers=self.workers)
+            try:
+                server.serve_forever()
+            finally:
+                server.server_close()
@@ -23,7 +23,10 @@ from nbgrader.apps import (
     FetchApp,
     SubmitApp,
     ListApp,
-    ExtensionApp
+    ExtensionApp,
+    ScoresApp,
+    DbApp,
+    ExportApp
 )
 
 aliases = {}
@@ -183,6 +186,33 @@ class NbGraderApp(BaseNbGraderApp):
                 Install and activate the "Create Assignment" notebook extension.
                 """
             ).strip()
+        ),
+        scores=(
+            ScoresApp,
+            dedent(
+                """
+                Enable, check, or rebuild the materialized scores in the
+                gradebook database. Intended for use by instructors only.
+                """
+            ).strip()
+        ),
+        db=(
+            DbApp,
+            dedent(
+                """
+                Manage the gradebook database, e.g. upgrade it to the latest
+                schema. Intended for use by instructors only.
+                """
+            ).strip()
+        ),
+        export=(
+            ExportApp,
+            dedent(
+                """
+                Export the grades in the gradebook to a CSV or columnar file.
+                Intended for use by instructors only.
+                """
+            ).strip()
         )
     )
 
@@ -1,5 +1,6 @@
 import os
 import shutil
+from textwrap import dedent
 from stat import (
     S_IRUSR, S_IWUSR, S_IXUSR,
     S_IRGRP, S_IWGRP, S_IXGRP,
@@ -10,7 +11,8 @@ from stat import (
 from IPython.utils.traitlets import Bool
 
 from nbgrader.apps.baseapp import TransferApp, transfer_aliases, transfer_flags
-from nbgrader.utils import self_owned
+from nbgrader.utils import self_owned, find_all_files
+from nbgrader.exchange import BlobStore
 
 
 aliases = {}
@@ -25,6 +27,10 @@ flags.update({
         {'ReleaseApp' : {'force' : True}},
         "Force overwrite of existing files in the exchange."
     ),
+    'deduplicate': (
+        {'ReleaseApp' : {'deduplicate' : True}},
+        "Store submissions to the course so that identical files are only stored once."
+    ),
 })
 
 class ReleaseApp(TransferApp):
@@ -63,6 +69,13 @@ class ReleaseApp(TransferApp):
         
             nbgrader release --force assignment1
         
+        To save disk space in the exchange, submissions can be stored so that
+        files which are the same in many submissions (such as data files that
+        are part of the assignment) are only stored once. Once this has been
+        turned on for a course, all later submissions are stored this way:
+
+            nbgrader release --deduplicate assignment1
+
         To query the exchange to see a list of your released assignments:
         
             nbgrader list
@@ -70,6 +83,19 @@ class ReleaseApp(TransferApp):
 
     force = Bool(False, config=True, help="Force overwrite existing files in the exchange.")
 
+    deduplicate = Bool(
+        False,
+        config=True,
+        help=dedent(
+            """
+            Store submissions to the course in a content-addressed store, so
+            that identical files are only stored once, and only new files need
+            to be copied when students resubmit. The released files are also
+            added to the store.
+            """
+        )
+    )
+
     def init_args(self):
         if len(self.extra_args) == 1:
             self.assignment_id = self.extra_args[0]
@@ -113,6 +139,10 @@ class ReleaseApp(TransferApp):
             self.inbound_path,
             S_ISGID|S_IRUSR|S_IWUSR|S_IXUSR|S_IWGRP|S_IXGRP|S_IWOTH|S_IXOTH
         )
+        self.store = BlobStore(os.path.join(self.course_path, 'blobs'))
+        if self.deduplicate or self.store.exists():
+            # also creates any of the store's directories which are missing
+            self.store.create()
 
     def ensure_directory(self, path, mode):
         """Ensure that the path exists, has the right mode and is self owned."""
@@ -139,4 +169,7 @@ class ReleaseApp(TransferApp):
         self.log.info("Source: {}".format(self.src_path))
         self.log.info("Destination: {}".format(self.dest_path))
         self.do_copy(self.src_path, self.dest_path)
+        if self.store.exists():
+            for filename in find_all_files(self.dest_path):
+                self.store.put(filename)
         self.log.info("Released as: {} {}".format(self.course_id, self.assignment_id))
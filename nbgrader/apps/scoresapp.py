@@ -0,0 +1,82 @@
+from IPython.utils.traitlets import Bool
+
+from nbgrader.api import Gradebook
+from nbgrader.apps.baseapp import BaseNbGraderApp, nbgrader_aliases, nbgrader_flags
+
+
+aliases = {}
+aliases.update(nbgrader_aliases)
+aliases.update({
+})
+
+flags = {}
+flags.update(nbgrader_flags)
+flags.update({
+    'enable': (
+        {'ScoresApp' : {'enable': True}},
+        "Enable materialized scores (this also builds them)."
+    ),
+    'rebuild': (
+        {'ScoresApp' : {'rebuild': True}},
+        "Rebuild materialized scores if they are inconsistent with the grades."
+    ),
+})
+
+class ScoresApp(BaseNbGraderApp):
+
+    name = u'nbgrader-scores'
+    description = u'Manage the materialized scores in the gradebook database'
+
+    aliases = aliases
+    flags = flags
+
+    examples = """
+        By default, scores are computed from the individual grades every time
+        they are loaded from the database. For large classes, the scores can
+        instead be precomputed and stored in the database (and kept up to date
+        whenever grades change), which makes loading them much faster. To
+        enable this:
+
+            nbgrader scores --enable
+
+        To check that the stored scores are consistent with the grades:
+
+            nbgrader scores
+
+        and to rebuild the stored scores if they are not:
+
+            nbgrader scores --rebuild
+        """
+
+    enable = Bool(False, config=True, help="Enable materialized scores.")
+    rebuild = Bool(False, config=True, help="Rebuild inconsistent materialized scores.")
+
+    def start(self):
+        super(ScoresApp, self).start()
+
+        if len(self.extra_args) != 0:
+            self.fail("This command does not take any arguments.")
+
+        gb = Gradebook(self.db_url)
+
+        if self.enable:
+            self.log.info("Enabling materialized scores")
+            gb.enable_materialized_scores()
+            return
+
+        if not gb.materialized_scores:
+            self.fail("Materialized scores are not enabled (run `nbgrader scores --enable`)")
+
+        inconsistent = gb.check_materialized_scores()
+        if len(inconsistent) == 0:
+            self.log.info("Materialized scores are consistent with the grades")
+            return
+
+        for notebook_id in inconsistent:
+            self.log.warning("Inconsistent materialized score for submitted notebook %s", notebook_id)
+
+        if self.rebuild:
+            self.log.info("Rebuilding materialized scores")
+            gb.rebuild_materialized_scores()
+        else:
+            self.fail("%d materialized scores are inconsistent (run `nbgrader scores --rebuild`)", len(inconsistent))
@@ -1,4 +1,5 @@
 import os
+from textwrap import dedent
 from stat import (
     S_IRUSR, S_IWUSR, S_IXUSR,
     S_IRGRP, S_IWGRP, S_IXGRP,
@@ -6,7 +7,10 @@ from stat import (
     S_ISVTX, S_ISGID
 )
 
+from IPython.utils.traitlets import Bool
+
 from nbgrader.apps.baseapp import TransferApp, transfer_aliases, transfer_flags
+from nbgrader.exchange import BlobStore, store_directory, pack_directory
 from nbgrader.utils import get_username, check_mode
 
 
@@ -18,6 +22,10 @@ aliases.update({
 flags = {}
 flags.update(transfer_flags)
 flags.update({
+    'archive': (
+        {'SubmitApp' : {'archive' : True}},
+        "Submit the assignment as a single compressed archive."
+    ),
 })
 
 class SubmitApp(TransferApp):
@@ -47,8 +55,26 @@ class SubmitApp(TransferApp):
         get the most recent version. Your assignment submission are timestamped
         so instructors can tell when you turned it in. No other students will
         be able to see your submissions.
+
+        If the exchange is on a network filesystem, where copying many small
+        files is slow, the assignment can instead be submitted as a single
+        compressed archive, which is unpacked when the instructor collects it:
+
+            nbgrader submit --archive assignment1 phys101
         """
-    
+
+    archive = Bool(
+        False,
+        config=True,
+        help=dedent(
+            """
+            Submit the assignment as a single compressed archive, rather than
+            copying each of its files to the exchange. The archive includes the
+            hash of every file, which is checked when it is collected.
+            """
+        )
+    )
+
     def init_args(self):
         if len(self.extra_args) == 2:
             # The first argument (assignment_id) is processed in init_src
@@ -75,7 +101,16 @@ class SubmitApp(TransferApp):
     def copy_files(self):
         self.log.info("Source: {}".format(self.src_path))
         self.log.info("Destination: {}".format(self.dest_path))
-        self.do_copy(self.src_path, self.dest_path)
+        store = BlobStore(os.path.join(self.course_path, 'blobs'))
+        if self.archive:
+            os.mkdir(self.dest_path)
+            pack_directory(self.src_path, self.dest_path, self.ignore)
+        elif store.exists():
+            # only files which aren't already in the exchange are copied
+            os.mkdir(self.dest_path)
+            store_directory(self.src_path, self.dest_path, store, self.ignore)
+        else:
+            self.do_copy(self.src_path, self.dest_path)
         with open(os.path.join(self.dest_path, "timestamp.txt"), "w") as fh:
             fh.write(self.timestamp)
         # Make this 0777=ugo=rwx so the instructor can delete later. Hidden from other users by the timestamp.
@@ -2,8 +2,10 @@
 import requests
 import os
 import json
+import time
+import threading
 from subprocess import check_output
-from flask import request, redirect, abort
+from flask import request, redirect, abort, g
 from IPython.utils.traitlets import Unicode, Int, List, Bool 
 
 from nbgrader.html.formgrade import blueprint
@@ -74,9 +76,23 @@ class HubAuth(BaseAuth):
     def _remap_url_changed(self, name, old, new):
         self.remap_url = new.rstrip('/')
 
+    cookie_max_age = Int(300, config=True, help="""Number of seconds to
+        remember that a JupyterHub cookie is valid for, so that the hub does not
+        need to be asked about every request. A user who logs out of the hub
+        may still be able to use the formgrader for up to this long. Set to 0
+        to check every request with the hub.""")
+
     def __init__(self, *args, **kwargs):
         super(HubAuth, self).__init__(*args, **kwargs)
 
+        # Reuse connections to the hub and proxy between requests.
+        self._session = requests.Session()
+
+        # Users of the cookies that the hub has verified, and when each of
+        # them was verified.
+        self._verified_cookies = {}
+        self._verified_cookies_lock = threading.Lock()
+
         # Create base URLs for the hub and proxy.
         self._hubapi_base_url = 'http://{}:{}'.format(self.hubapi_address, self.hubapi_port)
         self._proxy_base_url = 'http://{}:{}'.format(self.proxy_address, self.proxy_port)
@@ -103,6 +119,12 @@ class HubAuth(BaseAuth):
             return redirect(self.hub_base_url + '/hub/login?next=' + self.hub_base_url + self.remap_url)
         cookie = request.cookies[self.hubapi_cookie]
 
+        # If the Hub has recently said that the cookie is valid, then there
+        # is no need to ask again.
+        user = self._get_verified_user(cookie)
+        if user is not None:
+            return self._authorize(user)
+
         # Check with the Hub to see if the auth cookie is valid.
         response = self._hubapi_request('/hub/api/authorizations/cookie/' + self.hubapi_cookie + '/' + cookie)
         if response.status_code == 200:
@@ -111,13 +133,8 @@ class HubAuth(BaseAuth):
             data = response.json()
             if 'name' in data:
                 user = data['name']
-
-                # Check if the user name is registered as a grader.
-                if user in self.graders:
-                    self._user = user
-                    return True
-                else:
-                    self.log.warn('Unauthorized user "%s" attempted to access the formgrader.' % user)
+                self._set_verified_user(cookie, user)
+                return self._authorize(user)
             else:
                 self.log.warn('Malformed response from the JupyterHub auth API.')
                 abort(500, "Failed to check authorization, malformed response from Hub auth.")
@@ -135,6 +152,45 @@ class HubAuth(BaseAuth):
             return redirect(self.hub_base_url + '/hub/login?next=' + self.hub_base_url + self.remap_url)
         return False
 
+    def _authorize(self, user):
+        """Check if the user name is registered as a grader."""
+        if user in self.graders:
+            # requests are handled concurrently, so the user is kept with the
+            # request rather than on the authenticator
+            g.user = user
+            return True
+        else:
+            self.log.warn('Unauthorized user "%s" attempted to access the formgrader.' % user)
+            return False
+
+    def _get_verified_user(self, cookie):
+        """Get the user that the hub verified a cookie for, or None if it has
+        not been verified within the last `cookie_max_age` seconds."""
+        with self._verified_cookies_lock:
+            verified = self._verified_cookies.get(cookie, None)
+        if verified is None:
+            return None
+
+        user, timestamp = verified
+        if time.time() - timestamp >= self.cookie_max_age:
+            return None
+        return user
+
+    def _set_verified_user(self, cookie, user):
+        if self.cookie_max_age <= 0:
+            return
+
+        now = time.time()
+        with self._verified_cookies_lock:
+            # forget about any cookies that have expired, so that the cache
+            # doesn't grow forever
+            expired = [k for k, (_, timestamp) in self._verified_cookies.items()
+                       if now - timestamp >= self.cookie_max_age]
+            for k in expired:
+                del self._verified_cookies[k]
+
+            self._verified_cookies[cookie] = (user, now)
+
     def notebook_server_exists(self):
         """Does the notebook server exist?"""
         return True
@@ -144,7 +200,7 @@ class HubAuth(BaseAuth):
         if self.notebook_url_prefix is not None:
             relative_path = self.notebook_url_prefix + '/' + relative_path
         return self.hub_base_url + "/user/{}/notebooks/{}".format(
-            self._user,
+            g.user,
             relative_path)
 
     def _hubapi_request(self, *args, **kwargs):
@@ -161,6 +217,6 @@ class HubAuth(BaseAuth):
         if isinstance(data, (dict,)):
             data = json.dumps(data)
 
-        return requests.request(method, base_url + relative_path, headers={
+        return self._session.request(method, base_url + relative_path, headers={
             'Authorization': 'token %s' % token
         }, data=data)
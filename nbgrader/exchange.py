@@ -0,0 +1,321 @@
+"""Helpers for the directories that make up the nbgrader exchange."""
+
+import io
+import os
+import re
+import json
+import shutil
+import hashlib
+import tarfile
+import tempfile
+
+from stat import (
+    S_IRUSR, S_IWUSR, S_IXUSR,
+    S_IRGRP, S_IWGRP, S_IXGRP,
+    S_IROTH, S_IWOTH, S_IXOTH,
+    S_ISVTX, S_ISGID
+)
+
+from nbgrader.utils import find_all_files
+
+
+def _sha256(filename):
+    m = hashlib.sha256()
+    with open(filename, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(65536), b''):
+            m.update(chunk)
+    return m.hexdigest()
+
+
+class BlobStore(object):
+    """A content-addressed store of files, shared by all of the submissions to
+    a course, so that files which are the same in many submissions (such as
+    data files that were released with the assignment) are only stored once.
+
+    Each file is stored under the SHA-256 hash of its contents, in one of 256
+    subdirectories which are created by the instructor. Like the inbound
+    directory, these can be written to by everyone, but not listed, so only
+    someone who already has the contents of a file can find it. They also
+    have the sticky bit set, so that files can only be removed or replaced by
+    whoever wrote them. Since anyone may write to the store, a file that is
+    already stored is only used if its contents match its hash, and the
+    contents of files are checked again when they are retrieved.
+
+    """
+
+    #: Mode of the store's directories: 0733 with set GID, like inbound, and
+    #: with the sticky bit set
+    dir_mode = S_ISGID|S_ISVTX|S_IRUSR|S_IWUSR|S_IXUSR|S_IWGRP|S_IXGRP|S_IWOTH|S_IXOTH
+
+    #: Mode of the stored files: 0644
+    file_mode = S_IRUSR|S_IWUSR|S_IRGRP|S_IROTH
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.isdir(self.path)
+
+    def create(self):
+        """Create the store and its subdirectories, if they don't already
+        exist. This should be done by the instructor."""
+        for i in range(-1, 256):
+            path = self.path if i < 0 else os.path.join(self.path, '{:02x}'.format(i))
+            if not os.path.isdir(path):
+                os.mkdir(path)
+                os.chmod(path, self.dir_mode)
+
+    def blob_path(self, digest):
+        if not re.match(r'^[0-9a-f]{64}$', digest):
+            raise ValueError("Invalid hash: {}".format(digest))
+        return os.path.join(self.path, digest[:2], digest)
+
+    def _is_valid(self, path, digest):
+        try:
+            return _sha256(path) == digest
+        except (IOError, OSError):
+            return False
+
+    def put(self, filename):
+        """Add a file to the store, unless it is already stored. Returns the
+        hash of the file, or None if it could not be stored, because a file
+        with different contents was written under its hash or the store's
+        subdirectory for it does not exist."""
+        digest = _sha256(filename)
+        path = self.blob_path(digest)
+        if os.path.isfile(path) and self._is_valid(path, digest):
+            return digest
+
+        shard = os.path.dirname(path)
+        if not os.path.isdir(shard):
+            return None
+
+        # write to a temporary file first, so that a partially written file is
+        # never visible under the hash
+        fd, tmp_path = tempfile.mkstemp(dir=shard, prefix='.' + digest[:8])
+        try:
+            with os.fdopen(fd, 'wb') as dest, open(filename, 'rb') as src:
+                shutil.copyfileobj(src, dest)
+            os.chmod(tmp_path, self.file_mode)
+            try:
+                os.rename(tmp_path, path)
+            except OSError:
+                # a file written by someone else can't be replaced, but it
+                # may have been written with the right contents in the meantime
+                if not self._is_valid(path, digest):
+                    return None
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        return digest
+
+    def get(self, digest, dest):
+        """Copy a file from the store to `dest`, checking that its contents
+        match its hash."""
+        shutil.copyfile(self.blob_path(digest), dest)
+        if _sha256(dest) != digest:
+            os.remove(dest)
+            raise ValueError("Stored file does not match its hash: {}".format(digest))
+
+
+#: Name of the file listing the stored files of a submission
+MANIFEST = '.nbgrader_manifest.json'
+
+
+def store_directory(src, dest, store, exclude=None):
+    """Add the files in `src` to a :class:`BlobStore`, and write a manifest
+    of them to the directory `dest`, which must already exist. Files are
+    excluded based on filename globs, as in
+    :func:`~nbgrader.utils.find_all_files`. Returns the manifest, which maps
+    the path of each file (relative to `src`) to its hash, or to None for
+    files which could not be stored, and were copied to `dest` instead."""
+    manifest = {}
+    for filename in find_all_files(src, exclude):
+        relpath = os.path.relpath(filename, src).replace(os.sep, '/')
+        manifest[relpath] = store.put(filename)
+        if manifest[relpath] is None:
+            # files that can't be stored are copied into the submission
+            target = os.path.join(dest, relpath)
+            if not os.path.isdir(os.path.dirname(target)):
+                os.makedirs(os.path.dirname(target))
+            shutil.copyfile(filename, target)
+
+    with open(os.path.join(dest, MANIFEST), 'w') as fh:
+        json.dump({"files": manifest}, fh, indent=1, sort_keys=True)
+    return manifest
+
+
+def is_stored(path):
+    """Whether a submission was saved with :func:`store_directory`."""
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+
+def restore_directory(src, dest, store):
+    """Make `dest` a copy of a submission saved with :func:`store_directory`.
+    Files in `dest` that already have the right contents are left alone,
+    and files that are not part of the submission are removed. Returns the
+    number of files that were copied."""
+    with open(os.path.join(src, MANIFEST), 'r') as fh:
+        manifest = json.load(fh)["files"]
+
+    # files which were not stored, such as the timestamp
+    for filename in os.listdir(src):
+        if filename != MANIFEST and os.path.isfile(os.path.join(src, filename)):
+            manifest[filename] = None
+
+    if not os.path.isdir(dest):
+        os.makedirs(dest)
+
+    copied = 0
+    keep = set()
+    for relpath, digest in manifest.items():
+        parts = relpath.split('/')
+        if relpath.startswith('/') or '..' in parts:
+            raise ValueError("Invalid path in manifest: {}".format(relpath))
+        target = os.path.join(dest, *parts)
+        keep.add(os.path.normpath(target))
+        if not os.path.isdir(os.path.dirname(target)):
+            os.makedirs(os.path.dirname(target))
+        if digest is None:
+            shutil.copyfile(os.path.join(src, relpath), target)
+        elif not os.path.isfile(target) or _sha256(target) != digest:
+            store.get(digest, target)
+        else:
+            continue
+        copied += 1
+
+    for dirname, dirnames, filenames in os.walk(dest, topdown=False):
+        for filename in filenames:
+            fullpath = os.path.normpath(os.path.join(dirname, filename))
+            if fullpath not in keep:
+                os.remove(fullpath)
+        if dirname != dest and len(os.listdir(dirname)) == 0:
+            os.rmdir(dirname)
+
+    return copied
+
+
+#: Name of the archive holding the files of a packed submission
+ARCHIVE = 'submission.tar.gz'
+
+
+class _HashingReader(object):
+    """Wraps a file, computing the SHA-256 hash of everything read from it."""
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.hash = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.fh.read(size)
+        self.hash.update(data)
+        return data
+
+
+def pack_directory(src, dest, exclude=None):
+    """Pack the files in `src` into a single compressed archive in the
+    directory `dest`, which must already exist, so that a submission is
+    written as one large file rather than many small ones. Files are
+    excluded based on filename globs, as in
+    :func:`~nbgrader.utils.find_all_files`.
+
+    The archive is streamed, and includes a manifest of the hash of every
+    file, which is checked when the archive is unpacked. It is written to a
+    temporary file first, so that a partially written archive is never
+    visible. Returns the manifest, which maps the path of each file (relative
+    to `src`) to its hash.
+
+    """
+    manifest = {}
+    fd, tmp_path = tempfile.mkstemp(dir=dest, prefix='.' + ARCHIVE)
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            tar = tarfile.open(fileobj=fh, mode='w|gz')
+            try:
+                for filename in find_all_files(src, exclude):
+                    relpath = os.path.relpath(filename, src).replace(os.sep, '/')
+                    info = tar.gettarinfo(filename, arcname=relpath)
+                    with open(filename, 'rb') as f:
+                        reader = _HashingReader(f)
+                        tar.addfile(info, reader)
+                    manifest[relpath] = reader.hash.hexdigest()
+
+                data = json.dumps({"files": manifest}, indent=1, sort_keys=True).encode('utf-8')
+                info = tarfile.TarInfo(MANIFEST)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+            finally:
+                tar.close()
+
+        os.chmod(tmp_path, BlobStore.file_mode)
+        os.rename(tmp_path, os.path.join(dest, ARCHIVE))
+    except:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return manifest
+
+
+def is_packed(path):
+    """Whether a submission was saved with :func:`pack_directory`."""
+    return os.path.isfile(os.path.join(path, ARCHIVE))
+
+
+def unpack_directory(src, dest):
+    """Replace `dest` with the files of a submission saved with
+    :func:`pack_directory`, after checking them against the archive's
+    manifest. The files are unpacked into a temporary directory next to
+    `dest`, which only replaces `dest` once every file has been checked.
+    Returns the number of files that were unpacked."""
+    parent = os.path.dirname(os.path.normpath(dest))
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+
+    tmp_path = tempfile.mkdtemp(dir=parent, prefix='.' + os.path.basename(dest))
+    try:
+        manifest = None
+        hashes = {}
+        tar = tarfile.open(os.path.join(src, ARCHIVE), mode='r|gz')
+        try:
+            for member in tar:
+                if member.name == MANIFEST:
+                    f = tar.extractfile(member)
+                    manifest = json.loads(f.read().decode('utf-8'))["files"]
+                    continue
+
+                parts = member.name.split('/')
+                if not member.isfile() or member.name.startswith('/') or '..' in parts:
+                    raise ValueError("Invalid file in archive: {}".format(member.name))
+
+                target = os.path.join(tmp_path, *parts)
+                if not os.path.isdir(os.path.dirname(target)):
+                    os.makedirs(os.path.dirname(target))
+                f = tar.extractfile(member)
+                m = hashlib.sha256()
+                with open(target, 'wb') as fh:
+                    for chunk in iter(lambda: f.read(65536), b''):
+                        m.update(chunk)
+                        fh.write(chunk)
+                hashes[member.name] = m.hexdigest()
+        finally:
+            tar.close()
+
+        if manifest != hashes:
+            raise ValueError("Archive does not match its manifest: {}".format(src))
+
+        # files which were not packed, such as the timestamp
+        for filename in os.listdir(src):
+            if filename != ARCHIVE and os.path.isfile(os.path.join(src, filename)):
+                shutil.copyfile(os.path.join(src, filename), os.path.join(tmp_path, filename))
+
+        os.chmod(tmp_path, S_IRUSR|S_IWUSR|S_IXUSR|S_IRGRP|S_IXGRP|S_IROTH|S_IXOTH)
+        if os.path.isdir(dest):
+            shutil.rmtree(dest)
+        os.rename(tmp_path, dest)
+    except:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    return len(hashes)
@@ -0,0 +1,111 @@
+import os
+import gzip
+import hashlib
+import mimetypes
+import threading
+
+from io import BytesIO
+
+from flask import request, abort, make_response, safe_join, send_file
+
+
+class StaticFiles(object):
+    """Serves the files in a directory with caching headers, and with gzip
+    compression for clients that accept it.
+
+    Text files (such as JavaScript and CSS) are compressed the first time
+    they are requested, and the compressed copy is kept in memory for as
+    long as the file is not modified. Requests that include a version
+    parameter (``?v=...``, see :meth:`version`) are given far-future cache
+    headers, since a new version of the file will be requested from a
+    different URL; other requests are cached for ``max_age`` seconds.
+
+    """
+
+    #: Extensions of files which are worth compressing
+    compress_extensions = (
+        '.js', '.css', '.html', '.json', '.map', '.svg', '.txt', '.ttf', '.eot')
+
+    #: Number of seconds that versioned files may be cached for
+    versioned_max_age = 365 * 24 * 60 * 60
+
+    def __init__(self, root, max_age=60 * 60, min_size=256):
+        self.root = root
+        self.max_age = max_age
+        self.min_size = min_size
+        self._version = None
+        self._compressed = {}
+        self._lock = threading.Lock()
+
+    def version(self):
+        """Compute a hash of the name, modification time and size of every
+        file, to add to their URLs so that browsers fetch them again whenever
+        any of them change. This is only computed once."""
+        if self._version is None:
+            version = hashlib.md5()
+            for dirpath, dirnames, filenames in os.walk(self.root):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    stat = os.stat(os.path.join(dirpath, filename))
+                    relpath = os.path.relpath(os.path.join(dirpath, filename), self.root)
+                    version.update("{}:{}:{}".format(relpath, stat.st_mtime, stat.st_size).encode('utf-8'))
+            self._version = version.hexdigest()[:12]
+        return self._version
+
+    def _gzip(self, path):
+        """Get the compressed contents of a file, compressing it if it has not
+        already been compressed since it was last modified."""
+        stat = os.stat(path)
+        key = (stat.st_mtime, stat.st_size)
+        with self._lock:
+            cached = self._compressed.get(path, None)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        buf = BytesIO()
+        with open(path, 'rb') as fh:
+            with gzip.GzipFile(filename='', mode='wb', fileobj=buf, mtime=0) as gz:
+                gz.write(fh.read())
+        data = buf.getvalue()
+
+        with self._lock:
+            self._compressed[path] = (key, data)
+        return data
+
+    def response(self, filename):
+        """Create the response for a request for one of the files.
+
+        Parameters
+        ----------
+        filename : string
+            path to the file, relative to the root directory
+
+        """
+        path = safe_join(self.root, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+
+        if 'v' in request.args:
+            max_age = self.versioned_max_age
+        else:
+            max_age = self.max_age
+
+        accepts_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+        compress = (
+            path.endswith(self.compress_extensions) and
+            os.path.getsize(path) >= self.min_size)
+
+        if compress and accepts_gzip:
+            data = self._gzip(path)
+            response = make_response(data)
+            response.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            response.headers['Content-Encoding'] = 'gzip'
+            response.set_etag(hashlib.md5(data).hexdigest())
+        else:
+            response = send_file(path, add_etags=True, conditional=False, cache_timeout=max_age)
+
+        if compress:
+            response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        return response.make_conditional(request)
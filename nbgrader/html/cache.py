@@ -0,0 +1,169 @@
+import os
+import hashlib
+import logging
+import threading
+
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+
+class RenderCache(object):
+    """A least-recently-used cache of the HTML that the formgrader renders
+    for each submission, so that going back to a submission that has already
+    been viewed does not need to convert the notebook again.
+
+    The cached HTML is keyed by the path, modification time and size of the
+    notebook file, by the version of the templates, and by all of the
+    resources passed to the template except for those which change between
+    requests for the same submission (its position among the submissions,
+    and the total number of submissions). Those are rendered as placeholders,
+    which are replaced with the real values each time the HTML is used.
+
+    """
+
+    #: Resources that may change between requests for the same submission,
+    #: mapped to the placeholders that are rendered in their place
+    placeholders = {
+        'index': '__nbgrader_index__',
+        'submission_number': '__nbgrader_submission_number__',
+        'total': '__nbgrader_total__',
+        'remaining': '__nbgrader_remaining__',
+    }
+
+    def __init__(self, exporter, size=100):
+        self.exporter = exporter
+        self.size = size
+        self.template_version = self._template_version()
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _template_version(self):
+        """Compute a hash of the name and modification time of every template
+        that the exporter could be using."""
+        version = hashlib.md5()
+        version.update(str(self.exporter.template_file).encode('utf-8'))
+        for path in self.exporter.template_path:
+            if not os.path.isdir(path):
+                continue
+            for filename in sorted(os.listdir(path)):
+                mtime = os.path.getmtime(os.path.join(path, filename))
+                version.update("{}:{}".format(filename, mtime).encode('utf-8'))
+        return version.hexdigest()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _key(self, filename, resources):
+        stat = os.stat(filename)
+        fixed = tuple(sorted((k, v) for k, v in resources.items() if k not in self.placeholders))
+        return (filename, stat.st_mtime, stat.st_size, self.template_version, fixed)
+
+    def __contains__(self, item):
+        filename, resources = item
+        with self._lock:
+            return self._key(filename, resources) in self._cache
+
+    def render(self, filename, resources, exporter=None):
+        """Convert a notebook to HTML, using the cached HTML if possible.
+
+        Parameters
+        ----------
+        filename : string
+            path to the notebook
+        resources : dict
+            resources to pass to the exporter, which must include every key
+            in :attr:`placeholders`
+        exporter : :class:`IPython.nbconvert.exporters.HTMLExporter`
+            (Optional) the exporter to convert the notebook with, if it is
+            not cached, instead of the cache's own exporter. This should be
+            an equivalent exporter, as the cached HTML is shared.
+
+        Returns
+        -------
+        output : string
+            the rendered HTML
+
+        """
+        key = self._key(filename, resources)
+
+        with self._lock:
+            output = self._cache.pop(key, None)
+            if output is not None:
+                self._cache[key] = output
+
+        if output is None:
+            if exporter is None:
+                exporter = self.exporter
+            render_resources = dict(resources)
+            render_resources.update(self.placeholders)
+            output, _ = exporter.from_filename(filename, resources=render_resources)
+
+            if self.size > 0:
+                with self._lock:
+                    self._cache[key] = output
+                    while len(self._cache) > self.size:
+                        self._cache.popitem(last=False)
+
+        for name, placeholder in self.placeholders.items():
+            output = output.replace(placeholder, str(resources[name]))
+
+        return output
+
+
+class Prerenderer(object):
+    """Renders submissions into a :class:`~nbgrader.html.cache.RenderCache` on
+    a pool of background threads, so that the submissions a grader is likely
+    to view next are already cached by the time they are requested.
+
+    The exporters are not safe to share between threads, so each background
+    thread creates its own by calling ``exporter_factory``.
+
+    """
+
+    def __init__(self, cache, exporter_factory, workers=2, log=None):
+        self.cache = cache
+        self.exporter_factory = exporter_factory
+        self.log = log or logging.getLogger(__name__)
+        self._local = threading.local()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPool(workers)
+
+    def schedule(self, submissions):
+        """Render submissions in the background, unless they are already
+        cached or waiting to be rendered.
+
+        Parameters
+        ----------
+        submissions : list
+            ``(filename, resources)`` tuples, in the order they should be
+            rendered
+
+        """
+        for filename, resources in submissions:
+            if not os.path.exists(filename) or (filename, resources) in self.cache:
+                continue
+            with self._lock:
+                if filename in self._pending:
+                    continue
+                self._pending.add(filename)
+            self._pool.apply_async(self._render, (filename, resources))
+
+    def _render(self, filename, resources):
+        try:
+            if not hasattr(self._local, "exporter"):
+                self._local.exporter = self.exporter_factory()
+            self.cache.render(filename, resources, exporter=self._local.exporter)
+        except Exception:
+            self.log.warning("Could not pre-render %s", filename, exc_info=True)
+        finally:
+            with self._lock:
+                self._pending.discard(filename)
+
+    def stop(self):
+        """Stop the background threads, without waiting for pending renders."""
+        self._pool.terminate()
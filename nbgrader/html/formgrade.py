@@ -1,12 +1,17 @@
 import json
 import os
+import hashlib
+import threading
 from functools import wraps
 from nbgrader.api import MissingEntry
+from nbgrader.html.assets import StaticFiles
 from flask import Flask, request, abort, redirect, url_for, render_template, \
-    send_from_directory, Blueprint, g
+    send_from_directory, Blueprint, g, make_response
 
 app = Flask(__name__, static_url_path='')
 blueprint = Blueprint('formgrade', __name__)
+_local = threading.local()
+app.static_files = StaticFiles(os.path.join(app.root_path, 'static'))
 
 def auth(f):
     """Authenticated flask app route."""
@@ -25,6 +30,24 @@ def auth(f):
     return authenticated
 
 
+def get_exporter():
+    """Get the exporter for the current thread. Exporters are not safe to
+    share between threads, so each thread handling requests has its own."""
+    if not hasattr(_local, 'exporter'):
+        _local.exporter = app.exporter_factory()
+    return _local.exporter
+
+
+@app.teardown_request
+def remove_session(exception=None):
+    """Discard the gradebook session used by the request, so that every
+    request starts from a fresh session (and any changes it did not commit
+    are rolled back)."""
+    gradebook = getattr(app, 'gradebook', None)
+    if gradebook is not None:
+        gradebook.db.remove()
+
+
 def set_index(url, request):
     if 'index' in request.args:
         return "{}?index={}".format(url, request.args.get('index'))
@@ -44,28 +67,32 @@ def bp_url_value_preprocessor(endpoint, values):
     g.name = values.pop('name')
 
 
+@app.context_processor
+def static_version():
+    return {'static_version': app.static_files.version()}
+
+
+# Static files contain no student data, so they are not authenticated;
+# otherwise every one of them would need to be checked with the hub.
+
 @blueprint.route("/static/<path:filename>")
-@auth
 def static_proxy(filename):
-    return send_from_directory(os.path.join(app.root_path, 'static'), filename)
+    return app.static_files.response(filename)
 
 
 @blueprint.route("/fonts/<filename>")
-@auth
 def fonts(filename):
     return redirect(url_for('.static_proxy', filename=os.path.join("components", "bootstrap", "fonts", filename)))
 
 
 @blueprint.route("/submissions/components/<path:filename>")
-@auth
 def components(filename):
     return redirect(url_for('.static_proxy', filename=os.path.join("components", filename)))
 
 
 @blueprint.route("/mathjax/<path:filename>")
-@auth
 def mathjax(filename):
-    return send_from_directory(os.path.dirname(app.mathjax_url), filename)
+    return app.mathjax_files.response(filename)
 
 
 @blueprint.route("/")
@@ -77,13 +104,7 @@ def home():
 @blueprint.route("/assignments/")
 @auth
 def view_assignments():
-    assignments = []
-    for assignment in app.gradebook.assignments:
-        x = assignment.to_dict()
-        x["average_score"] = app.gradebook.average_assignment_score(assignment.name)
-        x["average_code_score"] = app.gradebook.average_assignment_code_score(assignment.name)
-        x["average_written_score"] = app.gradebook.average_assignment_written_score(assignment.name)
-        assignments.append(x)
+    assignments = app.gradebook.assignment_dicts()
     return render_template(
         "assignments.tpl",
         assignments=assignments,
@@ -106,16 +127,10 @@ def view_students():
 def view_assignment(assignment_id):
     try:
         assignment = app.gradebook.find_assignment(assignment_id)
+        notebooks = app.gradebook.notebook_dicts(assignment_id)
     except MissingEntry:
         abort(404)
 
-    notebooks = []
-    for notebook in assignment.notebooks:
-        x = notebook.to_dict()
-        x["average_score"] = app.gradebook.average_notebook_score(notebook.name, assignment.name)
-        x["average_code_score"] = app.gradebook.average_notebook_code_score(notebook.name, assignment.name)
-        x["average_written_score"] = app.gradebook.average_notebook_written_score(notebook.name, assignment.name)
-        notebooks.append(x)
     assignment = assignment.to_dict()
 
     return render_template(
@@ -130,34 +145,22 @@ def view_assignment(assignment_id):
 def view_student(student_id):
     try:
         student = app.gradebook.find_student(student_id)
+        submissions = app.gradebook.student_submission_dicts(student_id)
     except MissingEntry:
         abort(404)
 
-    submissions = []
-    for assignment in app.gradebook.assignments:
-        try:
-            submission = app.gradebook.find_submission(assignment.name, student.id).to_dict()
-        except MissingEntry:
-            submission = {
-                "id": None,
-                "name": assignment.name,
-                "student": student.id,
-                "duedate": None,
-                "timestamp": None,
-                "extension": None,
-                "total_seconds_late": 0,
-                "score": 0,
-                "max_score": assignment.max_score,
-                "code_score": 0,
-                "max_code_score": assignment.max_code_score,
-                "written_score": 0,
-                "max_written_score": assignment.max_written_score,
-                "needs_manual_grade": False
-            }
-        submissions.append(submission)
-
     submissions.sort(key=lambda x: x.get("duedate") or "no due date")
-    student = student.to_dict()
+
+    # the overall scores are computed from the submissions, rather than with
+    # student.to_dict(), which would need to query them again
+    student = {
+        "id": student.id,
+        "first_name": student.first_name,
+        "last_name": student.last_name,
+        "email": student.email,
+        "score": sum(x["score"] for x in submissions),
+        "max_score": sum(x["max_score"] for x in submissions)
+    }
 
     return render_template(
         "student_assignments.tpl",
@@ -226,9 +229,12 @@ def view_submission_files(submission_id, path):
     return send_from_directory(dirname, path)
 
 
-@blueprint.route("/submissions/<submission_id>/next")
-@auth
-def view_next_submission(submission_id):
+def navigate(submission_id, find):
+    """Redirect to the submission of the same notebook that is given by
+    ``find``, a function of the notebook's
+    :class:`~nbgrader.html.navigation.NotebookIndex` and the id of the current
+    submission. If there is no such submission, redirect back to the list of
+    the notebook's submissions."""
     try:
         submission = app.gradebook.find_submission_notebook_by_id(submission_id)
         assignment_id = submission.assignment.assignment.name
@@ -236,99 +242,42 @@ def view_next_submission(submission_id):
     except MissingEntry:
         abort(404)
 
-    submissions = app.gradebook.notebook_submissions(notebook_id, assignment_id)
-
-    # find next submission
-    submission_ids = sorted([x.id for x in submissions])
-    ix = submission_ids.index(submission.id)
-    if ix == (len(submissions) - 1):
+    index = app.navigator.index(assignment_id, notebook_id, submission.id)
+    other_id = find(index, submission.id)
+    if other_id is None:
         return redirect(url_for('.view_assignment_notebook', assignment_id=assignment_id, notebook_id=notebook_id))
     else:
         return redirect(set_index(
-            url_for('.view_submission', submission_id=submission_ids[ix + 1]), request))
+            url_for('.view_submission', submission_id=other_id), request))
 
 
-@blueprint.route("/submissions/<submission_id>/next_incorrect")
+@blueprint.route("/submissions/<submission_id>/next")
 @auth
-def view_next_incorrect_submission(submission_id):
-    try:
-        submission = app.gradebook.find_submission_notebook_by_id(submission_id)
-        assignment_id = submission.assignment.assignment.name
-        notebook_id = submission.notebook.name
-    except MissingEntry:
-        abort(404)
+def view_next_submission(submission_id):
+    return navigate(submission_id, lambda index, x: index.next(x))
 
-    submissions = app.gradebook.notebook_submission_dicts(notebook_id, assignment_id)
 
-    # find next incorrect submission
-    incorrect_ids = set([x['id'] for x in submissions if x['failed_tests']])
-    incorrect_ids.add(submission.id)
-    incorrect_ids = sorted(incorrect_ids)
-    ix_incorrect = incorrect_ids.index(submission.id)
-    if ix_incorrect == (len(incorrect_ids) - 1):
-        return redirect(url_for('.view_assignment_notebook', assignment_id=assignment_id, notebook_id=notebook_id))
-    else:
-        return redirect(set_index(
-            url_for('.view_submission', submission_id=incorrect_ids[ix_incorrect + 1]), request))
+@blueprint.route("/submissions/<submission_id>/next_incorrect")
+@auth
+def view_next_incorrect_submission(submission_id):
+    return navigate(submission_id, lambda index, x: index.next_incorrect[x])
 
 
 @blueprint.route("/submissions/<submission_id>/prev")
 @auth
 def view_prev_submission(submission_id):
-    try:
-        submission = app.gradebook.find_submission_notebook_by_id(submission_id)
-        assignment_id = submission.assignment.assignment.name
-        notebook_id = submission.notebook.name
-    except MissingEntry:
-        abort(404)
-
-    submissions = app.gradebook.notebook_submissions(notebook_id, assignment_id)
-
-    # find previous submission
-    submission_ids = sorted([x.id for x in submissions])
-    ix = submission_ids.index(submission.id)
-    if ix == 0:
-        return redirect(url_for('.view_assignment_notebook', assignment_id=assignment_id, notebook_id=notebook_id))
-    else:
-        return redirect(set_index(
-            url_for('.view_submission', submission_id=submission_ids[ix - 1]), request))
+    return navigate(submission_id, lambda index, x: index.prev(x))
 
 
 @blueprint.route("/submissions/<submission_id>/prev_incorrect")
 @auth
 def view_prev_incorrect_submission(submission_id):
-    try:
-        submission = app.gradebook.find_submission_notebook_by_id(submission_id)
-        assignment_id = submission.assignment.assignment.name
-        notebook_id = submission.notebook.name
-    except MissingEntry:
-        abort(404)
-
-    submissions = app.gradebook.notebook_submission_dicts(notebook_id, assignment_id)
-
-    # find previous incorrect submission
-    incorrect_ids = set([x['id'] for x in submissions if x['failed_tests']])
-    incorrect_ids.add(submission.id)
-    incorrect_ids = sorted(incorrect_ids)
-    ix_incorrect = incorrect_ids.index(submission.id)
-    if ix_incorrect == 0:
-        return redirect(url_for('.view_assignment_notebook', assignment_id=assignment_id, notebook_id=notebook_id))
-    else:
-        return redirect(set_index(
-            url_for('.view_submission', submission_id=incorrect_ids[ix_incorrect - 1]), request))
+    return navigate(submission_id, lambda index, x: index.prev_incorrect[x])
 
 
-@blueprint.route("/submissions/<submission_id>/")
-@auth
-def view_submission(submission_id):
-    try:
-        submission = app.gradebook.find_submission_notebook_by_id(submission_id)
-        assignment_id = submission.assignment.assignment.name
-        notebook_id = submission.notebook.name
-        student_id = submission.student.id
-    except MissingEntry:
-        abort(404)
-
+def submission_resources(assignment_id, notebook_id, submission_id, student_id, index, server_exists):
+    """Get the path to a submitted notebook, and the resources to render it
+    with."""
     notebook_dir_format = os.path.join(app.notebook_dir_format, "{notebook_id}.ipynb")
     filename = os.path.join(app.notebook_dir, notebook_dir_format.format(
         nbgrader_step=app.nbgrader_step,
@@ -336,36 +285,90 @@ def view_submission(submission_id):
         notebook_id=notebook_id,
         student_id=student_id))
 
-    submissions = app.gradebook.notebook_submissions(notebook_id, assignment_id)
-    submission_ids = sorted([x.id for x in submissions])
-    ix = submission_ids.index(submission.id)
-    server_exists = app.auth.notebook_server_exists()
-
     if app.mathjax_url.startswith("http"):
         mathjax_url = app.mathjax_url
     else:
         mathjax_url = url_for(".mathjax", filename='MathJax.js')
 
+    position = index.positions[submission_id]
     resources = {
         'assignment_id': assignment_id,
         'notebook_id': notebook_id,
-        'submission_id': submission.id,
-        'index': ix,
-        'total': len(submissions),
+        'submission_id': submission_id,
+        'index': position,
+        'submission_number': position + 1,
+        'total': len(index),
+        'remaining': len(index) - (position + 1),
         'notebook_server_exists': server_exists,
         'base_url': app.auth.base_url,
-        'mathjax_url': mathjax_url
+        'mathjax_url': mathjax_url,
+        'static_version': app.static_files.version()
     }
 
     if server_exists:
         relative_path = os.path.relpath(filename, app.notebook_dir)
         resources['notebook_path'] = app.auth.get_notebook_url(relative_path)
 
+    return filename, resources
+
+
+def prerender_next(assignment_id, notebook_id, submission_id, index, server_exists):
+    """Start rendering the submissions that come after the given one in the
+    background, so that they are cached when the grader moves on to them."""
+    if app.prerenderer is None:
+        return
+
+    position = index.positions[submission_id]
+    next_ids = index.ids[position + 1:position + 1 + app.prerender_count]
+    if len(next_ids) == 0:
+        return
+
+    students = app.gradebook.submission_notebook_students(next_ids)
+    app.prerenderer.schedule([
+        submission_resources(assignment_id, notebook_id, x, students[x], index, server_exists)
+        for x in next_ids if x in students])
+
+
+@blueprint.route("/submissions/<submission_id>/")
+@auth
+def view_submission(submission_id):
+    try:
+        submission = app.gradebook.find_submission_notebook_by_id(submission_id)
+        assignment_id = submission.assignment.assignment.name
+        notebook_id = submission.notebook.name
+        student_id = submission.student.id
+    except MissingEntry:
+        abort(404)
+
+    index = app.navigator.index(assignment_id, notebook_id, submission.id)
+    server_exists = app.auth.notebook_server_exists()
+    filename, resources = submission_resources(
+        assignment_id, notebook_id, submission.id, student_id, index, server_exists)
+
     if not os.path.exists(filename):
         return render_template('formgrade_404.tpl', resources=resources), 404
 
-    output, resources = app.exporter.from_filename(filename, resources=resources)
-    return output
+    prerender_next(assignment_id, notebook_id, submission.id, index, server_exists)
+    return app.render_cache.render(filename, resources, exporter=get_exporter())
+
+
+@blueprint.route("/api/submission/<submission_id>")
+@auth
+def get_submission(submission_id):
+    """Get all of the grades and comments of a submitted notebook. The
+    response has an ETag, so that if nothing has changed since the client
+    last fetched it, an empty 304 response is sent instead."""
+    try:
+        grades, comments = app.gradebook.grade_and_comment_dicts(submission_id)
+    except MissingEntry:
+        abort(404)
+
+    body = json.dumps({"grades": grades, "comments": comments}, sort_keys=True)
+    response = make_response(body)
+    response.mimetype = "application/json"
+    response.set_etag(hashlib.md5(body.encode('utf-8')).hexdigest())
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 
 @blueprint.route("/api/grades")
@@ -394,6 +397,16 @@ def get_all_comments():
     return json.dumps([c.to_dict() for c in notebook.comments])
 
 
+def set_manual_score(grade, manual_score):
+    """Set the manual score of a grade, and whether it still needs to be
+    graded manually."""
+    grade.manual_score = manual_score
+    if grade.manual_score is None and grade.auto_score is None:
+        grade.needs_manual_grade = True
+    else:
+        grade.needs_manual_grade = False
+
+
 @blueprint.route("/api/grade/<_id>", methods=["GET", "PUT"])
 @auth
 def get_grade(_id):
@@ -403,11 +416,7 @@ def get_grade(_id):
         abort(404)
 
     if request.method == "PUT":
-        grade.manual_score = request.json.get("manual_score", None)
-        if grade.manual_score is None and grade.auto_score is None:
-            grade.needs_manual_grade = True
-        else:
-            grade.needs_manual_grade = False
+        set_manual_score(grade, request.json.get("manual_score", None))
         app.gradebook.db.commit()
 
     return json.dumps(grade.to_dict())
@@ -428,6 +437,54 @@ def get_comment(_id):
     return json.dumps(comment.to_dict())
 
 
+@blueprint.route("/api/submission/<submission_id>/grades", methods=["PUT"])
+@auth
+def update_submission_grades(submission_id):
+    """Update any number of the grades and comments of a submitted notebook
+    in a single transaction. The request body should look like:
+
+        {"grades": [{"id": ..., "manual_score": ...}, ...],
+         "comments": [{"id": ..., "manual_comment": ...}, ...]}
+
+    and the updated grades and comments are returned in the same form. If any
+    of the grades or comments do not belong to the submission, then nothing
+    is changed.
+
+    """
+    try:
+        notebook = app.gradebook.find_submission_notebook_by_id(submission_id)
+    except MissingEntry:
+        abort(404)
+
+    changes = request.get_json(silent=True)
+    if not isinstance(changes, dict):
+        abort(400)
+    grade_changes = changes.get("grades", [])
+    comment_changes = changes.get("comments", [])
+    if not isinstance(grade_changes, list) or not isinstance(comment_changes, list):
+        abort(400)
+    if not all(isinstance(x, dict) for x in grade_changes + comment_changes):
+        abort(400)
+
+    grades = dict((x.id, x) for x in notebook.grades)
+    comments = dict((x.id, x) for x in notebook.comments)
+    if any(x.get("id") not in grades for x in grade_changes):
+        abort(400)
+    if any(x.get("id") not in comments for x in comment_changes):
+        abort(400)
+
+    for change in grade_changes:
+        set_manual_score(grades[change["id"]], change.get("manual_score", None))
+    for change in comment_changes:
+        comments[change["id"]].manual_comment = change.get("manual_comment", None)
+    app.gradebook.db.commit()
+
+    return json.dumps({
+        "grades": [grades[x["id"]].to_dict() for x in grade_changes],
+        "comments": [comments[x["id"]].to_dict() for x in comment_changes]
+    })
+
+
 @blueprint.route("/api/submission/<submission_id>/flag")
 @auth
 def flag_submission(submission_id):
@@ -0,0 +1,141 @@
+import time
+import itertools
+import threading
+
+from sqlalchemy import event, inspect
+
+from nbgrader.api import Grade, GradeCell, SubmittedNotebook
+
+
+class NotebookIndex(object):
+    """The submissions of a single notebook, ordered by id, along with the
+    next and previous submission that failed autograder tests for each of
+    them, so that navigating between submissions is a dictionary lookup.
+
+    """
+
+    def __init__(self, submissions):
+        #: The ids of the submissions, in order
+        self.ids = [x[0] for x in submissions]
+
+        #: The position of each submission within :attr:`ids`
+        self.positions = dict((x, i) for i, x in enumerate(self.ids))
+
+        #: The next/previous submission that failed autograder tests, after or
+        #: before each submission (or None, if there is no such submission)
+        self.next_incorrect = {}
+        self.prev_incorrect = {}
+
+        prev_id = None
+        for submission_id, failed_tests in submissions:
+            self.prev_incorrect[submission_id] = prev_id
+            if failed_tests:
+                prev_id = submission_id
+
+        next_id = None
+        for submission_id, failed_tests in reversed(submissions):
+            self.next_incorrect[submission_id] = next_id
+            if failed_tests:
+                next_id = submission_id
+
+        self.created = time.time()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, submission_id):
+        return submission_id in self.positions
+
+    def next(self, submission_id):
+        ix = self.positions[submission_id]
+        if ix == len(self.ids) - 1:
+            return None
+        return self.ids[ix + 1]
+
+    def prev(self, submission_id):
+        ix = self.positions[submission_id]
+        if ix == 0:
+            return None
+        return self.ids[ix - 1]
+
+
+class SubmissionNavigator(object):
+    """A cache of the order of the submissions of each notebook, used by the
+    formgrader to move between submissions.
+
+    An index is built (with a single query) the first time that a notebook's
+    submissions are navigated, and it is thrown away whenever the gradebook
+    changes something that the index depends on: a submission being added or
+    removed, or an autograder score (which determines whether tests failed)
+    changing. Changes that are made by other processes, such as the
+    autograder, cannot be seen, so indexes are also rebuilt once they are
+    older than ``ttl`` seconds.
+
+    """
+
+    def __init__(self, gradebook, ttl=60):
+        self.gradebook = gradebook
+        self.ttl = ttl
+        self._indexes = {}
+        self._lock = threading.Lock()
+        event.listen(gradebook.db, "after_flush", self._invalidate_changed)
+
+    def _invalidate_changed(self, session, flush_context):
+        changed = set()
+        for obj in itertools.chain(session.new, session.dirty, session.deleted):
+            if isinstance(obj, SubmittedNotebook) and obj not in session.dirty:
+                self.invalidate()
+                return
+            elif isinstance(obj, GradeCell) and obj in session.dirty:
+                self.invalidate()
+                return
+            elif isinstance(obj, Grade):
+                if obj in session.new or obj in session.deleted:
+                    changed.add(obj.notebook_id)
+                elif inspect(obj).attrs.auto_score.history.has_changes():
+                    changed.add(obj.notebook_id)
+
+        if len(changed) > 0:
+            with self._lock:
+                for key, index in list(self._indexes.items()):
+                    if any(x in index for x in changed):
+                        del self._indexes[key]
+
+    def invalidate(self):
+        """Throw away all of the cached indexes."""
+        with self._lock:
+            self._indexes.clear()
+
+    def index(self, assignment_id, notebook_id, submission_id=None):
+        """Get the index of the submissions of a notebook, building it if it
+        is not cached, if it has expired, or if it does not contain
+        ``submission_id``.
+
+        Parameters
+        ----------
+        assignment_id : string
+            the name of the assignment
+        notebook_id : string
+            the name of the notebook
+        submission_id : string
+            (Optional) the id of a submitted notebook that must be in the index
+
+        Returns
+        -------
+        index : :class:`~nbgrader.html.navigation.NotebookIndex`
+
+        """
+        key = (assignment_id, notebook_id)
+        with self._lock:
+            index = self._indexes.get(key, None)
+
+        if index is not None:
+            expired = time.time() - index.created > self.ttl
+            missing = submission_id is not None and submission_id not in index
+            if not expired and not missing:
+                return index
+
+        index = NotebookIndex(self.gradebook.notebook_submission_index(notebook_id, assignment_id))
+        with self._lock:
+            self._indexes[key] = index
+        return index
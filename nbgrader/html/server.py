@@ -0,0 +1,37 @@
+from multiprocessing.pool import ThreadPool
+
+from werkzeug.serving import BaseWSGIServer
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """A WSGI server that handles requests on a fixed-size pool of worker
+    threads, so that several graders can use the formgrader at once without
+    waiting for each other's notebooks to be converted, while still bounding
+    the number of requests that are handled at the same time.
+
+    Requests that arrive while every worker is busy wait in the pool's queue
+    until a worker is free.
+
+    """
+
+    multithread = True
+
+    def __init__(self, host, port, app, workers=4, **kwargs):
+        BaseWSGIServer.__init__(self, host, port, app, **kwargs)
+        self.workers = workers
+        self.pool = ThreadPool(workers)
+
+    def process_request(self, request, client_address):
+        self.pool.apply_async(self._process_request_thread, (request, client_address))
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        BaseWSGIServer.server_close(self)
+        self.pool.terminate()
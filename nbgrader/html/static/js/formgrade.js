@@ -15,8 +15,7 @@ function FormGrader (base_url, submission_id) {
 }
 
 FormGrader.prototype.init = function () {
-    this.loadGrades();
-    this.loadComments();
+    this.loadSubmission();
 
     // disable link selection on tabs
     $('a:not(.tabbable)').attr('tabindex', '-1');
@@ -73,17 +72,21 @@ FormGrader.prototype.init = function () {
     });
 };
 
-FormGrader.prototype.loadGrades = function () {
+FormGrader.prototype.loadSubmission = function () {
     var that = this;
 
     this.grades = new Grades();
     this.grade_uis = [];
     this.grades.loaded = false;
-    this.grades.fetch({
-        data: {
-            "submission_id": this.submission_id
-        },
-        success: function () {
+    this.comments = new Comments();
+    this.comment_uis = [];
+    this.comments.loaded = false;
+
+    $.ajax({
+        "url": this.base_url + "/api/submission/" + this.submission_id,
+        "dataType": "json",
+        "success": function (data) {
+            that.grades.reset(data.grades);
             that.grades.loaded = true;
             that.grades.each(function (model) {
                 var grade_ui = new GradeUI({
@@ -92,21 +95,8 @@ FormGrader.prototype.loadGrades = function () {
                 });
                 that.grade_uis.push(grade_ui);
             });
-        }
-    });
-};
-
-FormGrader.prototype.loadComments = function () {
-    var that = this;
 
-    this.comments = new Comments();
-    this.comment_uis = [];
-    this.comments.loaded = false;
-    this.comments.fetch({
-        data: {
-            "submission_id": this.submission_id
-        },
-        success: function () {
+            that.comments.reset(data.comments);
             that.comments.loaded = true;
             that.comments.each(function (model) {
                 var comment_ui = new CommentUI({
@@ -155,10 +145,19 @@ FormGrader.prototype.save = function (callback) {
     var elem = document.activeElement;
     if (elem.tagName === "INPUT" || elem.tagName === "TEXTAREA") {
         if (callback) {
-            $(document).on("finished_saving", callback);
+            $(document).one("finished_saving", function (event, saved) {
+                // stay on the page if the changes couldn't be saved, so that
+                // they aren't lost
+                if (saved) {
+                    callback();
+                } else {
+                    alert("Your changes could not be saved. They will be saved again shortly; please try again once they have been.");
+                }
+            });
         }
         $(elem).blur();
         $(elem).trigger("change");
+        saver.flush();
     } else {
         callback();
     }
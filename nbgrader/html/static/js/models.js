@@ -1,3 +1,94 @@
+// Collects changes to grades and comments, and saves all of them with a
+// single request once no more changes have been made for `delay`
+// milliseconds (or when flush is called), so that tabbing through a
+// notebook does not send a request for every input. Changes that fail to
+// save are kept, and are tried again after `retry_delay` milliseconds.
+//
+// "finished_saving" is triggered on the document after each flush, with
+// whether the changes were saved.
+var BatchSaver = function (url, delay, retry_delay) {
+    this.url = url;
+    this.delay = delay;
+    this.retry_delay = retry_delay;
+    this.pending = {"grades": {}, "comments": {}};
+    this.timeout = null;
+};
+
+BatchSaver.prototype.schedule = function (delay) {
+    clearTimeout(this.timeout);
+    this.timeout = setTimeout(_.bind(this.flush, this), delay);
+};
+
+BatchSaver.prototype.queue = function (kind, model, attrs) {
+    model.set(attrs);
+    this.pending[kind][model.id] = model;
+    model.trigger("request", model);
+    this.schedule(this.delay);
+};
+
+BatchSaver.prototype.flush = function (synchronous) {
+    clearTimeout(this.timeout);
+    this.timeout = null;
+
+    var pending = this.pending;
+    this.pending = {"grades": {}, "comments": {}};
+    if (_.isEmpty(pending.grades) && _.isEmpty(pending.comments)) {
+        $(document).trigger("finished_saving", [true]);
+        return;
+    }
+
+    var data = {
+        "grades": _.map(pending.grades, function (model) {
+            return {"id": model.id, "manual_score": model.get("manual_score")};
+        }),
+        "comments": _.map(pending.comments, function (model) {
+            return {"id": model.id, "manual_comment": model.get("manual_comment")};
+        })
+    };
+
+    $.ajax({
+        "url": this.url,
+        "type": "PUT",
+        "async": !synchronous,
+        "contentType": "application/json",
+        "dataType": "json",
+        "data": JSON.stringify(data),
+        "success": function (response) {
+            _.each(response.grades, function (attrs) {
+                pending.grades[attrs.id].set(attrs);
+                pending.grades[attrs.id].trigger("sync", pending.grades[attrs.id]);
+            });
+            _.each(response.comments, function (attrs) {
+                pending.comments[attrs.id].set(attrs);
+                pending.comments[attrs.id].trigger("sync", pending.comments[attrs.id]);
+            });
+            $(document).trigger("finished_saving", [true]);
+        },
+        "error": _.bind(function () {
+            // put the changes back, so that they are saved with the next
+            // batch (models hold their latest values, so this doesn't undo
+            // any changes that were made in the meantime)
+            _.each(pending, function (models, kind) {
+                _.each(models, function (model) {
+                    this.pending[kind][model.id] = model;
+                    model.trigger("error", model);
+                }, this);
+            }, this);
+            this.schedule(this.retry_delay);
+            $(document).trigger("finished_saving", [false]);
+        }, this)
+    });
+};
+
+var saver = new BatchSaver(base_url + "/api/submission/" + submission_id + "/grades", 500, 5000);
+
+// don't lose changes that are still waiting to be saved when leaving the page
+$(window).on("beforeunload", function () {
+    if (saver.timeout !== null) {
+        saver.flush(true);
+    }
+});
+
 var GradeUI = Backbone.View.extend({
 
     events: {
@@ -15,6 +106,7 @@ var GradeUI = Backbone.View.extend({
         this.listenTo(this.model, "change", this.render);
         this.listenTo(this.model, "request", this.animateSaving);
         this.listenTo(this.model, "sync", this.animateSaved);
+        this.listenTo(this.model, "error", this.animateError);
 
         this.$score.attr("placeholder", this.model.get("auto_score"));
         this.render();
@@ -54,19 +146,26 @@ var GradeUI = Backbone.View.extend({
     },
 
     animateSaving: function () {
-        this.$glyph.removeClass("glyphicon-ok");
+        this.$glyph.removeClass("glyphicon-ok glyphicon-exclamation-sign");
         this.$glyph.addClass("glyphicon-refresh");
         this.$glyph.fadeIn(10);
     },
 
+    animateError: function () {
+        this.$glyph.removeClass("glyphicon-refresh glyphicon-ok");
+        this.$glyph.addClass("glyphicon-exclamation-sign");
+        this.$glyph.attr("title", "Not saved yet, trying again");
+        this.$glyph.fadeIn(10);
+    },
+
     animateSaved: function () {
-        this.$glyph.removeClass("glyphicon-refresh");
+        this.$glyph.removeClass("glyphicon-refresh glyphicon-exclamation-sign");
         this.$glyph.addClass("glyphicon-ok");
+        this.$glyph.removeAttr("title");
         var that = this;
         setTimeout(function () {
             that.$glyph.fadeOut();
         }, 1000);
-        $(document).trigger("finished_saving");
     },
 
     animateInvalidValue: function () {
@@ -98,7 +197,11 @@ var GradeUI = Backbone.View.extend({
 });
 
 var Grade = Backbone.Model.extend({
-    urlRoot: base_url + "/api/grade"
+    urlRoot: base_url + "/api/grade",
+
+    save: function (attrs) {
+        saver.queue("grades", this, attrs);
+    }
 });
 
 var Grades = Backbone.Collection.extend({
@@ -119,6 +222,7 @@ var CommentUI = Backbone.View.extend({
         this.listenTo(this.model, "change", this.render);
         this.listenTo(this.model, "request", this.animateSaving);
         this.listenTo(this.model, "sync", this.animateSaved);
+        this.listenTo(this.model, "error", this.animateError);
 
         this.$comment.attr("placeholder", this.model.get("auto_comment") || "Comments");
         this.render();
@@ -133,24 +237,35 @@ var CommentUI = Backbone.View.extend({
     },
 
     animateSaving: function () {
-        this.$glyph.removeClass("glyphicon-ok");
+        this.$glyph.removeClass("glyphicon-ok glyphicon-exclamation-sign");
         this.$glyph.addClass("glyphicon-refresh");
         this.$glyph.fadeIn(10);
     },
 
+    animateError: function () {
+        this.$glyph.removeClass("glyphicon-refresh glyphicon-ok");
+        this.$glyph.addClass("glyphicon-exclamation-sign");
+        this.$glyph.attr("title", "Not saved yet, trying again");
+        this.$glyph.fadeIn(10);
+    },
+
     animateSaved: function () {
-        this.$glyph.removeClass("glyphicon-refresh");
+        this.$glyph.removeClass("glyphicon-refresh glyphicon-exclamation-sign");
         this.$glyph.addClass("glyphicon-ok");
+        this.$glyph.removeAttr("title");
         var that = this;
         setTimeout(function () {
             that.$glyph.fadeOut();
         }, 1000);
-        $(document).trigger("finished_saving");
     },
 });
 
 var Comment = Backbone.Model.extend({
-    urlRoot: base_url + "/api/comment"
+    urlRoot: base_url + "/api/comment",
+
+    save: function (attrs) {
+        saver.queue("comments", this, attrs);
+    }
 });
 
 var Comments = Backbone.Collection.extend({
@@ -33,7 +33,7 @@ window.MathJax = {
 </script>
 <script type="text/javascript" src="{{ resources.mathjax_url }}?config=TeX-AMS_HTML-full"></script>
 
-<link rel="stylesheet" href="{{resources.base_url}}/static/css/formgrade.css" />
+<link rel="stylesheet" href="{{resources.base_url}}/static/css/formgrade.css?v={{ resources.static_version }}" />
 
 </head>
 {%- endblock header -%}
@@ -46,7 +46,7 @@ window.MathJax = {
       <div class="panel-heading">
         <h4 class="panel-title">
           <span>{{ resources.notebook_id }}</span>
-          <span class="pull-right">Submission {{ resources.index + 1 }} / {{ resources.total }}</span>
+          <span class="pull-right">Submission {{ resources.submission_number }} / {{ resources.total }}</span>
         </h4>
       </div>
       <div class="panel-body">
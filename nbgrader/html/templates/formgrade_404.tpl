@@ -4,7 +4,7 @@
 <html>
 <head>
 {{ header(resources) }}
-<link rel="stylesheet" href="{{resources.base_url}}/static/css/formgrade.css" />
+<link rel="stylesheet" href="{{resources.base_url}}/static/css/formgrade.css?v={{ resources.static_version }}" />
 </head>
 
 <body>
@@ -14,7 +14,7 @@
       <div class="panel-heading">
         <h4 class="panel-title">
           <span>{{ resources.notebook_id }}</span>
-          <span class="pull-right">Submission {{ resources.index + 1 }} / {{ resources.total }}</span>
+          <span class="pull-right">Submission {{ resources.submission_number }} / {{ resources.total }}</span>
         </h4>
       </div>
       <div class="panel-body">
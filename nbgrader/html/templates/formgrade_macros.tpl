@@ -2,11 +2,11 @@
 <meta charset="utf-8" />
 <title>{{ resources.notebook_id }}</title>
 
-<script src="{{resources.base_url}}/static/components/jquery/jquery.min.js"></script>
-<script src="{{resources.base_url}}/static/components/jquery-color/jquery.color.js"></script>
-<script src="{{resources.base_url}}/static/components/underscore/underscore-min.js"></script>
-<script src="{{resources.base_url}}/static/components/backbone/backbone-min.js"></script>
-<script src="{{resources.base_url}}/static/components/bootstrap/js/bootstrap.min.js"></script>
+<script src="{{resources.base_url}}/static/components/jquery/jquery.min.js?v={{ resources.static_version }}"></script>
+<script src="{{resources.base_url}}/static/components/jquery-color/jquery.color.js?v={{ resources.static_version }}"></script>
+<script src="{{resources.base_url}}/static/components/underscore/underscore-min.js?v={{ resources.static_version }}"></script>
+<script src="{{resources.base_url}}/static/components/backbone/backbone-min.js?v={{ resources.static_version }}"></script>
+<script src="{{resources.base_url}}/static/components/bootstrap/js/bootstrap.min.js?v={{ resources.static_version }}"></script>
 
 <script type="text/javascript">
 var submission_id = "{{ resources.submission_id }}";
@@ -15,11 +15,11 @@ var assignment_id = "{{ resources.assignment_id }}";
 var base_url = "{{resources.base_url}}";
 </script>
 
-<script src="{{resources.base_url}}/static/js/keyboardmanager.js"></script>
-<script src="{{resources.base_url}}/static/js/models.js"></script>
-<script src="{{resources.base_url}}/static/js/formgrade.js"></script>
+<script src="{{resources.base_url}}/static/js/keyboardmanager.js?v={{ resources.static_version }}"></script>
+<script src="{{resources.base_url}}/static/js/models.js?v={{ resources.static_version }}"></script>
+<script src="{{resources.base_url}}/static/js/formgrade.js?v={{ resources.static_version }}"></script>
 
-<link rel="stylesheet" href="{{resources.base_url}}/static/components/bootstrap/css/bootstrap.min.css" />
+<link rel="stylesheet" href="{{resources.base_url}}/static/components/bootstrap/css/bootstrap.min.css?v={{ resources.static_version }}" />
 {% endmacro %}
 
 {% macro nav(resources) %}
@@ -43,11 +43,11 @@ var base_url = "{{resources.base_url}}";
             {%- if resources.notebook_server_exists -%}
             <li class="active live-notebook">
               <a data-toggle="tooltip" data-placement="right" title="Open live notebook" target="_blank" href="{{ resources.notebook_path }}">
-                Submission #{{ resources.index + 1 }}
+                Submission #{{ resources.submission_number }}
               </a>
             </li>
             {%- else -%}
-              <li>Submission #{{ resources.index + 1 }}</li>
+              <li>Submission #{{ resources.submission_number }}</li>
             {%- endif -%}
           </ul>
         </ul>
@@ -55,7 +55,7 @@ var base_url = "{{resources.base_url}}";
       <div class="col-md-2">
         <ul class="nav navbar-nav navbar-right">
           <li class="next">
-            <a class="tabbable" data-trigger="hover" data-toggle="tooltip" data-placement="left" title="{{ resources.total - (resources.index + 1) }} remaining" href="{{resources.base_url}}/submissions/{{ resources.submission_id }}/next">
+            <a class="tabbable" data-trigger="hover" data-toggle="tooltip" data-placement="left" title="{{ resources.remaining }} remaining" href="{{resources.base_url}}/submissions/{{ resources.submission_id }}/next">
             Next &rarr;
             </a>
           </li>
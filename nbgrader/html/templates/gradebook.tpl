@@ -2,13 +2,13 @@
 <head>
   <title>nbgrader formgrade</title>
 
-  <script src="{{base_url}}/static/components/jquery/jquery.min.js"></script>
-  <script src="{{base_url}}/static/components/underscore/underscore-min.js"></script>
-  <script src="{{base_url}}/static/components/backbone/backbone-min.js"></script>
-  <script src="{{base_url}}/static/components/bootstrap/js/bootstrap.min.js"></script>
+  <script src="{{base_url}}/static/components/jquery/jquery.min.js?v={{ static_version }}"></script>
+  <script src="{{base_url}}/static/components/underscore/underscore-min.js?v={{ static_version }}"></script>
+  <script src="{{base_url}}/static/components/backbone/backbone-min.js?v={{ static_version }}"></script>
+  <script src="{{base_url}}/static/components/bootstrap/js/bootstrap.min.js?v={{ static_version }}"></script>
 
-  <link rel="stylesheet" href="{{base_url}}/static/components/bootstrap/css/bootstrap.min.css" />
-  <link rel="stylesheet" href="{{base_url}}/static/css/formgrade.css">
+  <link rel="stylesheet" href="{{base_url}}/static/components/bootstrap/css/bootstrap.min.css?v={{ static_version }}" />
+  <link rel="stylesheet" href="{{base_url}}/static/css/formgrade.css?v={{ static_version }}">
 </head>
 
 <body>
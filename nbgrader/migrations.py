@@ -0,0 +1,94 @@
+"""Upgrades for gradebook databases created with older versions of nbgrader.
+
+New tables are created automatically whenever a database is opened, but
+changes to existing tables (such as new indexes or columns) are not. Each
+such change is made by an upgrade step in :data:`migrations`, and the
+version of the schema that a database conforms to is recorded in the
+database itself, so that only the steps which have not yet been applied
+are run.
+
+"""
+
+from nbgrader.api import (
+    InvalidEntry, SCHEMA_VERSION, get_engine, get_schema_version,
+    set_schema_version, create_missing_indexes, add_missing_columns)
+
+
+def _add_foreign_key_indexes(connection):
+    create_missing_indexes(connection)
+
+
+def _add_submitted_notebook_checksums(connection):
+    # databases created before the schema was versioned may already have
+    # these columns, so only the missing ones are added
+    add_missing_columns(
+        connection, "submitted_notebook", ["checksum", "source_checksum"])
+
+
+#: The upgrade steps, in order, as tuples of ``(description, function)``. The
+#: step at index ``i`` upgrades a database from version ``i`` to version
+#: ``i + 1``, and the function is called with a connection to the database,
+#: inside a transaction.
+migrations = [
+    ("Add indexes on foreign keys", _add_foreign_key_indexes),
+    ("Add checksums to submitted notebooks", _add_submitted_notebook_checksums),
+]
+
+assert len(migrations) == SCHEMA_VERSION
+
+
+def current_version(db_url):
+    """Get the version of the schema of a database.
+
+    Parameters
+    ----------
+    db_url : string
+        The URL to the database, e.g. ``sqlite:///grades.db``
+
+    Returns
+    -------
+    version : int
+
+    """
+    return get_schema_version(get_engine(db_url))
+
+
+def upgrade(db_url, log=None):
+    """Upgrade a database to the latest version of the schema. Each step is
+    run in its own transaction, so if a step fails, the database is left at
+    the version of the last step that succeeded.
+
+    Parameters
+    ----------
+    db_url : string
+        The URL to the database, e.g. ``sqlite:///grades.db``
+    log : :class:`logging.Logger`
+        (Optional) Logger to report the steps that are run to
+
+    Returns
+    -------
+    steps : list
+        The descriptions of the steps that were run
+
+    """
+    engine = get_engine(db_url)
+    version = get_schema_version(engine)
+    if version > SCHEMA_VERSION:
+        raise InvalidEntry(
+            "Database schema version {} is newer than the latest version "
+            "supported by this version of nbgrader ({})".format(
+                version, SCHEMA_VERSION))
+
+    steps = []
+    for i in range(version, SCHEMA_VERSION):
+        description, func = migrations[i]
+        if log is not None:
+            log.info("Upgrading database to version %d: %s", i + 1, description)
+
+        with engine.begin() as connection:
+            func(connection)
+            set_schema_version(connection, i + 1)
+
+        steps.append(description)
+
+    return steps
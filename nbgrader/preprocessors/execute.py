@@ -1,9 +1,207 @@
+import os
+import atexit
+import threading
+
+from textwrap import dedent
+
+try:
+    from queue import Queue, Empty  # Py 3
+except ImportError:
+    from Queue import Queue, Empty  # Py 2
+
 from IPython.nbconvert.preprocessors import ExecutePreprocessor
-from IPython.utils.traitlets import Bool, List
+from IPython.kernel.manager import start_new_kernel
+from IPython.kernel.kernelspec import get_kernel_spec, NoSuchKernel
+from IPython.utils.traitlets import Bool, List, Integer
 
 from nbgrader.preprocessors import NbGraderPreprocessor
 
+
+class KernelPool(object):
+    """A pool of kernels that are started ahead of time, so that notebooks do
+    not have to wait for a kernel to start up before they can be executed.
+
+    Kernels are handed out with :meth:`acquire`, and should be given back with
+    :meth:`release` once the notebook has been executed. Released kernels are
+    restarted in the background (so that every notebook gets a clean kernel)
+    before they are handed out again.
+
+    """
+
+    def __init__(self, kernel_name, size, extra_arguments, log, startup_timeout=60):
+        self.kernel_name = kernel_name
+        self.extra_arguments = extra_arguments
+        self.log = log
+        self.startup_timeout = startup_timeout
+
+        self._kernels = Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+        # kernel managers keep the arguments they were started with, and use
+        # them again when they restart the kernel, so this stays open until
+        # the pool is shut down
+        self._devnull = open(os.devnull, 'w')
+
+        self.log.info("Starting %d kernels with kernel: %s", size, kernel_name)
+        for i in range(size):
+            self._in_background(self._start)
+
+    def _in_background(self, func, *args):
+        thread = threading.Thread(target=func, args=args)
+        thread.daemon = True
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            self._threads.append(thread)
+        thread.start()
+
+    def _start(self):
+        try:
+            km, kc = start_new_kernel(
+                kernel_name=self.kernel_name,
+                extra_arguments=self.extra_arguments,
+                stderr=self._devnull)
+        except Exception as e:
+            self.log.error("Failed to start kernel: %s", e)
+            return
+        self._kernels.put((km, kc))
+
+    def _restart(self, km, kc):
+        try:
+            kc.stop_channels()
+            km.restart_kernel(now=True)
+            kc = km.client()
+            kc.start_channels()
+            kc.wait_for_ready()
+        except Exception as e:
+            self.log.error("Failed to restart kernel, starting a new one instead: %s", e)
+            try:
+                km.shutdown_kernel(now=True)
+            except Exception:
+                pass
+            self._start()
+        else:
+            self._kernels.put((km, kc))
+
+    def acquire(self):
+        """Get a kernel from the pool, waiting for one to become available if
+        necessary. Returns a tuple of the kernel manager and kernel client.
+
+        """
+        try:
+            km, kc = self._kernels.get(timeout=self.startup_timeout)
+        except Empty:
+            raise RuntimeError("Timed out waiting for a kernel from the pool")
+        kc.allow_stdin = False
+        return km, kc
+
+    def release(self, km, kc):
+        """Give a kernel back to the pool. It will be restarted in the
+        background before it is handed out again.
+
+        """
+        self._in_background(self._restart, km, kc)
+
+    def shutdown(self):
+        """Wait for any kernels that are still starting up, and then shut down
+        all of the kernels in the pool.
+
+        """
+        with self._lock:
+            threads = self._threads
+            self._threads = []
+        for thread in threads:
+            thread.join()
+
+        while True:
+            try:
+                km, kc = self._kernels.get_nowait()
+            except Empty:
+                break
+            kc.stop_channels()
+            km.shutdown_kernel(now=True)
+
+        self._devnull.close()
+
+
+# Kernel pools are shared by all instances of the Execute preprocessor (a new
+# instance is created for every notebook that is converted), keyed by the name
+# of the kernel and its extra arguments.
+_kernel_pools = {}
+
+def get_kernel_pool(kernel_name, size, extra_arguments, log):
+    key = (kernel_name, tuple(extra_arguments))
+    if key not in _kernel_pools:
+        if len(_kernel_pools) == 0:
+            atexit.register(shutdown_kernel_pools)
+        _kernel_pools[key] = KernelPool(kernel_name, size, list(extra_arguments), log)
+    return _kernel_pools[key]
+
+def shutdown_kernel_pools():
+    """Shut down all kernels in all of the kernel pools."""
+    while len(_kernel_pools) > 0:
+        _, pool = _kernel_pools.popitem()
+        pool.shutdown()
+
+
 class Execute(NbGraderPreprocessor, ExecutePreprocessor):
 
     interrupt_on_timeout = Bool(True)
     extra_arguments = List(["--HistoryManager.hist_file=:memory:"])
+
+    kernel_pool_size = Integer(
+        0, config=True,
+        help=dedent(
+            """
+            The number of kernels to keep running in the background. If this is
+            greater than zero, kernels are started ahead of time and reused
+            (after being restarted) across notebooks, instead of starting a new
+            kernel for each notebook. Only Python kernels can be pooled; other
+            kernels are always started from scratch.
+            """
+        )
+    )
+
+    def _can_use_pool(self, kernel_name):
+        if self.kernel_pool_size < 1:
+            return False
+        try:
+            language = get_kernel_spec(kernel_name).language
+        except NoSuchKernel:
+            return False
+        return language == 'python'
+
+    def _change_directory(self, path):
+        # pooled kernels are not started in the notebook's directory, so we
+        # need to move them there before any of the cells are run
+        msg_id = self.kc.execute(
+            "import os as __os; __os.chdir({!r}); del __os".format(path),
+            silent=True, store_history=False)
+        while True:
+            msg = self.kc.shell_channel.get_msg(timeout=self.timeout)
+            if msg['parent_header'].get('msg_id') == msg_id:
+                break
+        if msg['content']['status'] != 'ok':
+            raise RuntimeError("Could not change kernel directory to {}".format(path))
+
+    def preprocess(self, nb, resources):
+        kernel_name = nb.metadata.get('kernelspec', {}).get('name', 'python')
+        if not self._can_use_pool(kernel_name):
+            return super(Execute, self).preprocess(nb, resources)
+
+        path = resources.get('metadata', {}).get('path', '')
+        if path == '':
+            path = os.getcwd()
+
+        pool = get_kernel_pool(kernel_name, self.kernel_pool_size, self.extra_arguments, self.log)
+        self.log.info("Executing notebook with pooled kernel: %s" % kernel_name)
+        self.km, self.kc = pool.acquire()
+
+        try:
+            self._change_directory(os.path.abspath(path))
+            # skip ExecutePreprocessor.preprocess, which would start a new kernel
+            nb, resources = super(ExecutePreprocessor, self).preprocess(nb, resources)
+        finally:
+            pool.release(self.km, self.kc)
+
+        return nb, resources
@@ -1,5 +1,5 @@
 from nbgrader import utils
-from nbgrader.api import Gradebook
+from nbgrader.api import Gradebook, MissingEntry, Grade, GradeCell, Comment, SolutionCell
 from nbgrader.preprocessors import NbGraderPreprocessor
 
 
@@ -16,11 +16,34 @@ class SaveAutoGrades(NbGraderPreprocessor):
         # connect to the database
         self.gradebook = Gradebook(self.db_url)
 
+        # fetch all of the grades and comments for the notebook up front (one
+        # query each), rather than looking them up one cell at a time
+        submission = self.gradebook.find_submission_notebook(
+            self.notebook_id, self.assignment_id, self.student_id)
+        self.grades = dict(
+            (name, grade) for grade, name in self.gradebook.db.query(Grade, GradeCell.name)\
+                .join(GradeCell, GradeCell.id == Grade.cell_id)\
+                .filter(Grade.notebook_id == submission.id))
+        self.comments = dict(
+            (name, comment) for comment, name in self.gradebook.db.query(Comment, SolutionCell.name)\
+                .join(SolutionCell, SolutionCell.id == Comment.cell_id)\
+                .filter(Comment.notebook_id == submission.id))
+
         # process the cells
         nb, resources = super(SaveAutoGrades, self).preprocess(nb, resources)
 
+        # save all of the grades and comments at once
+        self.gradebook.db.commit()
+
         return nb, resources
 
+    def _find(self, entries, kind, cell):
+        grade_id = cell.metadata['nbgrader']['grade_id']
+        if grade_id not in entries:
+            raise MissingEntry("No such {}: {}/{}/{} for {}".format(
+                kind, self.assignment_id, self.notebook_id, grade_id, self.student_id))
+        return entries[grade_id]
+
     def _add_score(self, cell, resources):
         """Graders can override the autograder grades, and may need to
         manually grade written solutions anyway. This function adds
@@ -29,13 +52,7 @@ class SaveAutoGrades(NbGraderPreprocessor):
         that might have been provided by a grader.
 
         """
-        # these are the fields by which we will identify the score
-        # information
-        grade = self.gradebook.find_grade(
-            cell.metadata['nbgrader']['grade_id'],
-            self.notebook_id,
-            self.assignment_id,
-            self.student_id)
+        grade = self._find(self.grades, "grade", cell)
 
         # determine what the grade is
         auto_score, _ = utils.determine_grade(cell)
@@ -48,22 +65,16 @@ class SaveAutoGrades(NbGraderPreprocessor):
         else:
             grade.needs_manual_grade = False
 
-        self.gradebook.db.commit()
         self.log.debug(grade)
 
     def _add_comment(self, cell, resources):
-        comment = self.gradebook.find_comment(
-            cell.metadata['nbgrader']['grade_id'],
-            self.notebook_id,
-            self.assignment_id,
-            self.student_id)
+        comment = self._find(self.comments, "comment", cell)
 
         if cell.metadata.nbgrader.get("checksum", None) == utils.compute_checksum(cell):
             comment.auto_comment = "No response."
         else:
             comment.auto_comment = None
 
-        self.gradebook.db.commit()
         self.log.debug(comment)
 
     def preprocess_cell(self, cell, resources, cell_index):
@@ -1,4 +1,5 @@
 import pytest
+import sqlalchemy as sa
 
 from datetime import datetime
 from nbgrader import api
@@ -33,6 +34,51 @@ def test_init(gradebook):
     assert gradebook.assignments == []
 
 
+def test_shared_engine(tmpdir):
+    db_url = "sqlite:///" + str(tmpdir.join("gradebook.db"))
+    gb1 = api.Gradebook(db_url)
+    gb2 = api.Gradebook(db_url)
+    assert gb1.db.get_bind() is gb2.db.get_bind()
+    assert gb1.db is not gb2.db
+
+    gb1.add_student('12345')
+    assert gb2.find_student('12345').id == '12345'
+    gb1.db.close()
+    gb2.db.close()
+
+    # the tables should be created again if the database is removed
+    tmpdir.join("gradebook.db").remove()
+    gb3 = api.Gradebook(db_url)
+    assert gb3.students == []
+    gb3.db.close()
+
+
+def test_in_memory_engine_not_shared():
+    gb1 = api.Gradebook("sqlite:///:memory:")
+    gb2 = api.Gradebook("sqlite:///:memory:")
+    assert gb1.db.get_bind() is not gb2.db.get_bind()
+
+    gb1.add_student('12345')
+    assert gb2.students == []
+    gb1.db.close()
+    gb2.db.close()
+
+
+def test_create_missing_indexes(gradebook):
+    engine = gradebook.db.get_bind()
+    gradebook.db.close()
+
+    def indexes():
+        return set(x['name'] for x in sa.inspect(engine).get_indexes('grade'))
+
+    assert 'ix_grade_notebook_id' in indexes()
+    engine.execute('DROP INDEX ix_grade_notebook_id')
+    assert 'ix_grade_notebook_id' not in indexes()
+
+    api.create_missing_indexes(engine)
+    assert 'ix_grade_notebook_id' in indexes()
+
+
 #### Test students
 
 def test_add_student(gradebook):
@@ -505,6 +551,53 @@ def test_add_duplicate_submission(assignment):
         assignment.add_submission('foo', 'hacker123')
 
 
+def test_add_submissions_bulk(assignment):
+    assignment.add_student('hacker123')
+    assignment.add_student('bitdiddle')
+    s1, s2 = assignment.add_submissions_bulk(
+        'foo', ['hacker123', 'bitdiddle'], timestamp="2015-02-02 14:58:23.948203 PST")
+
+    assert s1.student.id == 'hacker123'
+    assert s2.student.id == 'bitdiddle'
+    assert s1.timestamp == utils.parse_utc("2015-02-02 14:58:23.948203 PST")
+    assert assignment.find_submission('foo', 'hacker123') == s1
+    assert assignment.find_submission('foo', 'bitdiddle') == s2
+
+    for submission in (s1, s2):
+        nb, = submission.notebooks
+        assert nb.name == 'p1'
+        assert sorted(x.name for x in nb.grades) == ['test1', 'test2']
+        assert sorted(x.name for x in nb.comments) == ['solution1', 'test2']
+        assert nb.score == 0
+        assert nb.max_score == 3
+        assert nb.flagged == False
+
+
+def test_add_submissions_bulk_empty(assignment):
+    assert assignment.add_submissions_bulk('foo', []) == []
+    assert assignment.assignment_submissions('foo') == []
+
+
+def test_add_submissions_bulk_missing_student(assignment):
+    assignment.add_student('hacker123')
+    with pytest.raises(MissingEntry):
+        assignment.add_submissions_bulk('foo', ['hacker123', 'bitdiddle'])
+    assert assignment.assignment_submissions('foo') == []
+
+
+def test_add_duplicate_submissions_bulk(assignment):
+    assignment.add_student('hacker123')
+    assignment.add_student('bitdiddle')
+    assignment.add_submission('foo', 'bitdiddle')
+    with pytest.raises(InvalidEntry):
+        assignment.add_submissions_bulk('foo', ['hacker123', 'bitdiddle'])
+
+    # nothing should have been added
+    assert [x.student.id for x in assignment.assignment_submissions('foo')] == ['bitdiddle']
+    assert len(assignment.db.query(api.SubmittedNotebook).all()) == 1
+    assert len(assignment.db.query(api.Grade).all()) == 2
+
+
 def test_remove_submission(assignment):
     assignment.add_student('hacker123')
     assignment.add_submission('foo', 'hacker123')
@@ -704,7 +797,8 @@ def test_average_notebook_score(assignment):
 
 ## Test mass dictionary queries
 
-def test_student_dicts(assignment):
+@pytest.mark.parametrize("materialized", [False, True])
+def test_student_dicts(assignment, materialized):
     assignment.add_student('hacker123')
     assignment.add_student('bitdiddle')
     assignment.add_student('louisreasoner')
@@ -722,13 +816,16 @@ def test_student_dicts(assignment):
     g4.manual_score = 1
     assignment.db.commit()
 
+    b = sorted([x.to_dict() for x in assignment.students], key=lambda x: x["id"])
+    if materialized:
+        assignment.enable_materialized_scores()
     students = assignment.student_dicts()
     a = sorted(students, key=lambda x: x["id"])
-    b = sorted([x.to_dict() for x in assignment.students], key=lambda x: x["id"])
     assert a == b
 
 
-def test_notebook_submission_dicts(assignment):
+@pytest.mark.parametrize("materialized", [False, True])
+def test_notebook_submission_dicts(assignment, materialized):
     assignment.add_student('hacker123')
     assignment.add_student('bitdiddle')
     s1 = assignment.add_submission('foo', 'hacker123')
@@ -748,7 +845,267 @@ def test_notebook_submission_dicts(assignment):
     assignment.db.commit()
 
     notebook = assignment.find_notebook("p1", "foo")
+    b = sorted([x.to_dict() for x in notebook.submissions], key=lambda x: x["id"])
+    if materialized:
+        assignment.enable_materialized_scores()
     submissions = assignment.notebook_submission_dicts("p1", "foo")
     a = sorted(submissions, key=lambda x: x["id"])
-    b = sorted([x.to_dict() for x in notebook.submissions], key=lambda x: x["id"])
     assert a == b
+    assert assignment.notebook_submission_dicts("p2", "foo") == []
+
+
+def test_enable_materialized_scores(assignment):
+    assignment.add_student('hacker123')
+    assignment.add_submission('foo', 'hacker123')
+    assert not assignment.materialized_scores
+
+    assignment.enable_materialized_scores()
+    assert assignment.materialized_scores
+    assert assignment.check_materialized_scores() == []
+
+    g1 = assignment.find_grade("test1", "p1", "foo", "hacker123")
+    g1.manual_score = 0.5
+    assignment.db.commit()
+    assert assignment.check_materialized_scores() == []
+    submission = assignment.find_submission('foo', 'hacker123')
+    foo, = [x for x in assignment.assignment_dicts() if x["name"] == "foo"]
+    assert foo["average_score"] == submission.score
+
+
+def test_materialized_scores_track_submissions(assignment):
+    assignment.enable_materialized_scores()
+    assignment.add_student('hacker123')
+    assignment.add_student('bitdiddle')
+    assignment.add_student('louisreasoner')
+    assignment.add_submission('foo', 'hacker123')
+    assignment.add_submissions_bulk('foo', ['bitdiddle', 'louisreasoner'])
+    assert assignment.check_materialized_scores() == []
+    assert len(assignment.db.execute(api.submitted_notebook_score.select()).fetchall()) == 3
+
+    assignment.remove_submission('foo', 'hacker123')
+    assert assignment.check_materialized_scores() == []
+    assert len(assignment.db.execute(api.submitted_notebook_score.select()).fetchall()) == 2
+
+
+def test_load_materialized_scores(assignment):
+    _populate_scores(assignment)
+    submissions = dict((x.id, x.to_dict()) for x in assignment.assignment_submissions('foo'))
+    notebooks = dict((x.id, x.to_dict()) for x in assignment.notebook_submissions('p1', 'foo'))
+    students = dict((x.id, x.to_dict()) for x in assignment.students)
+    assignment.enable_materialized_scores()
+
+    # the scores of objects loaded in bulk come from the materialized scores
+    assignment.db.execute(api.submitted_notebook_score.update().values(score=10))
+    assignment.db.commit()
+    assert [x.score for x in assignment.assignment_submissions('foo')] == [10, 10]
+    assert [x.score for x in assignment.notebook_submissions('p1', 'foo')] == [10, 10]
+    assert [x.score for x in assignment.student_submissions('hacker123')] == [10]
+    assert [x.score for x in assignment.students] == [10, 10]
+
+    assignment.rebuild_materialized_scores()
+    assert dict((x.id, x.to_dict()) for x in assignment.assignment_submissions('foo')) == submissions
+    assert dict((x.id, x.to_dict()) for x in assignment.notebook_submissions('p1', 'foo')) == notebooks
+    assert dict((x.id, x.to_dict()) for x in assignment.students) == students
+
+
+def test_materialized_scores_dropped(assignment):
+    _populate_scores(assignment)
+    students = assignment.student_dicts()
+    assignment.enable_materialized_scores()
+
+    # as if another process had dropped the table
+    api.submitted_notebook_score.drop(bind=assignment.db.get_bind())
+    assert assignment.student_dicts() == students
+    assert not assignment.materialized_scores
+
+    g = assignment.find_grade("test1", "p1", "foo", "hacker123")
+    g.manual_score = 0
+    assignment.db.commit()
+    assert assignment.find_submission('foo', 'hacker123').score == 2
+
+
+def test_materialized_scores_created(assignment, monkeypatch):
+    monkeypatch.setattr(api, "MATERIALIZED_SCORES_RECHECK", -1)
+    assert not assignment.materialized_scores
+
+    # as if another process had created the table
+    api.optional_metadata.create_all(bind=assignment.db.get_bind())
+    assert assignment.materialized_scores
+
+
+def test_rebuild_materialized_scores(assignment):
+    with pytest.raises(MissingEntry):
+        assignment.check_materialized_scores()
+    with pytest.raises(MissingEntry):
+        assignment.rebuild_materialized_scores()
+
+    assignment.add_student('hacker123')
+    s = assignment.add_submission('foo', 'hacker123')
+    assignment.enable_materialized_scores()
+
+    assignment.db.execute(api.submitted_notebook_score.update().values(score=10))
+    assignment.db.commit()
+    assert assignment.check_materialized_scores() == [s.notebooks[0].id]
+
+    assignment.rebuild_materialized_scores()
+    assert assignment.check_materialized_scores() == []
+
+
+def test_grade_table(assignment):
+    assignment.add_assignment('bar')
+    assignment.add_student('hacker123', first_name='Alyssa')
+    assignment.add_student('bitdiddle')
+    assignment.add_submission('foo', 'hacker123')
+    assignment.add_submission('foo', 'bitdiddle')
+
+    g = assignment.find_grade("test1", "p1", "foo", "hacker123")
+    g.auto_score = 1
+    g.manual_score = 0.5
+    assignment.db.commit()
+
+    rows = [dict(zip(api.grade_table_columns, x)) for x in assignment.grade_table(batch_size=1)]
+    assert [(x["student_id"], x["grade_cell"]) for x in rows] == [
+        ("bitdiddle", "test1"), ("bitdiddle", "test2"),
+        ("hacker123", "test1"), ("hacker123", "test2")]
+    assert rows[2]["first_name"] == "Alyssa"
+    assert rows[2]["assignment"] == "foo"
+    assert rows[2]["notebook"] == "p1"
+    assert rows[2]["cell_type"] == "code"
+    assert rows[2]["auto_score"] == 1
+    assert rows[2]["manual_score"] == 0.5
+    assert rows[2]["score"] == 0.5
+    assert rows[2]["max_score"] == 1
+    assert rows[3]["score"] == 0
+
+    assert len(list(assignment.grade_table(assignment_id='foo'))) == 4
+    assert list(assignment.grade_table(assignment_id='bar')) == []
+
+
+def _populate_scores(gb):
+    gb.add_student('hacker123')
+    gb.add_student('bitdiddle')
+    gb.add_submission('foo', 'hacker123')
+    gb.add_submission('foo', 'bitdiddle')
+
+    g1 = gb.find_grade("test1", "p1", "foo", "hacker123")
+    g2 = gb.find_grade("test2", "p1", "foo", "hacker123")
+    g3 = gb.find_grade("test1", "p1", "foo", "bitdiddle")
+    g1.manual_score = 0.5
+    g2.manual_score = 2
+    g3.manual_score = 1
+    g1.needs_manual_grade = False
+    g2.needs_manual_grade = False
+    g3.needs_manual_grade = False
+    gb.db.commit()
+
+
+@pytest.mark.parametrize("materialized", [False, True])
+def test_assignment_dicts(assignment, materialized):
+    _populate_scores(assignment)
+    assignment.add_assignment('bar')
+    if materialized:
+        assignment.enable_materialized_scores()
+
+    a = assignment.assignment_dicts()
+    b = []
+    for x in assignment.assignments:
+        d = x.to_dict()
+        d["average_score"] = assignment.average_assignment_score(x.name)
+        d["average_code_score"] = assignment.average_assignment_code_score(x.name)
+        d["average_written_score"] = assignment.average_assignment_written_score(x.name)
+        b.append(d)
+    assert a == b
+
+
+@pytest.mark.parametrize("materialized", [False, True])
+def test_notebook_dicts(assignment, materialized):
+    _populate_scores(assignment)
+    assignment.add_notebook('p2', 'foo')
+    if materialized:
+        assignment.enable_materialized_scores()
+
+    a = assignment.notebook_dicts('foo')
+    b = []
+    for x in assignment.find_assignment('foo').notebooks:
+        d = x.to_dict()
+        d["average_score"] = assignment.average_notebook_score(x.name, 'foo')
+        d["average_code_score"] = assignment.average_notebook_code_score(x.name, 'foo')
+        d["average_written_score"] = assignment.average_notebook_written_score(x.name, 'foo')
+        b.append(d)
+    assert a == b
+
+    with pytest.raises(MissingEntry):
+        assignment.notebook_dicts('bar')
+
+
+@pytest.mark.parametrize("materialized", [False, True])
+def test_student_submission_dicts(assignment, materialized):
+    _populate_scores(assignment)
+    assignment.add_assignment('bar', duedate='2015-02-02 14:58:23.948203 PST')
+    assignment.update_or_create_submission('foo', 'hacker123', timestamp='2015-02-02 15:58:23.948203 PST')
+    if materialized:
+        assignment.enable_materialized_scores()
+
+    submissions = assignment.student_submission_dicts('hacker123')
+    assert [x["name"] for x in submissions] == [x.name for x in assignment.assignments]
+
+    for submission in submissions:
+        if submission["name"] == "foo":
+            assert submission == assignment.find_submission('foo', 'hacker123').to_dict()
+        else:
+            assert submission["id"] is None
+            assert submission["duedate"] is None
+            assert submission["score"] == 0
+            assert submission["max_score"] == 0
+            assert not submission["needs_manual_grade"]
+
+    with pytest.raises(MissingEntry):
+        assignment.student_submission_dicts('bitdiddle2')
+
+
+@pytest.mark.parametrize("materialized", [False, True])
+def test_notebook_submission_index(assignment, materialized):
+    _populate_scores(assignment)
+    g = assignment.find_grade("test1", "p1", "foo", "bitdiddle")
+    g.auto_score = 0
+    assignment.db.commit()
+    if materialized:
+        assignment.enable_materialized_scores()
+
+    index = assignment.notebook_submission_index("p1", "foo")
+    expected = sorted((x.id, x.failed_tests) for x in assignment.notebook_submissions("p1", "foo"))
+    assert index == expected
+    assert sum(failed for _, failed in index) == 1
+
+    with pytest.raises(MissingEntry):
+        assignment.notebook_submission_index("p2", "foo")
+
+
+def test_submission_notebook_students(assignment):
+    assignment.add_student('hacker123')
+    assignment.add_student('bitdiddle')
+    s1 = assignment.add_submission('foo', 'hacker123')
+    s2 = assignment.add_submission('foo', 'bitdiddle')
+    n1 = s1.notebooks[0].id
+    n2 = s2.notebooks[0].id
+
+    assert assignment.submission_notebook_students([n1, n2, 'foo']) == {
+        n1: 'hacker123', n2: 'bitdiddle'}
+    assert assignment.submission_notebook_students([]) == {}
+
+
+def test_grade_and_comment_dicts(assignment):
+    assignment.add_student('hacker123')
+    s = assignment.add_submission('foo', 'hacker123')
+    notebook = s.notebooks[0]
+    for grade in notebook.grades:
+        grade.auto_score = 0
+    notebook.comments[0].manual_comment = "good job"
+    assignment.db.commit()
+
+    grades, comments = assignment.grade_and_comment_dicts(notebook.id)
+    assert grades == sorted([x.to_dict() for x in notebook.grades], key=lambda x: x["name"])
+    assert comments == sorted([x.to_dict() for x in notebook.comments], key=lambda x: x["name"])
+
+    with pytest.raises(MissingEntry):
+        assignment.grade_and_comment_dicts('foo')
@@ -0,0 +1,125 @@
+import pytest
+
+from sqlalchemy import create_engine, MetaData, Table, UniqueConstraint
+
+from nbgrader import api
+from nbgrader import migrations
+from nbgrader.api import InvalidEntry
+
+
+@pytest.fixture
+def db(tmpdir):
+    return "sqlite:///" + str(tmpdir.join("gradebook.db"))
+
+
+#: Columns which were added to existing tables after the schema was versioned
+new_columns = [
+    ("submitted_notebook", "checksum"),
+    ("submitted_notebook", "source_checksum"),
+]
+
+
+def _old_metadata():
+    # the schema as it was before it was versioned: without the schema
+    # version table, the indexes on foreign keys, or any of the new columns
+    metadata = MetaData()
+    for table in api.Base.metadata.sorted_tables:
+        if table.name == api.schema_version.name:
+            continue
+        columns = []
+        for column in table.columns:
+            if (table.name, column.name) in new_columns:
+                continue
+            column = column.copy()
+            column.index = None
+            columns.append(column)
+        constraints = [x.copy() for x in table.constraints if isinstance(x, UniqueConstraint)]
+        Table(table.name, metadata, *(columns + constraints))
+    return metadata
+
+
+def _make_old(db):
+    # create the database with the old schema, so that it looks like one
+    # created before the schema was versioned
+    metadata = _old_metadata()
+    engine = create_engine(db)
+    metadata.create_all(bind=engine)
+    return engine, metadata
+
+
+def _columns(engine, table_name):
+    return [x['name'] for x in api.inspect(engine).get_columns(table_name)]
+
+
+def test_new_database_is_current(db):
+    assert migrations.current_version(db) == api.SCHEMA_VERSION
+    assert migrations.upgrade(db) == []
+
+
+def test_upgrade(db):
+    engine, _ = _make_old(db)
+    assert 'checksum' not in _columns(engine, 'submitted_notebook')
+    assert migrations.current_version(db) == 0
+    assert 'ix_grade_notebook_id' not in [x['name'] for x in api.inspect(engine).get_indexes('grade')]
+
+    steps = migrations.upgrade(db)
+    assert steps == [description for description, func in migrations.migrations]
+    assert migrations.current_version(db) == api.SCHEMA_VERSION
+    assert 'ix_grade_notebook_id' in [x['name'] for x in api.inspect(engine).get_indexes('grade')]
+    assert 'checksum' in _columns(engine, 'submitted_notebook')
+    assert 'source_checksum' in _columns(engine, 'submitted_notebook')
+
+    # upgrading again should do nothing
+    assert migrations.upgrade(db) == []
+
+
+def test_upgrade_keeps_data(db):
+    engine, metadata = _make_old(db)
+    engine.execute(metadata.tables['student'].insert().values(id='hacker123'))
+    engine.execute(metadata.tables['assignment'].insert().values(id='a1', name='foo'))
+    engine.execute(metadata.tables['notebook'].insert().values(id='n1', name='p1', assignment_id='a1'))
+    engine.execute(metadata.tables['submitted_assignment'].insert().values(
+        id='sa1', assignment_id='a1', student_id='hacker123'))
+    engine.execute(metadata.tables['submitted_notebook'].insert().values(
+        id='sn1', assignment_id='sa1', notebook_id='n1'))
+    engine.dispose()
+
+    migrations.upgrade(db)
+
+    gb = api.Gradebook(db)
+    assert gb.find_student('hacker123').id == 'hacker123'
+    submission = gb.find_submission_notebook('p1', 'foo', 'hacker123')
+    assert submission.checksum is None
+    assert submission.source_checksum is None
+    gb.db.close()
+
+
+def test_old_database_must_be_upgraded(db):
+    engine, _ = _make_old(db)
+    engine.dispose()
+
+    with pytest.raises(InvalidEntry) as excinfo:
+        api.Gradebook(db)
+    assert "nbgrader db upgrade" in str(excinfo.value)
+
+    migrations.upgrade(db)
+    gb = api.Gradebook(db)
+    assert gb.students == []
+    gb.db.close()
+
+
+def test_upgrade_unversioned_database_with_checksums(db):
+    # databases which were created with the checksum columns, but before the
+    # schema was versioned, should also be upgraded
+    engine = api.get_engine(db)
+    engine.execute(api.schema_version.delete())
+    assert migrations.current_version(db) == 0
+
+    migrations.upgrade(db)
+    assert migrations.current_version(db) == api.SCHEMA_VERSION
+
+
+def test_upgrade_newer_database(db):
+    api.set_schema_version(api.get_engine(db), api.SCHEMA_VERSION + 1)
+    with pytest.raises(InvalidEntry):
+        migrations.upgrade(db)
@@ -257,3 +257,112 @@ class TestNbGraderAutograde(BaseTestApp):
         assert os.path.isfile("autograded/foo/ps1/foo.txt")
         assert self._get_permissions("autograded/foo/ps1/foo.ipynb") == "644"
         assert self._get_permissions("autograded/foo/ps1/foo.txt") == "644"
+
+    def test_grade_parallel(self, gradebook):
+        """Can files be graded in parallel?"""
+        self._copy_file("files/submitted-unchanged.ipynb", "source/ps1/p1.ipynb")
+        run_command('nbgrader assign ps1 --db="{}" '.format(gradebook))
+
+        self._copy_file("files/submitted-unchanged.ipynb", "submitted/foo/ps1/p1.ipynb")
+        self._copy_file("files/submitted-changed.ipynb", "submitted/bar/ps1/p1.ipynb")
+        run_command('nbgrader autograde ps1 --db="{}" --jobs=2'.format(gradebook))
+
+        assert os.path.isfile("autograded/foo/ps1/p1.ipynb")
+        assert os.path.isfile("autograded/bar/ps1/p1.ipynb")
+
+        gb = Gradebook(gradebook)
+        notebook = gb.find_submission_notebook("p1", "ps1", "foo")
+        assert notebook.score == 1
+        assert notebook.needs_manual_grade == False
+        notebook = gb.find_submission_notebook("p1", "ps1", "bar")
+        assert notebook.score == 2
+        assert notebook.needs_manual_grade == True
+
+    def test_grade_parallel_failure(self, gradebook):
+        """Does a failed submission not stop the others from being graded in parallel?"""
+        self._copy_file("files/submitted-unchanged.ipynb", "source/ps1/p1.ipynb")
+        run_command('nbgrader assign ps1 --db="{}" '.format(gradebook))
+
+        self._copy_file("files/submitted-unchanged.ipynb", "submitted/foo/ps1/p1.ipynb")
+        self._copy_file("files/submitted-changed.ipynb", "submitted/baz/ps1/p1.ipynb")
+        output = run_command('nbgrader autograde ps1 --db="{}" --jobs=2'.format(gradebook), retcode=1)
+
+        assert os.path.isfile("autograded/foo/ps1/p1.ipynb")
+        assert not os.path.isfile("autograded/baz/ps1/p1.ipynb")
+        assert "No student with ID 'baz' exists in the database" in output
+
+    def test_grade_failure(self, gradebook):
+        """Does a failed submission not stop the others from being graded?"""
+        self._copy_file("files/submitted-unchanged.ipynb", "source/ps1/p1.ipynb")
+        run_command('nbgrader assign ps1 --db="{}" '.format(gradebook))
+
+        # baz is graded first, and fails
+        self._copy_file("files/submitted-unchanged.ipynb", "submitted/foo/ps1/p1.ipynb")
+        self._copy_file("files/submitted-changed.ipynb", "submitted/baz/ps1/p1.ipynb")
+        output = run_command('nbgrader autograde ps1 --db="{}"'.format(gradebook), retcode=1)
+
+        assert os.path.isfile("autograded/foo/ps1/p1.ipynb")
+        assert not os.path.isfile("autograded/baz/ps1/p1.ipynb")
+        assert "No student with ID 'baz' exists in the database" in output
+
+    def test_kernel_pool(self, gradebook):
+        """Can files be graded using a pool of kernels?"""
+        self._copy_file("files/side-effects.ipynb", "source/ps1/p1.ipynb")
+        self._copy_file("files/submitted-unchanged.ipynb", "source/ps1/p2.ipynb")
+        run_command('nbgrader assign ps1 --db="{}" '.format(gradebook))
+
+        self._copy_file("files/side-effects.ipynb", "submitted/foo/ps1/p1.ipynb")
+        self._copy_file("files/submitted-unchanged.ipynb", "submitted/foo/ps1/p2.ipynb")
+        self._copy_file("files/side-effects.ipynb", "submitted/bar/ps1/p1.ipynb")
+        self._copy_file("files/submitted-changed.ipynb", "submitted/bar/ps1/p2.ipynb")
+        run_command('nbgrader autograde ps1 --db="{}" --Execute.kernel_pool_size=2'.format(gradebook))
+
+        # kernels should be run in the directory of the submission
+        assert os.path.isfile("autograded/foo/ps1/side-effect.txt")
+        assert os.path.isfile("autograded/bar/ps1/side-effect.txt")
+        assert not os.path.isfile("side-effect.txt")
+
+        gb = Gradebook(gradebook)
+        assert gb.find_submission_notebook("p2", "ps1", "foo").score == 1
+        assert gb.find_submission_notebook("p2", "ps1", "bar").score == 2
+
+    def test_grade_changed_submissions(self, gradebook):
+        """Are only submissions that have changed graded again?"""
+        self._copy_file("files/submitted-unchanged.ipynb", "source/ps1/p1.ipynb")
+        run_command('nbgrader assign ps1 --db="{}" '.format(gradebook))
+
+        self._copy_file("files/submitted-unchanged.ipynb", "submitted/foo/ps1/p1.ipynb")
+        self._copy_file("files/submitted-unchanged.ipynb", "submitted/bar/ps1/p1.ipynb")
+        run_command('nbgrader autograde ps1 --db="{}"'.format(gradebook))
+
+        gb = Gradebook(gradebook)
+        notebook = gb.find_submission_notebook("p1", "ps1", "bar")
+        assert notebook.score == 1
+        assert notebook.checksum is not None
+        assert notebook.source_checksum is not None
+        gb.db.close()
+
+        # nothing has changed, so nothing should be graded again
+        os.remove("autograded/foo/ps1/p1.ipynb")
+        os.remove("autograded/bar/ps1/p1.ipynb")
+        run_command('nbgrader autograde ps1 --db="{}"'.format(gradebook))
+        assert not os.path.isfile("autograded/foo/ps1/p1.ipynb")
+        assert not os.path.isfile("autograded/bar/ps1/p1.ipynb")
+
+        # only the changed submission should be graded again
+        self._copy_file("files/submitted-changed.ipynb", "submitted/bar/ps1/p1.ipynb")
+        run_command('nbgrader autograde ps1 --db="{}"'.format(gradebook))
+        assert not os.path.isfile("autograded/foo/ps1/p1.ipynb")
+        assert os.path.isfile("autograded/bar/ps1/p1.ipynb")
+
+        gb = Gradebook(gradebook)
+        notebook = gb.find_submission_notebook("p1", "ps1", "bar")
+        assert notebook.score == 2
+        gb.db.close()
+
+        # changing the source files should cause everything to be graded again
+        self._make_file("source/ps1/data.csv", "some,data\n")
+        run_command('nbgrader autograde ps1 --db="{}"'.format(gradebook))
+        assert os.path.isfile("autograded/foo/ps1/p1.ipynb")
+        assert os.path.isfile("autograded/foo/ps1/data.csv")
+        assert os.path.isfile("autograded/bar/ps1/data.csv")
@@ -1,4 +1,6 @@
 import os
+import json
+import shutil
 
 from nbgrader.tests import run_command
 from nbgrader.tests.apps.base import BaseTestApp
@@ -7,20 +9,22 @@ from nbgrader.utils import parse_utc
 
 class TestNbGraderCollect(BaseTestApp):
 
-    def _release_and_fetch(self, assignment, exchange):
+    def _release_and_fetch(self, assignment, exchange, flags=""):
         self._copy_file("files/test.ipynb", "release/ps1/p1.ipynb")
         run_command(
             'nbgrader release {} '
             '--NbGraderConfig.course_id=abc101 '
-            '--TransferApp.exchange_directory={} '.format(assignment, exchange))
+            '--TransferApp.exchange_directory={} '
+            '{}'.format(assignment, exchange, flags))
         run_command(
             'nbgrader fetch abc101 {} '
             '--TransferApp.exchange_directory={} '.format(assignment, exchange))
 
-    def _submit(self, assignment, exchange):
+    def _submit(self, assignment, exchange, flags=""):
         run_command(
             'nbgrader submit {} abc101 '
-            '--TransferApp.exchange_directory={} '.format(assignment, exchange))
+            '--TransferApp.exchange_directory={} '
+            '{}'.format(assignment, exchange, flags))
 
     def _collect(self, assignment, exchange, flags="", retcode=0):
         run_command(
@@ -72,3 +76,68 @@ class TestNbGraderCollect(BaseTestApp):
         self._collect("ps1", exchange, "--update")
         assert self._read_timestamp(root) != timestamp
 
+
+    def test_collect_deduplicated(self, exchange):
+        self._release_and_fetch("ps1", exchange, "--deduplicate")
+        assert os.path.isdir(os.path.join(exchange, "abc101", "blobs"))
+
+        # the submission should only contain the manifest and the timestamp
+        self._submit("ps1", exchange)
+        inbound = os.path.join(exchange, "abc101", "inbound")
+        submissions = [x for x in os.listdir(inbound) if not x.startswith(".")]
+        assert len(submissions) == 1
+        assert sorted(os.listdir(os.path.join(inbound, submissions[0]))) == [
+            ".nbgrader_manifest.json", "timestamp.txt"]
+
+        self._collect("ps1", exchange)
+        root = os.path.join("submitted/{}/ps1".format(os.environ['USER']))
+        assert os.path.isfile(os.path.join(root, "p1.ipynb"))
+        assert os.path.isfile(os.path.join(root, "timestamp.txt"))
+        timestamp = self._read_timestamp(root)
+
+        # resubmit and update
+        self._submit("ps1", exchange)
+        self._collect("ps1", exchange, "--update")
+        assert os.path.isfile(os.path.join(root, "p1.ipynb"))
+        assert self._read_timestamp(root) != timestamp
+
+    def test_collect_corrupt_submission(self, exchange):
+        self._release_and_fetch("ps1", exchange, "--deduplicate")
+        self._submit("ps1", exchange)
+
+        # add a submission from another student which refers to a file that
+        # isn't in the store
+        inbound = os.path.join(exchange, "abc101", "inbound")
+        submission, = [x for x in os.listdir(inbound) if not x.startswith(".")]
+        name = "bad+ps1+" + submission.rsplit("+", 1)[1]
+        shutil.copytree(os.path.join(inbound, submission), os.path.join(inbound, name))
+        with open(os.path.join(inbound, name, ".nbgrader_manifest.json"), "w") as fh:
+            json.dump({"files": {"p1.ipynb": "0" * 64}}, fh)
+
+        # the other submissions should still be collected
+        self._collect("ps1", exchange, retcode=1)
+        assert os.path.isfile("submitted/{}/ps1/p1.ipynb".format(os.environ['USER']))
+        assert not os.path.exists("submitted/bad/ps1")
+
+    def test_collect_archived(self, exchange):
+        self._release_and_fetch("ps1", exchange)
+
+        # the submission should only contain the archive and the timestamp
+        self._submit("ps1", exchange, "--archive")
+        inbound = os.path.join(exchange, "abc101", "inbound")
+        submissions = [x for x in os.listdir(inbound) if not x.startswith(".")]
+        assert len(submissions) == 1
+        assert sorted(os.listdir(os.path.join(inbound, submissions[0]))) == [
+            "submission.tar.gz", "timestamp.txt"]
+
+        self._collect("ps1", exchange)
+        root = os.path.join("submitted/{}/ps1".format(os.environ['USER']))
+        assert os.path.isfile(os.path.join(root, "p1.ipynb"))
+        assert os.path.isfile(os.path.join(root, "timestamp.txt"))
+        timestamp = self._read_timestamp(root)
+
+        # resubmit and update
+        self._submit("ps1", exchange, "--archive")
+        self._collect("ps1", exchange, "--update")
+        assert os.path.isfile(os.path.join(root, "p1.ipynb"))
+        assert self._read_timestamp(root) != timestamp
@@ -0,0 +1,28 @@
+from nbgrader import api
+from nbgrader.tests import run_command
+from nbgrader.tests.apps.base import BaseTestApp
+
+
+class TestNbGraderDb(BaseTestApp):
+
+    def test_help(self):
+        """Does the help display without error?"""
+        run_command("nbgrader db --help-all")
+        run_command("nbgrader db upgrade --help-all")
+
+    def test_no_subcommand(self):
+        """Is an error thrown when no subcommand is given?"""
+        run_command("nbgrader db", retcode=1)
+
+    def test_upgrade(self, db):
+        """Can an unversioned database be upgraded?"""
+        engine = api.get_engine(db)
+        engine.execute(api.schema_version.delete())
+        assert api.get_schema_version(engine) == 0
+        engine.dispose()
+
+        run_command('nbgrader db upgrade --db="{}"'.format(db))
+        assert api.get_schema_version(api.get_engine(db)) == api.SCHEMA_VERSION
+
+        # running it again should be fine
+        run_command('nbgrader db upgrade --db="{}"'.format(db))
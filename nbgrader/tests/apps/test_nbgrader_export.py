@@ -0,0 +1,51 @@
+import io
+import csv
+
+from nbgrader.api import Gradebook, grade_table_columns
+from nbgrader.apps.exportapp import read_columnar
+from nbgrader.tests import run_command
+from nbgrader.tests.apps.base import BaseTestApp
+
+
+class TestNbGraderExport(BaseTestApp):
+
+    def _grade(self, gradebook):
+        self._copy_file("files/submitted-unchanged.ipynb", "source/ps1/p1.ipynb")
+        run_command('nbgrader assign ps1 --db="{}" '.format(gradebook))
+
+        self._copy_file("files/submitted-unchanged.ipynb", "submitted/foo/ps1/p1.ipynb")
+        self._copy_file("files/submitted-changed.ipynb", "submitted/bar/ps1/p1.ipynb")
+        run_command('nbgrader autograde ps1 --db="{}"'.format(gradebook))
+
+    def test_help(self):
+        """Does the help display without error?"""
+        run_command("nbgrader export --help-all")
+
+    def test_missing_assignment(self, gradebook):
+        """Is an error thrown when the assignment is missing?"""
+        run_command('nbgrader export ps2 --db="{}"'.format(gradebook), retcode=1)
+
+    def test_export_csv(self, gradebook):
+        """Can the grades be exported to CSV?"""
+        self._grade(gradebook)
+        run_command('nbgrader export --db="{}"'.format(gradebook))
+
+        with io.open("grades.csv", "r") as fh:
+            rows = list(csv.reader(fh))
+
+        assert rows[0] == grade_table_columns
+        expected = list(Gradebook(gradebook).grade_table())
+        assert len(rows) == len(expected) + 1
+        assert [x[0] for x in rows[1:]] == [x[0] for x in expected]
+
+    def test_export_columnar(self, gradebook):
+        """Can the grades be exported to a columnar file?"""
+        self._grade(gradebook)
+        run_command('nbgrader export ps1 --to=columnar --output=out.zip --db="{}"'.format(gradebook))
+
+        rows = list(read_columnar("out.zip"))
+        expected = list(Gradebook(gradebook).grade_table())
+        assert len(rows) == len(expected)
+        for row, expected_row in zip(rows, expected):
+            assert row[:5] == expected_row[:5]
+            assert row[7:] == expected_row[7:]
@@ -0,0 +1,34 @@
+from nbgrader.api import Gradebook, submitted_notebook_score
+from nbgrader.tests import run_command
+from nbgrader.tests.apps.base import BaseTestApp
+
+
+class TestNbGraderScores(BaseTestApp):
+
+    def test_help(self):
+        """Does the help display without error?"""
+        run_command("nbgrader scores --help-all")
+
+    def test_not_enabled(self, gradebook):
+        """Is an error thrown when materialized scores are not enabled?"""
+        run_command('nbgrader scores --db="{}"'.format(gradebook), retcode=1)
+
+    def test_check_and_rebuild(self, gradebook):
+        """Are inconsistent materialized scores detected and rebuilt?"""
+        self._copy_file("files/submitted-unchanged.ipynb", "source/ps1/p1.ipynb")
+        run_command('nbgrader assign ps1 --db="{}" '.format(gradebook))
+
+        self._copy_file("files/submitted-changed.ipynb", "submitted/foo/ps1/p1.ipynb")
+        run_command('nbgrader autograde ps1 --db="{}"'.format(gradebook))
+
+        run_command('nbgrader scores --enable --db="{}"'.format(gradebook))
+        run_command('nbgrader scores --db="{}"'.format(gradebook))
+
+        gb = Gradebook(gradebook)
+        gb.db.execute(submitted_notebook_score.update().values(score=100))
+        gb.db.commit()
+        gb.db.close()
+
+        run_command('nbgrader scores --db="{}"'.format(gradebook), retcode=1)
+        run_command('nbgrader scores --rebuild --db="{}"'.format(gradebook))
+        run_command('nbgrader scores --db="{}"'.format(gradebook))
@@ -0,0 +1,132 @@
+import json
+import pytest
+
+from nbgrader.api import Gradebook
+from nbgrader.html.formgrade import app
+
+
+class AllowAll(object):
+
+    def authenticate(self):
+        return True
+
+
+@pytest.fixture
+def client(request):
+    gb = Gradebook("sqlite:///:memory:")
+    gb.add_assignment('foo')
+    gb.add_notebook('p1', 'foo')
+    gb.add_grade_cell('test1', 'p1', 'foo', max_score=1, cell_type='code')
+    gb.add_grade_cell('test2', 'p1', 'foo', max_score=2, cell_type='markdown')
+    gb.add_solution_cell('test2', 'p1', 'foo')
+    gb.add_source_cell('test1', 'p1', 'foo', cell_type='code')
+    gb.add_source_cell('test2', 'p1', 'foo', cell_type='markdown')
+    gb.add_student('hacker123')
+    gb.add_student('bitdiddle')
+    gb.add_submission('foo', 'hacker123')
+    gb.add_submission('foo', 'bitdiddle')
+
+    app.gradebook = gb
+    app.auth = AllowAll()
+
+    def fin():
+        gb.db.close()
+        del app.gradebook
+    request.addfinalizer(fin)
+
+    return app.test_client()
+
+
+def _put(client, submission_id, data):
+    return client.put(
+        "/api/submission/{}/grades".format(submission_id),
+        data=json.dumps(data),
+        content_type="application/json")
+
+
+def test_update_submission_grades(client):
+    notebook = app.gradebook.find_submission_notebook('p1', 'foo', 'hacker123')
+    grades = dict((x.name, x.id) for x in notebook.grades)
+    comments = dict((x.name, x.id) for x in notebook.comments)
+
+    response = _put(client, notebook.id, {
+        "grades": [
+            {"id": grades["test1"], "manual_score": 1},
+            {"id": grades["test2"], "manual_score": None}
+        ],
+        "comments": [
+            {"id": comments["test2"], "manual_comment": "good job"}
+        ]
+    })
+    assert response.status_code == 200
+
+    data = json.loads(response.data.decode('utf-8'))
+    assert [(x["id"], x["manual_score"], x["needs_manual_grade"]) for x in data["grades"]] == [
+        (grades["test1"], 1, False), (grades["test2"], None, True)]
+    assert [(x["id"], x["manual_comment"]) for x in data["comments"]] == [
+        (comments["test2"], "good job")]
+
+    assert app.gradebook.find_grade("test1", "p1", "foo", "hacker123").manual_score == 1
+    assert app.gradebook.find_comment("test2", "p1", "foo", "hacker123").manual_comment == "good job"
+
+
+def test_update_submission_grades_from_other_submission(client):
+    notebook = app.gradebook.find_submission_notebook('p1', 'foo', 'hacker123')
+    other = app.gradebook.find_submission_notebook('p1', 'foo', 'bitdiddle')
+    grade_id = notebook.grades[0].id
+    other_grade_id = other.grades[0].id
+
+    # nothing should be changed if any of the grades are from another submission
+    response = _put(client, notebook.id, {
+        "grades": [
+            {"id": grade_id, "manual_score": 1},
+            {"id": other_grade_id, "manual_score": 1}
+        ]
+    })
+    assert response.status_code == 400
+    assert app.gradebook.find_grade_by_id(grade_id).manual_score is None
+    assert app.gradebook.find_grade_by_id(other_grade_id).manual_score is None
+
+
+def test_update_submission_grades_invalid_body(client):
+    notebook = app.gradebook.find_submission_notebook('p1', 'foo', 'hacker123')
+    url = "/api/submission/{}/grades".format(notebook.id)
+
+    assert client.put(url, data="not json", content_type="application/json").status_code == 400
+    assert client.put(url, data="grades", content_type="text/plain").status_code == 400
+    assert _put(client, notebook.id, [1, 2]).status_code == 400
+    assert _put(client, notebook.id, {"grades": "foo"}).status_code == 400
+    assert _put(client, notebook.id, {"grades": [1]}).status_code == 400
+
+
+def test_update_submission_grades_missing_submission(client):
+    assert _put(client, "foo", {"grades": []}).status_code == 404
+
+
+def test_get_submission(client):
+    notebook = app.gradebook.find_submission_notebook('p1', 'foo', 'hacker123')
+    response = client.get("/api/submission/{}".format(notebook.id))
+    assert response.status_code == 200
+
+    data = json.loads(response.data.decode('utf-8'))
+    assert sorted(x["id"] for x in data["grades"]) == sorted(x.id for x in notebook.grades)
+    assert sorted(x["id"] for x in data["comments"]) == sorted(x.id for x in notebook.comments)
+
+    # the data hasn't changed, so it shouldn't be sent again
+    etag = response.headers["ETag"]
+    response = client.get(
+        "/api/submission/{}".format(notebook.id),
+        headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    # but it should be once a grade has changed
+    _put(client, notebook.id, {"grades": [{"id": notebook.grades[0].id, "manual_score": 1}]})
+    response = client.get(
+        "/api/submission/{}".format(notebook.id),
+        headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_get_missing_submission(client):
+    assert client.get("/api/submission/foo").status_code == 404
@@ -0,0 +1,65 @@
+import gzip
+import pytest
+
+from io import BytesIO
+from flask import Flask
+
+from nbgrader.html.assets import StaticFiles
+
+
+@pytest.fixture
+def static(tmpdir):
+    tmpdir.mkdir("js").join("foo.js").write("var x = 1;\n" * 100)
+    tmpdir.join("font.woff").write("abc" * 100)
+
+    app = Flask(__name__)
+    files = StaticFiles(str(tmpdir))
+
+    @app.route("/static/<path:filename>")
+    def static(filename):
+        return files.response(filename)
+
+    return app.test_client(), files
+
+
+def test_gzip(static):
+    client, files = static
+
+    response = client.get("/static/js/foo.js", headers={"Accept-Encoding": "gzip, deflate"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.mimetype == "application/javascript"
+    contents = gzip.GzipFile(fileobj=BytesIO(response.data)).read()
+    assert contents == b"var x = 1;\n" * 100
+
+    response = client.get("/static/js/foo.js")
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    assert response.data == b"var x = 1;\n" * 100
+
+    # files that don't compress well should never be compressed
+    response = client.get("/static/font.woff", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+
+
+def test_cache_headers(static):
+    client, files = static
+
+    response = client.get("/static/js/foo.js")
+    assert response.cache_control.max_age == files.max_age
+
+    response = client.get("/static/js/foo.js?v={}".format(files.version()))
+    assert response.cache_control.max_age == files.versioned_max_age
+    assert response.cache_control.public
+
+    etag = response.headers["ETag"]
+    response = client.get("/static/js/foo.js", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_missing_file(static):
+    client, files = static
+    assert client.get("/static/js/bar.js").status_code == 404
+    assert client.get("/static/../foo.js").status_code == 404
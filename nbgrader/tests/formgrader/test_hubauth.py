@@ -0,0 +1,146 @@
+import json
+import threading
+import pytest
+
+from flask import Flask
+from wsgiref.simple_server import make_server, WSGIRequestHandler
+
+from nbgrader.auth.hubauth import HubAuth
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeHub(object):
+    """A stand-in for the JupyterHub API and the configurable-http-proxy,
+    which knows about a single valid cookie."""
+
+    def __init__(self, users):
+        self.users = users
+        self.cookie_checks = 0
+        self.server = make_server('127.0.0.1', 0, self, handler_class=QuietHandler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def __call__(self, environ, start_response):
+        path = environ['PATH_INFO']
+        if path.startswith('/api/routes/'):
+            start_response('201 Created', [])
+            return [b'']
+
+        prefix = '/hub/api/authorizations/cookie/jupyter-hub-token/'
+        if path.startswith(prefix):
+            self.cookie_checks += 1
+            cookie = path[len(prefix):]
+            if cookie in self.users:
+                start_response('200 OK', [('Content-Type', 'application/json')])
+                return [json.dumps({'name': self.users[cookie]}).encode('utf-8')]
+
+        start_response('404 Not Found', [])
+        return [b'']
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def hub(request):
+    hub = FakeHub({'abc': 'foobar', 'def': 'student', 'jkl': 'grader2'})
+    request.addfinalizer(hub.stop)
+    return hub
+
+
+def _make_auth(hub, **kwargs):
+    app = Flask(__name__)
+    kwargs.setdefault('graders', ['foobar'])
+    auth = HubAuth(
+        app, '127.0.0.1', 9000, '.',
+        hubapi_port=hub.port,
+        proxy_port=hub.port,
+        hubapi_token='token',
+        proxy_token='token',
+        remap_url='/hub/nbgrader/course101',
+        **kwargs)
+    return app, auth
+
+
+def _authenticate(app, auth, cookie):
+    headers = {'Cookie': 'jupyter-hub-token={}'.format(cookie)}
+    with app.test_request_context('/', headers=headers):
+        return auth.authenticate()
+
+
+def test_verified_cookies_are_cached(hub):
+    app, auth = _make_auth(hub)
+
+    assert _authenticate(app, auth, 'abc') is True
+    assert hub.cookie_checks == 1
+    assert _authenticate(app, auth, 'abc') is True
+    assert hub.cookie_checks == 1
+
+    # users who aren't graders should still be rejected
+    assert _authenticate(app, auth, 'def') is False
+    assert _authenticate(app, auth, 'def') is False
+    assert hub.cookie_checks == 2
+
+    # invalid cookies should never be cached
+    assert _authenticate(app, auth, 'ghi').status_code == 302
+    assert _authenticate(app, auth, 'ghi').status_code == 302
+    assert hub.cookie_checks == 4
+
+
+def test_verified_cookies_expire(hub):
+    app, auth = _make_auth(hub, cookie_max_age=60)
+
+    assert _authenticate(app, auth, 'abc') is True
+    assert hub.cookie_checks == 1
+
+    # pretend the cookie was verified a while ago
+    user, timestamp = auth._verified_cookies['abc']
+    auth._verified_cookies['abc'] = (user, timestamp - 61)
+    assert _authenticate(app, auth, 'abc') is True
+    assert hub.cookie_checks == 2
+
+
+def test_cache_disabled(hub):
+    app, auth = _make_auth(hub, cookie_max_age=0)
+
+    assert _authenticate(app, auth, 'abc') is True
+    assert _authenticate(app, auth, 'abc') is True
+    assert hub.cookie_checks == 2
+    assert auth._verified_cookies == {}
+
+
+def test_concurrent_requests_keep_their_user(hub):
+    app, auth = _make_auth(hub, graders=['foobar', 'grader2'])
+    authenticated = threading.Event()
+    urls = {}
+
+    def first():
+        with app.test_request_context('/', headers={'Cookie': 'jupyter-hub-token=abc'}):
+            assert auth.authenticate() is True
+            authenticated.set()
+            # wait for the other grader's request to be authenticated
+            second_thread.join()
+            urls['abc'] = auth.get_notebook_url('ps1/p1.ipynb')
+
+    def second():
+        authenticated.wait()
+        with app.test_request_context('/', headers={'Cookie': 'jupyter-hub-token=jkl'}):
+            assert auth.authenticate() is True
+            urls['jkl'] = auth.get_notebook_url('ps1/p1.ipynb')
+
+    first_thread = threading.Thread(target=first)
+    second_thread = threading.Thread(target=second)
+    first_thread.start()
+    second_thread.start()
+    first_thread.join()
+
+    assert urls['abc'] == auth.hub_base_url + '/user/foobar/notebooks/ps1/p1.ipynb'
+    assert urls['jkl'] == auth.hub_base_url + '/user/grader2/notebooks/ps1/p1.ipynb'
@@ -0,0 +1,51 @@
+from nbgrader import api
+from nbgrader.html.navigation import NotebookIndex, SubmissionNavigator
+
+
+def test_notebook_index():
+    index = NotebookIndex([("a", False), ("b", True), ("c", False), ("d", True)])
+    assert len(index) == 4
+    assert index.positions["c"] == 2
+    assert index.next("a") == "b"
+    assert index.next("d") is None
+    assert index.prev("a") is None
+    assert index.prev("c") == "b"
+    assert index.next_incorrect["a"] == "b"
+    assert index.next_incorrect["b"] == "d"
+    assert index.next_incorrect["d"] is None
+    assert index.prev_incorrect["b"] is None
+    assert index.prev_incorrect["d"] == "b"
+
+
+def test_submission_navigator():
+    gb = api.Gradebook("sqlite:///:memory:")
+    gb.add_assignment('foo')
+    gb.add_notebook('p1', 'foo')
+    gb.add_grade_cell('test1', 'p1', 'foo', max_score=1, cell_type='code')
+    gb.add_student('hacker123')
+    gb.add_student('bitdiddle')
+    gb.add_submission('foo', 'hacker123')
+
+    navigator = SubmissionNavigator(gb)
+    index = navigator.index('foo', 'p1')
+    assert len(index) == 1
+    assert navigator.index('foo', 'p1') is index
+
+    # changing a manual score should not invalidate the index
+    grade = gb.find_grade('test1', 'p1', 'foo', 'hacker123')
+    grade.manual_score = 1
+    gb.db.commit()
+    assert navigator.index('foo', 'p1') is index
+
+    # but changing an autograder score should
+    grade.auto_score = 0
+    gb.db.commit()
+    index = navigator.index('foo', 'p1')
+    assert index.next_incorrect == {grade.notebook_id: None}
+    assert index.prev_incorrect == {grade.notebook_id: None}
+
+    # as should adding a submission
+    gb.add_submission('foo', 'bitdiddle')
+    assert len(navigator.index('foo', 'p1')) == 2
+
+    gb.db.close()
@@ -0,0 +1,109 @@
+import os
+
+from nbgrader.html.cache import RenderCache, Prerenderer
+
+
+class FakeExporter(object):
+
+    template_file = 'formgrade'
+    template_path = []
+
+    def __init__(self):
+        self.calls = 0
+
+    def from_filename(self, filename, resources=None):
+        self.calls += 1
+        with open(filename, 'r') as fh:
+            contents = fh.read()
+        output = "{} {} {}/{} ({} remaining)".format(
+            contents, resources['submission_id'], resources['submission_number'],
+            resources['total'], resources['remaining'])
+        return output, resources
+
+
+def _resources(index, total, submission_id='abc'):
+    return {
+        'submission_id': submission_id,
+        'index': index,
+        'submission_number': index + 1,
+        'total': total,
+        'remaining': total - (index + 1)
+    }
+
+
+def test_render_cache(tmpdir):
+    filename = str(tmpdir.join("p1.ipynb"))
+    with open(filename, 'w') as fh:
+        fh.write("foo")
+
+    exporter = FakeExporter()
+    cache = RenderCache(exporter)
+
+    assert cache.render(filename, _resources(0, 3)) == "foo abc 1/3 (2 remaining)"
+    assert exporter.calls == 1
+
+    # a change in position should not require the notebook to be converted again
+    assert cache.render(filename, _resources(1, 4)) == "foo abc 2/4 (2 remaining)"
+    assert exporter.calls == 1
+
+    # but other resources should
+    assert cache.render(filename, _resources(1, 4, 'def')) == "foo def 2/4 (2 remaining)"
+    assert exporter.calls == 2
+
+    # as should changing the notebook
+    with open(filename, 'w') as fh:
+        fh.write("quux")
+    os.utime(filename, (0, 0))
+    assert cache.render(filename, _resources(0, 3)) == "quux abc 1/3 (2 remaining)"
+    assert exporter.calls == 3
+
+
+def test_render_cache_size(tmpdir):
+    filenames = []
+    for i in range(3):
+        filenames.append(str(tmpdir.join("p{}.ipynb".format(i))))
+        with open(filenames[-1], 'w') as fh:
+            fh.write("foo")
+
+    exporter = FakeExporter()
+    cache = RenderCache(exporter, size=2)
+    for filename in filenames:
+        cache.render(filename, _resources(0, 1))
+    assert len(cache) == 2
+    assert exporter.calls == 3
+
+    # the least recently used notebook should have been removed
+    cache.render(filenames[0], _resources(0, 1))
+    assert exporter.calls == 4
+    cache.render(filenames[2], _resources(0, 1))
+    assert exporter.calls == 4
+
+    cache = RenderCache(exporter, size=0)
+    cache.render(filenames[0], _resources(0, 1))
+    assert len(cache) == 0
+
+
+def test_prerenderer(tmpdir):
+    filenames = []
+    for i in range(3):
+        filenames.append(str(tmpdir.join("p{}.ipynb".format(i))))
+        with open(filenames[-1], 'w') as fh:
+            fh.write("foo")
+
+    exporter = FakeExporter()
+    cache = RenderCache(exporter)
+    background = FakeExporter()
+    prerenderer = Prerenderer(cache, lambda: background, workers=1)
+
+    # already cached notebooks and missing notebooks should be skipped
+    cache.render(filenames[0], _resources(0, 3))
+    prerenderer.schedule(
+        [(x, _resources(i, 3)) for i, x in enumerate(filenames)] +
+        [(str(tmpdir.join("missing.ipynb")), _resources(0, 3))])
+    prerenderer._pool.close()
+    prerenderer._pool.join()
+    assert background.calls == 2
+
+    # the pre-rendered notebooks should now be cached
+    assert cache.render(filenames[2], _resources(2, 3)) == "foo abc 3/3 (0 remaining)"
+    assert exporter.calls == 1
@@ -0,0 +1,44 @@
+import threading
+import requests
+
+from nbgrader.html.server import PooledWSGIServer
+
+
+def test_pooled_server_handles_requests_concurrently():
+    # each request waits until both requests are being handled, so this
+    # would never finish if the requests were handled one at a time
+    barrier = threading.Semaphore(0)
+    seen = []
+
+    def app(environ, start_response):
+        seen.append(environ['PATH_INFO'])
+        if len(seen) == 2:
+            barrier.release()
+            barrier.release()
+        barrier.acquire()
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [environ['PATH_INFO'].encode('utf-8')]
+
+    server = PooledWSGIServer('localhost', 0, app, workers=2)
+    url = "http://localhost:{}".format(server.server_address[1])
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    try:
+        responses = {}
+
+        def get(path):
+            responses[path] = requests.get(url + path, timeout=10).text
+
+        clients = [threading.Thread(target=get, args=(x,)) for x in ('/a', '/b')]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+
+        assert responses == {'/a': '/a', '/b': '/b'}
+
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -3,7 +3,7 @@ import pytest
 from IPython.nbformat.v4 import new_notebook, new_output
 
 from nbgrader.preprocessors import SaveCells, SaveAutoGrades
-from nbgrader.api import Gradebook
+from nbgrader.api import Gradebook, MissingEntry
 from nbgrader.utils import compute_checksum
 from nbgrader.tests.preprocessors.base import BaseTestPreprocessor
 from nbgrader.tests import (
@@ -209,3 +209,20 @@ class TestSaveAutoGrades(BaseTestPreprocessor):
 
         gradebook.db.refresh(comment)
         assert comment.auto_comment is None
+
+    def test_missing_grade(self, preprocessors, gradebook, resources):
+        """Is an error raised when a grade cell is not in the database?"""
+        cell = create_grade_cell("hello", "code", "foo", 1)
+        cell.metadata.nbgrader['checksum'] = compute_checksum(cell)
+        nb = new_notebook()
+        nb.cells.append(cell)
+        preprocessors[0].preprocess(nb, resources)
+        gradebook.add_submission("ps0", "bar")
+
+        nb.cells.append(create_grade_cell("hello", "code", "bar", 1))
+        with pytest.raises(MissingEntry):
+            preprocessors[1].preprocess(nb, resources)
+
+        # none of the grades should have been saved
+        grade_cell = gradebook.find_grade("foo", "test", "ps0", "bar")
+        assert grade_cell.auto_score == None
@@ -0,0 +1,198 @@
+import io
+import os
+import json
+import pytest
+import tarfile
+import tempfile
+import shutil
+
+from nbgrader.exchange import (
+    BlobStore, store_directory, restore_directory, is_stored, pack_directory,
+    unpack_directory, is_packed, ARCHIVE, MANIFEST)
+
+
+@pytest.fixture
+def temp_dir(request):
+    path = tempfile.mkdtemp()
+
+    def fin():
+        shutil.rmtree(path)
+    request.addfinalizer(fin)
+
+    return path
+
+
+def _write(path, contents):
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, "w") as fh:
+        fh.write(contents)
+
+
+def _read(path):
+    with open(path, "r") as fh:
+        return fh.read()
+
+
+def test_blob_store(temp_dir):
+    store = BlobStore(os.path.join(temp_dir, "blobs"))
+    assert not store.exists()
+    store.create()
+    assert store.exists()
+
+    _write(os.path.join(temp_dir, "foo.txt"), "foo")
+    _write(os.path.join(temp_dir, "bar.txt"), "foo")
+    digest = store.put(os.path.join(temp_dir, "foo.txt"))
+    assert store.put(os.path.join(temp_dir, "bar.txt")) == digest
+    assert os.listdir(os.path.join(temp_dir, "blobs", digest[:2])) == [digest]
+
+    store.get(digest, os.path.join(temp_dir, "baz.txt"))
+    assert _read(os.path.join(temp_dir, "baz.txt")) == "foo"
+
+    # files that have been changed since they were stored are rejected
+    os.chmod(store.blob_path(digest), 0o644)
+    _write(store.blob_path(digest), "bar")
+    with pytest.raises(ValueError):
+        store.get(digest, os.path.join(temp_dir, "baz.txt"))
+
+    # and are replaced when the file is stored again
+    assert store.put(os.path.join(temp_dir, "foo.txt")) == digest
+    store.get(digest, os.path.join(temp_dir, "baz.txt"))
+    assert _read(os.path.join(temp_dir, "baz.txt")) == "foo"
+
+
+def test_blob_store_directories(temp_dir):
+    store = BlobStore(os.path.join(temp_dir, "blobs"))
+    store.create()
+    assert len(os.listdir(store.path)) == 256
+    for path in [store.path, os.path.join(store.path, "ab")]:
+        assert os.stat(path).st_mode & 0o7777 == 0o3733
+
+    # students can't create the directories themselves
+    _write(os.path.join(temp_dir, "foo.txt"), "foo")
+    digest = store.put(os.path.join(temp_dir, "foo.txt"))
+    shutil.rmtree(os.path.dirname(store.blob_path(digest)))
+    assert store.put(os.path.join(temp_dir, "foo.txt")) is None
+
+    # but the instructor can recreate them
+    store.create()
+    assert store.put(os.path.join(temp_dir, "foo.txt")) == digest
+
+
+def test_store_directory_without_store_directories(temp_dir):
+    store = BlobStore(os.path.join(temp_dir, "blobs"))
+    store.create()
+    src = os.path.join(temp_dir, "src")
+    _write(os.path.join(src, "data", "big.csv"), "data")
+    digest = store.put(os.path.join(src, "data", "big.csv"))
+    shutil.rmtree(os.path.dirname(store.blob_path(digest)))
+
+    # files which can't be stored are copied into the submission instead
+    submission = os.path.join(temp_dir, "submission")
+    os.mkdir(submission)
+    assert store_directory(src, submission, store) == {"data/big.csv": None}
+    assert _read(os.path.join(submission, "data", "big.csv")) == "data"
+
+    dest = os.path.join(temp_dir, "dest")
+    restore_directory(submission, dest, store)
+    assert _read(os.path.join(dest, "data", "big.csv")) == "data"
+
+
+def test_store_and_restore_directory(temp_dir):
+    store = BlobStore(os.path.join(temp_dir, "blobs"))
+    store.create()
+    src = os.path.join(temp_dir, "src")
+    _write(os.path.join(src, "p1.ipynb"), "p1")
+    _write(os.path.join(src, "data", "big.csv"), "data")
+    _write(os.path.join(src, ".ipynb_checkpoints", "p1.ipynb"), "p1")
+
+    submission = os.path.join(temp_dir, "submission")
+    os.mkdir(submission)
+    manifest = store_directory(src, submission, store, [".ipynb_checkpoints"])
+    assert sorted(manifest.keys()) == ["data/big.csv", "p1.ipynb"]
+    _write(os.path.join(submission, "timestamp.txt"), "2015-02-02 14:58:23 UTC")
+    assert is_stored(submission)
+    assert not is_stored(src)
+
+    dest = os.path.join(temp_dir, "dest")
+    assert restore_directory(submission, dest, store) == 3
+    assert _read(os.path.join(dest, "p1.ipynb")) == "p1"
+    assert _read(os.path.join(dest, "data", "big.csv")) == "data"
+    assert _read(os.path.join(dest, "timestamp.txt")) == "2015-02-02 14:58:23 UTC"
+    assert not os.path.exists(os.path.join(dest, ".ipynb_checkpoints"))
+
+    # resubmit with one file changed, and one removed
+    _write(os.path.join(src, "p1.ipynb"), "p1 again")
+    os.remove(os.path.join(src, "data", "big.csv"))
+    submission2 = os.path.join(temp_dir, "submission2")
+    os.mkdir(submission2)
+    store_directory(src, submission2, store, [".ipynb_checkpoints"])
+
+    assert restore_directory(submission2, dest, store) == 1
+    assert _read(os.path.join(dest, "p1.ipynb")) == "p1 again"
+    assert not os.path.exists(os.path.join(dest, "data"))
+    assert not os.path.exists(os.path.join(dest, "timestamp.txt"))
+
+
+def test_pack_and_unpack_directory(temp_dir):
+    src = os.path.join(temp_dir, "src")
+    _write(os.path.join(src, "p1.ipynb"), "p1")
+    _write(os.path.join(src, "data", "big.csv"), "data")
+    _write(os.path.join(src, ".ipynb_checkpoints", "p1.ipynb"), "p1")
+
+    submission = os.path.join(temp_dir, "submission")
+    os.mkdir(submission)
+    manifest = pack_directory(src, submission, [".ipynb_checkpoints"])
+    assert sorted(manifest.keys()) == ["data/big.csv", "p1.ipynb"]
+    assert os.listdir(submission) == [ARCHIVE]
+    _write(os.path.join(submission, "timestamp.txt"), "2015-02-02 14:58:23 UTC")
+    assert is_packed(submission)
+    assert not is_packed(src)
+
+    dest = os.path.join(temp_dir, "dest")
+    assert unpack_directory(submission, dest) == 2
+    assert _read(os.path.join(dest, "p1.ipynb")) == "p1"
+    assert _read(os.path.join(dest, "data", "big.csv")) == "data"
+    assert _read(os.path.join(dest, "timestamp.txt")) == "2015-02-02 14:58:23 UTC"
+    assert not os.path.exists(os.path.join(dest, ".ipynb_checkpoints"))
+
+    # unpacking again replaces the directory
+    _write(os.path.join(dest, "extra.txt"), "extra")
+    assert unpack_directory(submission, dest) == 2
+    assert not os.path.exists(os.path.join(dest, "extra.txt"))
+
+
+def _add(tar, name, contents):
+    info = tarfile.TarInfo(name)
+    info.size = len(contents)
+    tar.addfile(info, io.BytesIO(contents))
+
+
+def test_unpack_directory_checks_manifest(temp_dir):
+    submission = os.path.join(temp_dir, "submission")
+    os.mkdir(submission)
+    dest = os.path.join(temp_dir, "dest")
+    _write(os.path.join(dest, "p1.ipynb"), "p1")
+
+    manifest = {"files": {"p1.ipynb": "0" * 64}}
+    with tarfile.open(os.path.join(submission, ARCHIVE), "w:gz") as tar:
+        _add(tar, "p1.ipynb", b"p2")
+        _add(tar, MANIFEST, json.dumps(manifest).encode("utf-8"))
+
+    with pytest.raises(ValueError):
+        unpack_directory(submission, dest)
+
+    # the existing files should be left alone
+    assert _read(os.path.join(dest, "p1.ipynb")) == "p1"
+    assert sorted(os.listdir(temp_dir)) == ["dest", "submission"]
+
+
+def test_unpack_directory_rejects_paths_outside(temp_dir):
+    submission = os.path.join(temp_dir, "submission")
+    os.mkdir(submission)
+    with tarfile.open(os.path.join(submission, ARCHIVE), "w:gz") as tar:
+        _add(tar, "../evil.txt", b"evil")
+
+    with pytest.raises(ValueError):
+        unpack_directory(submission, os.path.join(temp_dir, "dest"))
+    assert not os.path.exists(os.path.join(temp_dir, "evil.txt"))
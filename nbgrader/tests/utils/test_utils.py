@@ -248,6 +248,23 @@ def test_compute_checksum_solution_cell():
     assert utils.compute_checksum(cell1) != utils.compute_checksum(cell2)
 
 
+def test_compute_file_checksum(temp_cwd):
+    os.makedirs("foo/bar")
+    with open("foo/baz.txt", "w") as fh:
+        fh.write("baz")
+    with open("foo/bar/baz.txt", "w") as fh:
+        fh.write("baz")
+
+    checksum = utils.compute_file_checksum("foo", ["foo/baz.txt", "foo/bar/baz.txt"])
+    assert checksum == utils.compute_file_checksum("foo", ["foo/bar/baz.txt", "foo/baz.txt"])
+    assert checksum != utils.compute_file_checksum("foo", ["foo/baz.txt"])
+    assert checksum != utils.compute_file_checksum("foo/bar", ["foo/baz.txt", "foo/bar/baz.txt"])
+
+    with open("foo/bar/baz.txt", "w") as fh:
+        fh.write("bazz")
+    assert checksum != utils.compute_file_checksum("foo", ["foo/baz.txt", "foo/bar/baz.txt"])
+
+
 def test_is_ignored(temp_cwd):
     os.mkdir("foo")
     with open("foo/bar.txt", "w") as fh:
@@ -260,6 +277,9 @@ def test_is_ignored(temp_cwd):
     assert not utils.is_ignored("foo/bar.txt", ["*.csv"])
     assert not utils.is_ignored("foo/bar.txt", ["foo"])
     assert not utils.is_ignored("foo/bar.txt", ["foo/*"])
+    assert not utils.is_ignored("foo/.bar.txt", ["*.txt"])
+    assert utils.is_ignored("foo/.bar.txt", [".*"])
+    assert utils.is_ignored("foo/.ipynb_checkpoints", [".ipynb_checkpoints", "*.pyc"])
 
 
 def test_find_all_files(temp_cwd):
@@ -275,3 +295,86 @@ def test_find_all_files(temp_cwd):
     assert utils.find_all_files("foo/bar", ["*.txt"]) == []
     assert utils.find_all_files(".") == ["./foo/baz.txt", "./foo/bar/baz.txt"]
     assert utils.find_all_files(".", ["bar"]) == ["./foo/baz.txt"]
+
+
+def test_find_all_files_prunes_ignored_directories(temp_cwd):
+    os.makedirs("foo/bar/baz")
+    with open("foo/baz.txt", "w") as fh:
+        fh.write("baz")
+    with open("foo/bar/baz/baz.txt", "w") as fh:
+        fh.write("baz")
+    with open("foo/.hidden.txt", "w") as fh:
+        fh.write("baz")
+
+    assert sorted(utils.find_all_files("foo")) == ["foo/.hidden.txt", "foo/bar/baz/baz.txt", "foo/baz.txt"]
+    assert sorted(utils.find_all_files("foo", ["bar"])) == ["foo/.hidden.txt", "foo/baz.txt"]
+    assert utils.find_all_files("foo", ["*.txt"]) == []
+    assert sorted(utils.find_all_files("foo", [".*"])) == ["foo/bar/baz/baz.txt", "foo/baz.txt"]
+
+
+def test_find_all_files_does_not_match_root(temp_cwd):
+    os.makedirs(".foo/bar")
+    with open(".foo/bar/baz.txt", "w") as fh:
+        fh.write("baz")
+    with open(".foo/bar/baz.pyc", "w") as fh:
+        fh.write("baz")
+
+    # the globs only apply to what is inside the root
+    assert sorted(utils.find_all_files(".foo", [".*"])) == [".foo/bar/baz.pyc", ".foo/bar/baz.txt"]
+    assert utils.find_all_files(".foo/bar", ["bar", "*.pyc"]) == [".foo/bar/baz.txt"]
+    os.chdir(".foo")
+    assert utils.find_all_files(".", ["*.pyc", ".*"]) == ["./bar/baz.txt"]
+
+
+def test_sync_directory(temp_cwd):
+    os.makedirs("src/bar")
+    os.makedirs("src/.ipynb_checkpoints")
+    with open("src/foo.txt", "w") as fh:
+        fh.write("foo")
+    with open("src/bar/bar.txt", "w") as fh:
+        fh.write("bar")
+    with open("src/.ipynb_checkpoints/foo.txt", "w") as fh:
+        fh.write("foo")
+
+    assert utils.sync_directory("src", "dest", [".ipynb_checkpoints"]) == 2
+    assert sorted(utils.find_all_files("dest")) == ["dest/bar/bar.txt", "dest/foo.txt"]
+
+    # nothing has changed, so nothing should be copied
+    assert utils.sync_directory("src", "dest", [".ipynb_checkpoints"]) == 0
+
+    # change one file, remove another, and add a new one
+    with open("src/foo.txt", "w") as fh:
+        fh.write("food")
+    os.remove("src/bar/bar.txt")
+    with open("src/baz.txt", "w") as fh:
+        fh.write("baz")
+
+    assert utils.sync_directory("src", "dest", [".ipynb_checkpoints"]) == 2
+    assert sorted(utils.find_all_files("dest")) == ["dest/baz.txt", "dest/foo.txt"]
+    assert not os.path.exists("dest/bar")
+    with open("dest/foo.txt", "r") as fh:
+        assert fh.read() == "food"
+
+
+def test_files_differ(temp_cwd):
+    with open("foo.txt", "w") as fh:
+        fh.write("foo")
+    with open("bar.txt", "w") as fh:
+        fh.write("foo")
+
+    assert utils.files_differ("foo.txt", "baz.txt")
+
+    # same size and contents, but a different modification time
+    os.utime("bar.txt", (0, 0))
+    assert not utils.files_differ("foo.txt", "bar.txt")
+
+    # same size, but different contents
+    with open("bar.txt", "w") as fh:
+        fh.write("bar")
+    os.utime("bar.txt", (0, 0))
+    assert utils.files_differ("foo.txt", "bar.txt")
+
+    # different sizes
+    with open("bar.txt", "w") as fh:
+        fh.write("food")
+    assert utils.files_differ("foo.txt", "bar.txt")
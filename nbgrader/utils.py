@@ -1,8 +1,10 @@
 import os
+import shutil
 import hashlib
 import dateutil.parser
 import pwd
-import glob
+import re
+import fnmatch
 
 from IPython.utils.py3compat import str_to_bytes, string_types
 
@@ -73,6 +75,40 @@ def compute_checksum(cell):
 
     return m.hexdigest()
 
+def compute_file_checksum(root, filenames):
+    """Computes a checksum of the names (relative to `root`) and contents of
+    the given files."""
+    m = hashlib.md5()
+    for filename in sorted(filenames):
+        relpath = os.path.relpath(filename, root)
+        m.update(str_to_bytes("{}:{}\n".format(relpath, os.path.getsize(filename))))
+        with open(filename, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(65536), b''):
+                m.update(chunk)
+    return m.hexdigest()
+
+def _file_digest(filename):
+    m = hashlib.md5()
+    with open(filename, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(65536), b''):
+            m.update(chunk)
+    return m.digest()
+
+def files_differ(src, dest):
+    """Determines whether the file `dest` needs to be updated to match the
+    file `src`. Files of different sizes always differ; files of the same size
+    and modification time are assumed to be the same; and otherwise, the
+    contents of the files are compared."""
+    if not os.path.exists(dest):
+        return True
+    src_stat = os.stat(src)
+    dest_stat = os.stat(dest)
+    if src_stat.st_size != dest_stat.st_size:
+        return True
+    if int(src_stat.st_mtime) == int(dest_stat.st_mtime):
+        return False
+    return _file_digest(src) != _file_digest(dest)
+
 def parse_utc(ts):
     """Parses a timestamp into datetime format, converting it to UTC if necessary."""
     if ts is None:
@@ -113,30 +149,82 @@ def self_owned(path):
     """Is the path owned by the current user of this process?"""
     return get_username() == find_owner(os.path.abspath(path))
 
+def compile_ignore_globs(ignore_globs=None):
+    """Compiles a list of file globs into a function which takes a base
+    filename, and returns whether it matches any of the globs. The globs are
+    combined into a single regular expression, so checking a filename does
+    not need to touch the filesystem.
+
+    Like :func:`glob.glob`, wildcards do not match hidden files (those whose
+    names start with a dot) unless the glob itself starts with a dot.
+
+    """
+    if not ignore_globs:
+        return lambda name: False
+
+    def combine(globs):
+        if len(globs) == 0:
+            return None
+        return re.compile("|".join("(?:{})".format(fnmatch.translate(x)) for x in globs))
+
+    visible = combine(ignore_globs)
+    hidden = combine([x for x in ignore_globs if x.startswith('.')])
+
+    def matches(name):
+        if name.startswith('.'):
+            return hidden is not None and hidden.match(name) is not None
+        return visible.match(name) is not None
+
+    return matches
+
 def is_ignored(filename, ignore_globs=None):
     """Determines whether a filename should be ignored, based on whether it
     matches any file glob in the given list. Note that this only matches on the
     base filename itself, not the full path."""
     if ignore_globs is None:
         return False
-    dirname = os.path.dirname(filename)
-    for expr in ignore_globs:
-        globs = glob.glob(os.path.join(dirname, expr))
-        if filename in globs:
-            return True
-    return False
+    return compile_ignore_globs(ignore_globs)(os.path.basename(filename))
 
 def find_all_files(path, exclude=None):
     """Recursively finds all filenames rooted at `path`, optionally excluding
-    some based on filename globs."""
+    some based on filename globs. Directories matching any of the globs are
+    not descended into. The globs are only matched against the files and
+    directories within `path`, not against `path` itself."""
+    ignored = compile_ignore_globs(exclude)
     files = []
     for dirname, dirnames, filenames in os.walk(path):
-        if is_ignored(dirname, exclude):
-            continue
+        dirnames[:] = [x for x in dirnames if not ignored(x)]
         for filename in filenames:
-            fullpath = os.path.join(dirname, filename)
-            if is_ignored(fullpath, exclude):
-                continue
-            else:
-                files.append(fullpath)
+            if not ignored(filename):
+                files.append(os.path.join(dirname, filename))
     return files
+
+def sync_directory(src, dest, exclude=None):
+    """Makes `dest` a copy of `src`, optionally excluding some files based on
+    filename globs, by only copying the files which have changed (see
+    :func:`files_differ`) and removing any files in `dest` that are not in
+    `src`. Returns the number of files that were copied."""
+    if not os.path.isdir(dest):
+        os.makedirs(dest)
+
+    copied = 0
+    keep = set()
+    for filename in find_all_files(src, exclude):
+        relpath = os.path.relpath(filename, src)
+        target = os.path.join(dest, relpath)
+        keep.add(relpath)
+        if files_differ(filename, target):
+            if not os.path.isdir(os.path.dirname(target)):
+                os.makedirs(os.path.dirname(target))
+            shutil.copy2(filename, target)
+            copied += 1
+
+    for dirname, dirnames, filenames in os.walk(dest, topdown=False):
+        for filename in filenames:
+            fullpath = os.path.join(dirname, filename)
+            if os.path.relpath(fullpath, dest) not in keep:
+                os.remove(fullpath)
+        if dirname != dest and len(os.listdir(dirname)) == 0:
+            os.rmdir(dirname)
+
+    return copied